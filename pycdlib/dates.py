@@ -57,6 +57,8 @@ class InterfaceISODate(object):
     the VolumeDescriptorDate class and the DirectoryRecordDate class implement
     the same interface.
     '''
+    __slots__ = ()
+
     def parse(self, datestr):
         '''
         The unimplemeted parse method for the parent class.  The child class
@@ -105,6 +107,9 @@ class DirectoryRecordDate(InterfaceISODate):
     fill in the fields (the parse() method), or to create a new entry with a
     tm structure (the new() method).
     '''
+    __slots__ = ('_initialized', 'day_of_month', 'gmtoffset', 'hour',
+                 'minute', 'month', 'second', 'years_since_1900')
+
     FMT = "=BBBBBBb"
 
     def __init__(self):
@@ -186,6 +191,9 @@ class VolumeDescriptorDate(InterfaceISODate):
     string to fill in the fields (the parse() method), or to create a new entry
     with a tm structure (the new() method).
     '''
+    __slots__ = ('_initialized', 'date_str', 'day_of_month', 'dayofmonth',
+                 'gmtoffset', 'hour', 'hundredthsofsecond', 'minute', 'month',
+                 'present', 'second', 'year')
 
     TIME_FMT = "%Y%m%d%H%M%S"
     EMPTY_STRING = b'0' * 16 + b'\x00'
@@ -0,0 +1,270 @@
+# Copyright (C) 2015-2017  Chris Lalancette <clalancette@gmail.com>
+
+# This library is free software; you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License as published by the Free Software Foundation;
+# version 2.1 of the License.
+
+# This library is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+
+# You should have received a copy of the GNU Lesser General Public
+# License along with this library; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301  USA
+
+'''
+Implementation of a compact, read-only index of a directory tree.
+'''
+
+from __future__ import absolute_import
+
+import array
+
+import pycdlib.pycdlibexception as pycdlibexception
+
+
+class DirectoryIndex(object):
+    '''
+    A class that represents a read-only index of the directory tree of a
+    volume descriptor.  Instead of one object per directory record, every
+    entry is a row in a set of flat arrays, and all of the names are packed
+    into a single string.  Entry 0 is the root directory; the children of a
+    directory are stored next to each other, sorted by name, so lookups can
+    bisect them.  Only what is needed to find an entry is kept; everything
+    else is read back from the directory record on the ISO when it is needed.
+    '''
+    __slots__ = ('_child_counts', '_child_starts', '_names', '_name_ends',
+                 '_rr_names', '_rr_name_ends', 'child_links', 'extents',
+                 'flags', 'lengths', 'parents', 'record_offsets',
+                 'rr_bytes_to_skip')
+
+    # The entry is a directory.
+    FLAG_DIRECTORY = 0x1
+    # The entry is a Rock Ridge symlink.
+    FLAG_SYMLINK = 0x2
+    # The entry is a further section of the data of the entry before it.
+    FLAG_SECTION = 0x4
+
+    def __init__(self, root_extent, root_length, rr_bytes_to_skip):
+        self.extents = array.array('I', [root_extent])
+        self.lengths = array.array('I', [root_length])
+        self.parents = array.array('I', [0])
+        self.flags = array.array('B', [self.FLAG_DIRECTORY])
+        self.record_offsets = array.array('I', [0])
+        self._name_ends = array.array('I', [0])
+        self._rr_name_ends = array.array('I', [0])
+        self._child_starts = array.array('I', [0])
+        self._child_counts = array.array('I', [0])
+        self._names = bytearray()
+        self._rr_names = bytearray()
+        # A mapping of the entries with a Rock Ridge child link to the
+        # directory that they link to; there are few enough of these that a
+        # dictionary is fine.
+        self.child_links = {}
+        # The number of bytes to skip at the start of the Rock Ridge entries,
+        # needed to parse the directory records again later.
+        self.rr_bytes_to_skip = rr_bytes_to_skip
+
+    def __len__(self):
+        return len(self.extents)
+
+    def add_children(self, parent, children):
+        '''
+        Add the children of a directory to the index.  This must be called
+        exactly once for each directory.
+
+        Parameters:
+         parent - The index of the directory.
+         children - A list of tuples of the name, Rock Ridge name (or None),
+                    extent, length, flags and offset of the directory record
+                    within the directory, one for each child other than the
+                    "." and ".." entries.
+        Returns:
+         The index of the first child.
+        '''
+        start = len(self.extents)
+        # The sort is stable, so the sections of a file stay in order.
+        children = sorted(children, key=lambda child: child[0])
+        last_name = None
+        for (name, rr_name, extent, length, flags, offset) in children:
+            if name == last_name and not flags & self.FLAG_DIRECTORY:
+                flags |= self.FLAG_SECTION
+            last_name = name
+            self.extents.append(extent)
+            self.lengths.append(length)
+            self.parents.append(parent)
+            self.flags.append(flags)
+            self.record_offsets.append(offset)
+            self._names += name
+            self._name_ends.append(len(self._names))
+            if rr_name is not None:
+                self._rr_names += rr_name
+            self._rr_name_ends.append(len(self._rr_names))
+            self._child_starts.append(0)
+            self._child_counts.append(0)
+
+        self._child_starts[parent] = start
+        self._child_counts[parent] = len(children)
+
+        return start
+
+    def finish(self):
+        '''
+        Finish building the index, packing the names.
+
+        Parameters:
+         None.
+        Returns:
+         Nothing.
+        '''
+        self._names = bytes(self._names)
+        self._rr_names = bytes(self._rr_names)
+
+    def name(self, index):
+        '''
+        Get the ISO9660 (or Joliet) name of an entry.
+
+        Parameters:
+         index - The index of the entry.
+        Returns:
+         The name of the entry, as recorded on the ISO.
+        '''
+        if index == 0:
+            return b''
+        return bytes(self._names[self._name_ends[index - 1]:self._name_ends[index]])
+
+    def rr_name(self, index):
+        '''
+        Get the Rock Ridge name of an entry.
+
+        Parameters:
+         index - The index of the entry.
+        Returns:
+         The Rock Ridge name of the entry, or the empty string if it has none.
+        '''
+        if index == 0:
+            return b''
+        return bytes(self._rr_names[self._rr_name_ends[index - 1]:self._rr_name_ends[index]])
+
+    def is_dir(self, index):
+        '''
+        Determine whether an entry is a directory.
+
+        Parameters:
+         index - The index of the entry.
+        Returns:
+         True if the entry is a directory, False otherwise.
+        '''
+        return bool(self.flags[index] & self.FLAG_DIRECTORY)
+
+    def sections(self, index):
+        '''
+        Get all of the entries holding the data of a file, which is more than
+        one for very large files.
+
+        Parameters:
+         index - The index of the first entry of the file.
+        Returns:
+         A list of the indices of the sections of the file, in order.
+        '''
+        out = [index]
+        end = self._child_starts[self.parents[index]] + self._child_counts[self.parents[index]]
+        index += 1
+        while index < end and self.flags[index] & self.FLAG_SECTION:
+            out.append(index)
+            index += 1
+        return out
+
+    def children(self, index):
+        '''
+        Get the children of a directory, leaving out the extra sections of
+        files.
+
+        Parameters:
+         index - The index of the directory.
+        Returns:
+         A list of the indices of the children.
+        '''
+        start = self._child_starts[index]
+        return [child for child in range(start, start + self._child_counts[index])
+                if not self.flags[child] & self.FLAG_SECTION]
+
+    def path(self, index, encoding):
+        '''
+        Get the full path to an entry.
+
+        Parameters:
+         index - The index of the entry.
+         encoding - The encoding of the names.
+        Returns:
+         The absolute path of the entry, as a string.
+        '''
+        if index == 0:
+            return '/'
+        parts = []
+        while index != 0:
+            parts.append(self.name(index).decode(encoding))
+            index = self.parents[index]
+        return '/' + '/'.join(reversed(parts))
+
+    def _find_child(self, parent, name):
+        '''
+        Internal method to find the child of a directory with a particular
+        name.
+
+        Parameters:
+         parent - The index of the directory.
+         name - The ISO9660 (or Joliet) or Rock Ridge name to look for.
+        Returns:
+         The index of the child, or None if there is no such child.
+        '''
+        lo = self._child_starts[parent]
+        hi = lo + self._child_counts[parent]
+        start = lo
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.name(mid) < name:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < start + self._child_counts[parent] and self.name(lo) == name:
+            return lo
+
+        # The Rock Ridge names aren't sorted; see _find_record for why.
+        for child in range(start, start + self._child_counts[parent]):
+            if self.rr_name(child) == name and not self.flags[child] & self.FLAG_SECTION:
+                return child
+
+        return None
+
+    def find(self, path, encoding):
+        '''
+        Find the entry for a path.
+
+        Parameters:
+         path - The absolute path to look up, as a UTF-8 string.
+         encoding - The encoding of the names on the ISO.
+        Returns:
+         The index of the entry.
+        '''
+        if path[:1] != b'/':
+            raise pycdlibexception.PyCdlibInvalidInput("Must be a path starting with /")
+
+        index = 0
+        for name in path.split(b'/')[1:]:
+            if not name:
+                continue
+            if not self.flags[index] & self.FLAG_DIRECTORY:
+                index = None
+                break
+            index = self._find_child(index, name.decode('utf-8').encode(encoding))
+            if index is None:
+                break
+            index = self.child_links.get(index, index)
+
+        if index is None:
+            raise pycdlibexception.PyCdlibInvalidInput("Could not find path %s" % (path))
+
+        return index
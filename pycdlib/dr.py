@@ -24,6 +24,7 @@ import bisect
 import struct
 
 import pycdlib.dates as dates
+import pycdlib.eltorito as eltorito
 import pycdlib.pycdlibexception as pycdlibexception
 import pycdlib.rockridge as rockridge
 import pycdlib.utils as utils
@@ -34,6 +35,8 @@ class XARecord(object):
     A class that represents an ISO9660 Extended Attribute record as defined
     in the Philips Yellow Book standard.
     '''
+    __slots__ = ('_attributes', '_filenum', '_group_id', '_initialized',
+                 '_user_id')
 
     FMT = "=HHH2sB5s"
 
@@ -63,6 +66,20 @@ class XARecord(object):
 
         self._initialized = True
 
+    @classmethod
+    def is_valid(cls, xastr):
+        '''
+        A class method to check whether a string holds a valid Extended
+        Attribute Record, without parsing it.
+
+        Parameters:
+         xastr - The string to check.
+        Returns:
+         True if the string holds a valid Extended Attribute Record, False
+         otherwise.
+        '''
+        return xastr[6:8] == b"XA" and xastr[9:14] == b'\x00\x00\x00\x00\x00'
+
     def new(self):
         '''
         Create a new Extended Attribute Record.
@@ -108,6 +125,16 @@ class DirectoryRecord(object):
     '''
     A class that represents an ISO9660 directory record.
     '''
+    __slots__ = ('_boot_info_table', '_boot_info_vd', '_date',
+                 '_file_unit_size', '_initialized', '_interleave_gap_size',
+                 '_printable_name', '_raw', '_seqnum', '_xa_pad_size',
+                 '_xa_record', 'children', 'data_continuation', 'data_fp', 'data_length', 'dr_len',
+                 'extents_to_here', 'file_flags', 'file_ident', 'fp_offset',
+                 'hidden', 'is_root', 'isdir', 'len_fi', 'linked_records',
+                 'manage_fp', 'new_extent_loc', 'offset_to_here',
+                 'orig_extent_loc', 'original_data_location', 'parent', 'ptr',
+                 'rock_ridge', 'target', 'xattr_len')
+
     FILE_FLAG_EXISTENCE_BIT = 0
     FILE_FLAG_DIRECTORY_BIT = 1
     FILE_FLAG_ASSOCIATED_FILE_BIT = 2
@@ -120,10 +147,17 @@ class DirectoryRecord(object):
 
     FMT = "=BBLLLL7sBBBHHB"
 
+    # The part of FMT that is decoded as soon as a record is parsed; the rest
+    # is decoded from the raw record the first time it is used.
+    PARSE_FMT = "=BBLLL"
+
     def __init__(self):
         self._initialized = False
+        self._raw = None
+        self._printable_name = None
         self.new_extent_loc = None
-        self.boot_info_table = None
+        self._boot_info_table = None
+        self._boot_info_vd = None
         self.linked_records = []
         self.target = None
         self.data_fp = None
@@ -133,17 +167,22 @@ class DirectoryRecord(object):
         self.ptr = None
         self.extents_to_here = 1
         self.offset_to_here = 0
-        self.xa_pad_size = 0
+        self._xa_pad_size = 0
         self.data_continuation = None
 
-    def parse(self, record, data_fp, parent):
+    def parse(self, record, data_fp, parent, check_endian=True, parse_rr=True):
         '''
         Parse a directory record out of a string.
 
         Parameters:
-         record - The string to parse for this record.
+         record - The string (or memoryview) to parse for this record.
          data_fp - The file object to associate with this record.
          parent - The parent of this record.
+         check_endian - Whether to check that the big-endian copies of the
+                        extent location and sequence number agree with the
+                        little-endian ones.
+         parse_rr - Whether to look for Rock Ridge extensions; if False, the
+                    record is treated as plain ISO9660.
         Returns:
          True if this Directory Record has Rock Ridge extensions, False otherwise.
         '''
@@ -155,17 +194,22 @@ class DirectoryRecord(object):
             # happen.
             raise pycdlibexception.PyCdlibInvalidISO("Directory record longer than 255 bytes!")
 
+        # Only the fields needed to walk the directory tree are decoded here;
+        # the raw record is kept so that the date, the XA record and the rest
+        # can be decoded the first time they are used.
+        raw = memoryview(record).tobytes()
+
         (self.dr_len, self.xattr_len, extent_location_le, extent_location_be,
-         data_length_le, data_length_be_unused, dr_date, self.file_flags,
-         self.file_unit_size, self.interleave_gap_size, seqnum_le, seqnum_be,
-         self.len_fi) = struct.unpack_from(self.FMT, record[:33], 0)
+         data_length_le) = struct.unpack_from(self.PARSE_FMT, raw, 0)
+        (self.file_flags,) = struct.unpack_from("=B", raw, 25)
+        (self.len_fi,) = struct.unpack_from("=B", raw, 32)
 
         # In theory we should have a check here that checks to make sure that
         # the length of the record we were passed in matches the data record
         # length.  However, we have seen ISOs in the wild where this is
         # incorrect, so we elide the check here.
 
-        if extent_location_le != utils.swab_32bit(extent_location_be):
+        if check_endian and extent_location_le != utils.swab_32bit(extent_location_be):
             raise pycdlibexception.PyCdlibInvalidISO("Little-endian (%d) and big-endian (%d) extent location disagree" % (extent_location_le, utils.swab_32bit(extent_location_be)))
         self.orig_extent_loc = extent_location_le
         self.new_extent_loc = None
@@ -177,12 +221,10 @@ class DirectoryRecord(object):
 
         self.data_length = data_length_le
 
-        if seqnum_le != utils.swab_16bit(seqnum_be):
-            raise pycdlibexception.PyCdlibInvalidISO("Little-endian and big-endian seqnum disagree")
-        self.seqnum = seqnum_le
-
-        self.date = dates.DirectoryRecordDate()
-        self.date.parse(dr_date)
+        if check_endian:
+            (seqnum_le, seqnum_be) = struct.unpack_from("=HH", raw, 28)
+            if seqnum_le != utils.swab_16bit(seqnum_be):
+                raise pycdlibexception.PyCdlibInvalidISO("Little-endian and big-endian seqnum disagree")
 
         # OK, we've unpacked what we can from the beginning of the string.  Now
         # we have to use the len_fi to get the rest.
@@ -195,8 +237,6 @@ class DirectoryRecord(object):
 
         self.rock_ridge = None
 
-        self.xa_record = None
-
         if self.parent is None:
             self.is_root = True
 
@@ -204,44 +244,27 @@ class DirectoryRecord(object):
             # However, we have seen ISOs in the wild that get this wrong, so we
             # elide a check for it.
 
-            self.file_ident = bytes(bytearray([record[33]]))
+            self.file_ident = raw[33:34]
 
             # A root directory entry should always have 0 as the identifier.
             if self.file_ident != b'\x00':
                 raise pycdlibexception.PyCdlibInvalidISO("Invalid root directory entry identifier")
             self.isdir = True
         else:
-            record_offset = 33
-            self.file_ident = record[record_offset:record_offset + self.len_fi]
-            record_offset += self.len_fi
+            self.file_ident = raw[33:33 + self.len_fi]
             if self.file_flags & (1 << self.FILE_FLAG_DIRECTORY_BIT):
                 self.isdir = True
             else:
                 self.original_data_location = self.DATA_ON_ORIGINAL_ISO
 
-            if self.len_fi % 2 == 0:
-                record_offset += 1
-
-            if len(record[record_offset:]) >= XARecord.length():
-                xa_rec = XARecord()
-
-                try:
-                    xa_rec.parse(record[record_offset:record_offset + XARecord.length()])
-                    self.xa_record = xa_rec
-                    record_offset += XARecord.length()
-                except pycdlibexception.PyCdlibInvalidISO:
-                    # We've seen some ISOs in the wild (Windows 98 SE) that
-                    # put the XA record all the way at the back, with some
-                    # padding.  Try again from the back.
-                    try:
-                        xa_rec.parse(record[-XARecord.length():])
-                        self.xa_record = xa_rec
-                        self.xa_pad_size = len(record) - record_offset - XARecord.length()
-                        record_offset = len(record)
-                    except pycdlibexception.PyCdlibInvalidISO:
-                        pass
-
-            if len(record[record_offset:]) >= 2 and record[record_offset:record_offset + 2] in [b'SP', b'RR', b'CE', b'PX', b'ER', b'ES', b'PN', b'SL', b'NM', b'CL', b'PL', b'TF', b'SF', b'RE']:
+            # The XA record itself is decoded later; all we need to know now is
+            # where the Rock Ridge entries start.
+            xa_offset, xa_pad_size_unused = self._find_xa_record(raw)
+            record_offset = self._system_use_offset()
+            if xa_offset is not None:
+                record_offset = xa_offset + XARecord.length()
+
+            if parse_rr and len(raw) - record_offset >= 2 and raw[record_offset:record_offset + 2] in [b'SP', b'RR', b'CE', b'PX', b'ER', b'ES', b'PN', b'SL', b'NM', b'CL', b'PL', b'TF', b'SF', b'RE']:
                 self.rock_ridge = rockridge.RockRidge()
                 is_first_dir_record_of_root = self.file_ident == b'\x00' and parent.parent is None
 
@@ -263,6 +286,8 @@ class DirectoryRecord(object):
             if self.file_flags & (1 << self.FILE_FLAG_PROTECTION_BIT):
                 raise pycdlibexception.PyCdlibInvalidISO("Protection Bit not allowed with Extended Attributes")
 
+        self._raw = raw
+        self._printable_name = None
         self._initialized = True
 
         if self.rock_ridge is None:
@@ -270,17 +295,159 @@ class DirectoryRecord(object):
         else:
             ret = self.rock_ridge.rr_version
 
-        if self.is_root:
-            self._printable_name = b'/'
-        elif self.file_ident == b'\x00':
-            self._printable_name = b'.'
-        elif self.file_ident == b'\x01':
-            self._printable_name = b'..'
-        else:
-            self._printable_name = self.file_ident
-
         return ret
 
+    def _system_use_offset(self):
+        '''
+        Internal method to find where the System Use area of a parsed record
+        starts, just past the identifier and its padding byte.
+
+        Parameters:
+         None.
+        Returns:
+         The offset of the System Use area into the record.
+        '''
+        offset = 33 + self.len_fi
+        if self.len_fi % 2 == 0:
+            offset += 1
+        return offset
+
+    def _find_xa_record(self, raw):
+        '''
+        Internal method to find the XA record in a raw directory record, if it
+        has one.  Normally it comes right after the identifier, but we've seen
+        some ISOs in the wild (Windows 98 SE) that put the XA record all the
+        way at the back, with some padding.
+
+        Parameters:
+         raw - The raw directory record.
+        Returns:
+         A tuple of the offset of the XA record (or None if there is none) and
+         the length of the padding in front of it.
+        '''
+        offset = self._system_use_offset()
+        xa_len = XARecord.length()
+        if len(raw) - offset < xa_len:
+            return (None, 0)
+
+        if XARecord.is_valid(raw[offset:offset + xa_len]):
+            return (offset, 0)
+        if XARecord.is_valid(raw[-xa_len:]):
+            return (len(raw) - xa_len, len(raw) - offset - xa_len)
+        return (None, 0)
+
+    def _decode(self):
+        '''
+        Internal method to decode the rest of the fields of a parsed record
+        from the raw record.
+
+        Parameters:
+         None.
+        Returns:
+         Nothing.
+        '''
+        raw = self._raw
+        self._raw = None
+
+        (dr_date, self._file_unit_size, self._interleave_gap_size,
+         self._seqnum) = struct.unpack_from("=7sxBBH", raw, 18)
+        self._date = dates.DirectoryRecordDate()
+        self._date.parse(dr_date)
+
+        self._xa_record = None
+        if not self.is_root:
+            xa_offset, xa_pad_size = self._find_xa_record(raw)
+            if xa_offset is not None:
+                self._xa_record = XARecord()
+                self._xa_record.parse(raw[xa_offset:xa_offset + XARecord.length()])
+                self._xa_pad_size = xa_pad_size
+
+    @property
+    def date(self):
+        '''
+        The date of this Directory Record, decoded on first use.
+        '''
+        if self._raw is not None:
+            self._decode()
+        return self._date
+
+    @date.setter
+    def date(self, value):
+        if self._raw is not None:
+            self._decode()
+        self._date = value
+
+    @property
+    def seqnum(self):
+        '''
+        The volume sequence number of this Directory Record, decoded on first
+        use.
+        '''
+        if self._raw is not None:
+            self._decode()
+        return self._seqnum
+
+    @seqnum.setter
+    def seqnum(self, value):
+        if self._raw is not None:
+            self._decode()
+        self._seqnum = value
+
+    @property
+    def file_unit_size(self):
+        '''
+        The file unit size of this Directory Record, decoded on first use.
+        '''
+        if self._raw is not None:
+            self._decode()
+        return self._file_unit_size
+
+    @file_unit_size.setter
+    def file_unit_size(self, value):
+        if self._raw is not None:
+            self._decode()
+        self._file_unit_size = value
+
+    @property
+    def interleave_gap_size(self):
+        '''
+        The interleave gap size of this Directory Record, decoded on first use.
+        '''
+        if self._raw is not None:
+            self._decode()
+        return self._interleave_gap_size
+
+    @interleave_gap_size.setter
+    def interleave_gap_size(self, value):
+        if self._raw is not None:
+            self._decode()
+        self._interleave_gap_size = value
+
+    @property
+    def xa_record(self):
+        '''
+        The XA record of this Directory Record (or None), decoded on first use.
+        '''
+        if self._raw is not None:
+            self._decode()
+        return self._xa_record
+
+    @xa_record.setter
+    def xa_record(self, value):
+        if self._raw is not None:
+            self._decode()
+        self._xa_record = value
+
+    @property
+    def xa_pad_size(self):
+        '''
+        The length of the padding in front of the XA record of this Directory
+        Record, decoded on first use.
+        '''
+        if self._raw is not None:
+            self._decode()
+        return self._xa_pad_size
+
     def _rr_new(self, rr_version, rr_name, rr_symlink_target, rr_relocated_child,
                 rr_relocated, rr_relocated_parent):
         '''
@@ -417,15 +584,7 @@ class DirectoryRecord(object):
 
         self.rock_ridge = None
 
-        if self.is_root:
-            self._printable_name = b'/'
-        elif self.file_ident == b'\x00':
-            self._printable_name = b'.'
-        elif self.file_ident == b'\x01':
-            self._printable_name = b'..'
-        else:
-            self._printable_name = self.file_ident
-
+        self._printable_name = None
         self._initialized = True
 
     def new_symlink(self, name, parent, rr_target, seqnum, rock_ridge, rr_name, xa):
@@ -938,6 +1097,17 @@ class DirectoryRecord(object):
         '''
         if not self._initialized:
             raise pycdlibexception.PyCdlibInternalError("Directory Record not yet initialized")
+
+        if self._printable_name is None:
+            if self.is_root:
+                self._printable_name = b'/'
+            elif self.file_ident == b'\x00':
+                self._printable_name = b'.'
+            elif self.file_ident == b'\x01':
+                self._printable_name = b'..'
+            else:
+                self._printable_name = self.file_ident
+
         return self._printable_name
 
     def file_length(self):
@@ -1028,6 +1198,7 @@ class DirectoryRecord(object):
             raise pycdlibexception.PyCdlibInternalError("Directory Record not yet initialized")
 
         self.ptr = ptr
+        ptr.dirrecord = self
 
     def add_boot_info_table(self, boot_info_table):
         '''
@@ -1043,6 +1214,86 @@ class DirectoryRecord(object):
 
         self.boot_info_table = boot_info_table
 
+    def check_boot_info_table_on_use(self, vd):
+        '''
+        A method to mark this Directory Record as a boot file that may have a
+        Boot Info Table embedded in it.  Looking for the table means reading
+        and checksumming the whole file, so it is put off until
+        resolve_boot_info_table is called (or the boot_info_table attribute is
+        first used).
+
+        Parameters:
+         vd - The volume descriptor the Boot Info Table should point to.
+        Returns:
+         Nothing.
+        '''
+        if not self._initialized:
+            raise pycdlibexception.PyCdlibInternalError("Directory Record not yet initialized")
+
+        self._boot_info_vd = vd
+
+    def _find_boot_info_table(self, vd):
+        '''
+        Internal method to look for an El Torito Boot Info Table embedded in
+        the data of this Directory Record.
+
+        Parameters:
+         vd - The volume descriptor the Boot Info Table should point to.
+        Returns:
+         The Boot Info Table, or None if the data doesn't contain one.
+        '''
+        log_block_size = vd.logical_block_size()
+        ret = None
+        orig = None
+        if not self.manage_fp:
+            orig = self.data_fp.tell()
+        with DROpenData(self, log_block_size) as (data_fp, data_len):
+            data_fp.seek(8, 1)
+            bi_table = eltorito.EltoritoBootInfoTable()
+            bi_table.parse(vd, data_fp.read(eltorito.EltoritoBootInfoTable.header_length()), self)
+
+            if bi_table.vd_extent_matches_vd() and bi_table.dirrecord.extent_location() == self.extent_location():
+                data_fp.seek(-24, 1)
+                # OK, the rest of the stuff checks out; do a final check to
+                # make sure the checksum is reasonable.
+                if eltorito.boot_info_table_csum(data_fp, data_len, log_block_size) == bi_table.csum:
+                    ret = bi_table
+        if orig is not None:
+            self.data_fp.seek(orig)
+
+        return ret
+
+    def resolve_boot_info_table(self):
+        '''
+        A method to look for the Boot Info Table of a boot file marked by
+        check_boot_info_table_on_use, if that hasn't been done yet.  This has
+        to happen before the data of the record is replaced or written out,
+        since the table is only recognized by its checksum of the data.
+
+        Parameters:
+         None.
+        Returns:
+         The Boot Info Table, or None if there is none.
+        '''
+        if self._boot_info_vd is not None:
+            vd = self._boot_info_vd
+            self._boot_info_vd = None
+            self._boot_info_table = self._find_boot_info_table(vd)
+        return self._boot_info_table
+
+    @property
+    def boot_info_table(self):
+        '''
+        The El Torito Boot Info Table embedded in this Directory Record, or
+        None if there is none; see resolve_boot_info_table.
+        '''
+        return self.resolve_boot_info_table()
+
+    @boot_info_table.setter
+    def boot_info_table(self, value):
+        self._boot_info_vd = None
+        self._boot_info_table = value
+
     def __lt__(self, other):
         # This method is used for the bisect.insort_left() when adding a child.
         # It needs to return whether self is less than other.  Here we use the
@@ -1090,6 +1341,8 @@ class DROpenData(object):
     '''
     A class to be a contextmanager for opening data on a DirectoryRecord object.
     '''
+    __slots__ = ('data_fp', 'drobj', 'logical_block_size')
+
     def __init__(self, drobj, logical_block_size):
         if drobj.isdir:
             raise pycdlibexception.PyCdlibInternalError("Cannot write out a directory")
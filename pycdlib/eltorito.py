@@ -62,7 +62,9 @@ class EltoritoBootInfoTable(object):
          vd - The volume descriptor to associate with this boot info table.
          dirrecord - The directory record associated with the boot file.
          orig_len - The original length of the file before the boot info table was patched into it.
-         csum - The checksum for the boot file, starting at the byte after the boot info table.
+         csum - The checksum for the boot file, starting at the byte after the
+                boot info table, or None to fill it in when the boot file is
+                next read.
         Returns:
          Nothing.
         '''
@@ -117,6 +119,9 @@ class EltoritoBootInfoTable(object):
         if not self.initialized:
             raise pycdlibexception.PyCdlibInternalError("This Eltorito Boot Info Table not yet initialized")
 
+        if self.csum is None:
+            raise pycdlibexception.PyCdlibInternalError("This Eltorito Boot Info Table checksum not yet calculated")
+
         return struct.pack("=LLLL", self.vd.extent_location(), self.dirrecord.extent_location(), self.orig_len, self.csum) + b'\x00' * 40
 
     @staticmethod
@@ -133,6 +138,58 @@ class EltoritoBootInfoTable(object):
         return 16
 
 
+class EltoritoBootInfoTableChecksum(object):
+    '''
+    A class that calculates the checksum for an El Torito Boot Info Table as
+    the data of the boot file goes by.  This checksum is a simple 32-bit
+    checksum over all of the data in the boot file, starting right after the
+    Boot Info Table itself; the file is padded with zeros to a whole number of
+    32-bit words.
+    '''
+    def __init__(self):
+        self._skip = 64
+        self._leftover = b''
+        self._csum = 0
+
+    def update(self, data):
+        '''
+        A method to add the next piece of the boot file to the checksum.
+
+        Parameters:
+         data - The next piece of the boot file.
+        Returns:
+         Nothing.
+        '''
+        if self._skip > 0:
+            # The first 64 bytes are not included in the checksum, so skip
+            # them here.
+            skip = min(self._skip, len(data))
+            data = data[skip:]
+            self._skip -= skip
+
+        if self._leftover:
+            data = self._leftover + data
+
+        num_words = len(data) // 4
+        if num_words > 0:
+            self._csum = (self._csum + sum(struct.unpack_from("<%dL" % (num_words), data, 0))) & 0xffffffff
+        self._leftover = bytes(data[num_words * 4:])
+
+    def value(self):
+        '''
+        A method to get the checksum of all of the data seen so far.
+
+        Parameters:
+         None.
+        Returns:
+         An integer representing the 32-bit checksum for the boot info table.
+        '''
+        if not self._leftover:
+            return self._csum
+        tmp, = struct.unpack("<L", self._leftover.ljust(4, b'\x00'))
+        return (self._csum + tmp) & 0xffffffff
+
+
 class EltoritoValidationEntry(object):
     '''
     A class that represents an El Torito Validation Entry.  El Torito requires
@@ -603,6 +660,10 @@ class EltoritoBootCatalog(object):
         self.sections = []
         self.standalone_entries = []
         self.state = self.EXPECTING_VALIDATION_ENTRY
+        # A mapping of the extent of each boot file to the entry that boots
+        # it, built the first time a directory record is matched against the
+        # entries.
+        self._entries_by_rba = None
 
     def parse(self, valstr):
         '''
@@ -652,6 +713,7 @@ class EltoritoBootCatalog(object):
                 section_header = EltoritoSectionHeader()
                 section_header.parse(valstr)
                 self.sections.append(section_header)
+                self._entries_by_rba = None
             elif val in [b'\x88', b'\x00']:
                 # A Section Entry. According to El Torito 2.4, a Section Entry
                 # must follow a Section Header, but we have seen ISOs in the
@@ -666,6 +728,7 @@ class EltoritoBootCatalog(object):
                 secentry.parse(valstr)
                 if self.sections and len(self.sections[-1].section_entries) < self.sections[-1].num_section_entries:
                     self.sections[-1].add_parsed_entry(secentry)
+                    self._entries_by_rba = None
                 else:
                     self.standalone_entries.append(secentry)
             elif val == b'\x44':
@@ -750,6 +813,7 @@ class EltoritoBootCatalog(object):
             self.sections[-1].set_record_not_last()
 
         self.sections.append(sec)
+        self._entries_by_rba = None
 
     def record(self):
         '''
@@ -806,15 +870,41 @@ class EltoritoBootCatalog(object):
         if not self.initialized:
             raise pycdlibexception.PyCdlibInternalError("El Torito Boot Catalog not yet initialized")
 
-        if rec.extent_location() == self._extent_location():
+        extent = rec.extent_location()
+        if extent == self._extent_location():
             self.dirrecord = rec
-        elif rec.extent_location() == self.initial_entry.get_rba():
-            self.initial_entry.set_dirrecord(rec)
-        else:
-            for sec in self.sections:
-                for entry in sec.section_entries:
-                    if rec.extent_location() == entry.get_rba():
-                        entry.set_dirrecord(rec)
+            return
+
+        if self._entries_by_rba is None:
+            self._entries_by_rba = self._index_entries()
+
+        for entry in self._entries_by_rba.get(extent, []):
+            # The extents of the entries only change when the ISO is being
+            # changed, after which the directory records are all linked
+            # already; don't trust a stale index, though.
+            if entry.get_rba() == extent:
+                entry.set_dirrecord(rec)
+
+    def _index_entries(self):
+        '''
+        An internal method to build a mapping of the extent of each boot file
+        to the entries that boot it.  A record matching the initial entry is
+        only associated with the initial entry, never with the section entries.
+
+        Parameters:
+         None.
+        Returns:
+         A dictionary mapping extents to lists of entries.
+        '''
+        index = {self.initial_entry.get_rba(): [self.initial_entry]}
+        for sec in self.sections:
+            for entry in sec.section_entries:
+                rba = entry.get_rba()
+                if rba == self.initial_entry.get_rba():
+                    continue
+                index.setdefault(rba, []).append(entry)
+
+        return index
 
     def _extent_location(self):
         '''
@@ -872,15 +962,15 @@ class EltoritoBootCatalog(object):
         if not self.initialized:
             raise pycdlibexception.PyCdlibInternalError("El Torito Boot Catalog not yet initialized")
 
-        if child == self.dirrecord:
+        # The directory records are compared by identity; comparing them by
+        # value means decoding every field of every record.
+        if child is self.dirrecord or child is self.initial_entry.dirrecord:
             return True
-        elif child == self.initial_entry.dirrecord:
-            return True
-        else:
-            for sec in self.sections:
-                for entry in sec.section_entries:
-                    if child == entry.dirrecord:
-                        return True
+
+        for sec in self.sections:
+            for entry in sec.section_entries:
+                if child is entry.dirrecord:
+                    return True
 
         return False
 
@@ -975,3 +1065,29 @@ def hdmbrcheck(disk_mbr, sector_count, bootable):
         raise pycdlibexception.PyCdlibInvalidInput("Boot image has no partitions")
 
     return system_type
+
+
+def boot_info_table_csum(data_fp, data_len, log_block_size):
+    '''
+    A function to calculate the checksum for an El Torito Boot Info Table by
+    reading the boot file.
+
+    Parameters:
+     data_fp - The file object to read the boot file from, positioned at the
+               start of the boot file.
+     data_len - The length of the boot file.
+     log_block_size - The logical block size of the ISO.
+    Returns:
+     An integer representing the 32-bit checksum for the boot info table.
+    '''
+    # The checksum covers whole sectors, so read up to the end of the last one.
+    left = utils.ceiling_div(data_len, log_block_size) * log_block_size
+    csum = EltoritoBootInfoTableChecksum()
+    while left > 0:
+        data = data_fp.read(min(left, 16 * log_block_size))
+        if not data:
+            break
+        csum.update(data)
+        left -= len(data)
+
+    return csum.value()
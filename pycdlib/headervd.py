@@ -729,7 +729,7 @@ class PrimaryVolumeDescriptor(HeaderVolumeDescriptor):
                            self.file_structure_version, 0, self.application_use,
                            b"\x00" * 653)
 
-    def track_rr_ce_entry(self, extent, offset, length):
+    def track_rr_ce_entry(self, extent, offset, length, check=True):
         '''
         Starting tracking a new Rock Ridge Continuation Entry entry in this PVD,
         at the extent, offset, and length provided.  Since Rock Ridge
@@ -743,6 +743,8 @@ class PrimaryVolumeDescriptor(HeaderVolumeDescriptor):
          offset - The offset within the extent that this Continuation Entry
                   lives at.
          length - The length of this Continuation Entry.
+         check - Whether to check the entry against the entries already
+                 tracked in the block.
         Returns:
          The object representing the block in which the Continuation Entry was
          placed in.
@@ -758,7 +760,7 @@ class PrimaryVolumeDescriptor(HeaderVolumeDescriptor):
             block = rockridge.RockRidgeContinuationBlock(extent, self.log_block_size)
             self.rr_ce_blocks.append(block)
 
-        block.track_entry(offset, length)
+        block.track_entry(offset, length, check)
 
         return block
 
@@ -30,6 +30,10 @@ class PathTableRecord(object):
     '''
     A class that represents a single ISO9660 Path Table Record.
     '''
+    __slots__ = ('_initialized', 'directory_identifier', 'dirrecord',
+                 'extent_location', 'len_di', 'parent_directory_num',
+                 'xattr_length')
+
     FMT = "=BBLH"
 
     def __init__(self):
@@ -130,6 +134,7 @@ class PathTableRecord(object):
         else:
             self.parent_directory_num = parent_dir_num
         self.directory_identifier = name
+        self.dirrecord = None
         self._initialized = True
 
     def new_root(self):
@@ -22,10 +22,23 @@ from __future__ import absolute_import
 
 import bisect
 import collections
+import hashlib
 import inspect
+import io
+import logging
+import mmap
+import multiprocessing
+import multiprocessing.pool
 import os
+import pickle
 import struct
+import sys
+import tempfile
+import threading
+import time
+import zlib
 
+import pycdlib.dirindex as dirindex
 import pycdlib.dr as dr
 import pycdlib.eltorito as eltorito
 import pycdlib.headervd as headervd
@@ -34,6 +47,8 @@ import pycdlib.path_table_record as path_table_record
 import pycdlib.pycdlibexception as pycdlibexception
 import pycdlib.utils as utils
 
+_logger = logging.getLogger(__name__)
+
 # There are a number of specific ways that numerical data is stored in the
 # ISO9660/Ecma-119 standard.  In the text these are reference by the section
 # number they are stored in.  A brief synopsis:
@@ -44,6 +59,42 @@ import pycdlib.utils as utils
 # 7.3.2 - 32-bit number ,stored as big-endian
 # 7.3.3 - 32-bit number, stored first as little-endian then as big-endian (8 bytes total)
 
+# When reading the directory extents of an ISO, extents that are at most this
+# many blocks apart are coalesced into a single read, as long as the resulting
+# read is no larger than the maximum run size (also in blocks).
+_DIR_READ_MAX_GAP = 16
+_DIR_READ_MAX_RUN = 512
+
+# The System Area and the first volume descriptors are read together; this is
+# the number of volume descriptor sectors fetched per read.  Nearly every ISO
+# has its whole descriptor set (PVD, boot record, SVDs and terminator) within
+# the first batch.
+_VD_READ_BATCH = 8
+
+# The validation levels that an ISO can be opened with, from the most to the
+# least thorough; see PyCdlib.open for what each of them checks.
+_VALIDATION_LEVELS = ('strict', 'standard', 'trust')
+
+# The namespaces that can be parsed when an ISO is opened; see PyCdlib.open.
+_NAMESPACES = ('iso9660', 'rock_ridge', 'joliet')
+
+# The ways the output file of a write can be allocated; see PyCdlib.write.
+_ALLOCATIONS = ('zeros', 'sparse', 'preallocate')
+
+# The metadata cache written by open() starts with this magic, followed by the
+# fingerprint of the ISO it was made from.  The version is part of the
+# fingerprint; bump it whenever the layout of the parsed objects changes.
+_METADATA_CACHE_MAGIC = b"PYCDLIB-METADATA-CACHE\n"
+_METADATA_CACHE_VERSION = 3
+
+# The attributes of the PyCdlib object that hold the parsed state of an ISO,
+# as saved to and restored from the metadata cache.
+_METADATA_CACHE_ATTRIBUTES = ('pvd', 'pvds', 'svds', 'brs', 'vdsts',
+                              'version_vd', 'joliet_vd', 'enhanced_vd',
+                              'eltorito_boot_catalog', 'isohybrid_mbr', 'xa',
+                              'rock_ridge', 'interchange_level',
+                              '_rr_moved_record')
+
 
 def _pad(data_size, pad_size):
     '''
@@ -63,6 +114,42 @@ def _pad(data_size, pad_size):
     return b""
 
 
+def _pwrite_all(fd, data, offset):
+    '''
+    A function to write all of a string out to a file descriptor at an offset,
+    without using or moving its file pointer.
+
+    Parameters:
+     fd - The file descriptor to write to.
+     data - The string to write.
+     offset - The offset to write the string at.
+    Returns:
+     Nothing.
+    '''
+    view = memoryview(data)
+    while view:
+        written = os.pwrite(fd, view, offset)
+        view = view[written:]
+        offset += written
+
+
+def _copy_data(data_length, blocksize, infp, outfp):
+    '''
+    A function to copy data from the input file object to the output file
+    object with utils.copy_data, logging the copy method that was used.
+
+    Parameters:
+     data_length - The amount of data to copy.
+     blocksize - How much data to copy per iteration.
+     infp - The file object to copy data from.
+     outfp - The file object to copy data to.
+    Returns:
+     Nothing.
+    '''
+    method = utils.copy_data(data_length, blocksize, infp, outfp)
+    _logger.debug("Copied %d bytes with %s", data_length, method)
+
+
 def _check_d1_characters(name):
     '''
     A function to check that a name only uses d1 characters as defined by ISO9660.
@@ -285,29 +372,20 @@ def _interchange_level_from_name(name, is_dir):
     return _interchange_level_from_filename(name)
 
 
-def _find_record_by_extent(vd, extent):
+def _find_dir_by_extent(extent_to_dir, extent):
     '''
-    A function to find a directory record given an extent.
+    A function to find a directory record given an extent, using the index of
+    directories built while walking the directory tree.
 
     Parameters:
-     vd - The volume descriptor to look for the record in.
+     extent_to_dir - A dictionary mapping extents to directory records.
      extent - The extent to find the record for.
     Returns:
      The directory record entry representing the entry on the ISO.
     '''
-    # Search through the filesystem, looking for the file that matches the
-    # extent that the boot catalog lives at.
-    dirs = [vd.root_directory_record()]
-    while dirs:
-        curr = dirs.pop(0)
-        # Skip the dot and dotdot entries
-        for child in curr.children[2:]:
-            if child.extent_location() == extent:
-                return child
-            if child.is_dir():
-                dirs.append(child)
-
-    raise pycdlibexception.PyCdlibInvalidInput("Could not find file with specified extent!")
+    if extent not in extent_to_dir:
+        raise pycdlibexception.PyCdlibInvalidInput("Could not find file with specified extent!")
+    return extent_to_dir[extent]
 
 
 def _find_parent_index_from_dirrecord(dirrecord):
@@ -489,7 +567,7 @@ def _check_path_depth(iso_path):
         raise pycdlibexception.PyCdlibInvalidInput("Directory levels too deep (maximum is 7)")
 
 
-def _find_record(vd, path, encoding='ascii'):
+def _find_record(vd, path, encoding='ascii', lazy_parse=None):
     '''
     A function to find an entry on the ISO given a Volume
     Descriptor, a full ISO path, and an encoding.  Once the entry is found,
@@ -501,6 +579,8 @@ def _find_record(vd, path, encoding='ascii'):
      vd - The volume descriptor in which to look up the entry.
      path - The absolute path to look up in the volume descriptor.
      encoding - The encoding to use on the individual portions of the path.
+     lazy_parse - If not None, a function to call with each directory record
+                  before its children are looked at.
     Returns:
      A tuple containing a directory record entry representing the entry on
      the ISO and the index of that entry into the parent's child list.
@@ -520,6 +600,8 @@ def _find_record(vd, path, encoding='ascii'):
 
     currpath = splitpath[splitindex].decode('utf-8').encode(encoding)
     splitindex += 1
+    if lazy_parse is not None:
+        lazy_parse(vd.root_directory_record())
     children = vd.root_directory_record().children
 
     while splitindex <= len(splitpath):
@@ -565,6 +647,8 @@ def _find_record(vd, path, encoding='ascii'):
             return child, index
         else:
             if child.is_dir():
+                if lazy_parse is not None:
+                    lazy_parse(child)
                 children = child.children
                 currpath = splitpath[splitindex].decode('utf-8').encode(encoding)
                 splitindex += 1
@@ -601,6 +685,504 @@ def _name_and_parent_from_path(vd, iso_path, encoding='ascii'):
     return (name, parent)
 
 
+class _ContinuationReader(object):
+    '''
+    A class to read Rock Ridge continuation areas.  Many directory records
+    usually share the same continuation block, so each logical block is read
+    from the ISO once and the continuation areas are handed out of it.
+    '''
+    __slots__ = ('_read_at', '_log_block_size', '_blocks')
+
+    def __init__(self, read_at, log_block_size):
+        self._read_at = read_at
+        self._log_block_size = log_block_size
+        self._blocks = {}
+
+    def read(self, block, offset, length):
+        '''
+        Read a continuation area.
+
+        Parameters:
+         block - The logical block the continuation area is in.
+         offset - The offset of the continuation area into the block.
+         length - The length of the continuation area.
+        Returns:
+         The data of the continuation area.
+        '''
+        if offset + length > self._log_block_size:
+            # Continuation areas shouldn't cross a block boundary, but just
+            # read these straight from the ISO if they do.
+            return self._read_at(block * self._log_block_size + offset, length)
+
+        if block not in self._blocks:
+            self._blocks[block] = self._read_at(block * self._log_block_size,
+                                                self._log_block_size)
+        return self._blocks[block][offset:offset + length]
+
+
+def _parse_directory_records(data, length, block_size, parent, data_fp,
+                             ce_reader, check_endian=True,
+                             check_padding=True, offsets=False, budget=None,
+                             parse_rr=True, lazy_rr=False):
+    '''
+    A generator to parse the directory records out of the data of a single
+    directory.  Each record is parsed (along with its Rock Ridge continuation
+    entry, if any) just before it is yielded, so the caller may add it to the
+    parent before the next one is parsed.
+
+    Parameters:
+     data - The data of the directory.
+     length - The length of the directory.
+     block_size - The logical block size of the volume descriptor.
+     parent - The directory record to use as the parent for the new records.
+     data_fp - The file object to associate with the new records.
+     ce_reader - The _ContinuationReader to read Rock Ridge continuation
+                 areas with.
+     check_endian - Whether to check the big-endian fields of the records.
+     check_padding - Whether to check that the padding at the end of each
+                     block is all zero.
+     offsets - Whether to yield the offset of each record into the data
+               along with it.
+     budget - The _ParseBudget to account the records against, or None.
+     parse_rr - Whether to look for Rock Ridge extensions in the records.
+     lazy_rr - Whether to leave the contents of the Rock Ridge entries to be
+               decoded the first time they are used, rather than decoding
+               (and so checking) them here.
+    Yields:
+     The parsed directory records, in order (or tuples of the offset and the
+     record, if offsets is True).
+    '''
+    view = memoryview(data)
+    pos = 0
+    offset = 0
+    while length > 0:
+        # read the length byte for the directory record
+        if pos >= len(data):
+            raise pycdlibexception.PyCdlibInvalidISO("Not enough data for the next directory record")
+        (lenbyte,) = struct.unpack_from("=B", data, pos)
+        length -= 1
+        offset += lenbyte
+        if offset > block_size:
+            # Ecma-119 Section 6.8.1.2 says:
+            #
+            # "Each Directory Record shall end in the Logical Sector in which it begins.
+            raise pycdlibexception.PyCdlibInvalidISO("Invalid directory record")
+        elif offset == block_size:
+            # In this case, we read right to the end of the extent;
+            # reset offset back to 0
+            offset = 0
+
+        if lenbyte == 0:
+            # If we saw zero length, this may be a padding byte; skip
+            # to the start of the next extent.
+            pos += 1
+            if length > 0:
+                padsize = block_size - (pos % block_size)
+                if check_padding and data[pos:pos + padsize] != b'\x00' * padsize:
+                    # For now we are pedantic, and if the padding bytes
+                    # are not all zero we throw an Exception.  Depending
+                    # one what we see in the wild, we may have to loosen
+                    # this check.
+                    raise pycdlibexception.PyCdlibInvalidISO("Invalid padding on ISO")
+                pos += padsize
+                length -= padsize
+                offset = 0
+                if length < 0:
+                    # For now we are pedantic, and if the length goes
+                    # negative because of the padding we throw an
+                    # exception.  Depending on what we see in the wild,
+                    # we may have to loosen this check.
+                    raise pycdlibexception.PyCdlibInvalidISO("Invalid padding on ISO")
+            continue
+
+        if budget is not None:
+            budget.add_entry()
+
+        new_record = dr.DirectoryRecord()
+        new_record.parse(view[pos:pos + lenbyte], data_fp, parent, check_endian,
+                         parse_rr)
+        pos += lenbyte
+        length -= lenbyte - 1
+
+        if new_record.rock_ridge is not None and new_record.rock_ridge.continuation_record() is not None:
+            ce_record = new_record.rock_ridge.continuation_record()
+            if budget is not None:
+                budget.check_ce(ce_record.len_cont_area)
+            con_block = ce_reader.read(ce_record.bl_cont_area,
+                                       ce_record.offset_cont_area,
+                                       ce_record.len_cont_area)
+            new_record.rock_ridge.parse(con_block, False, new_record.rock_ridge.bytes_to_skip, True)
+
+        if new_record.rock_ridge is not None and not lazy_rr:
+            new_record.rock_ridge.decode()
+
+        if offsets:
+            yield (pos - lenbyte, new_record)
+        else:
+            yield new_record
+
+
+class DirectoryEntry(object):
+    '''
+    A lightweight description of a single file or directory on an ISO, as
+    yielded by PyCdlib.iter_entries.  Unlike a directory record, it holds no
+    references to the rest of the directory tree.
+    '''
+    __slots__ = ('path', 'extent', 'size', 'is_dir', 'rock_ridge')
+
+    def __init__(self, path, extent, size, is_dir, rock_ridge):
+        self.path = path
+        self.extent = extent
+        self.size = size
+        self.is_dir = is_dir
+        self.rock_ridge = rock_ridge
+
+    def rr_name(self):
+        '''
+        Get the Rock Ridge name of this entry.
+
+        Parameters:
+         None.
+        Returns:
+         The Rock Ridge name of this entry, or None if it has no Rock Ridge
+         extensions.
+        '''
+        if self.rock_ridge is None:
+            return None
+        return self.rock_ridge.name()
+
+    def rr_mode(self):
+        '''
+        Get the POSIX file mode of this entry from its Rock Ridge PX record.
+
+        Parameters:
+         None.
+        Returns:
+         The POSIX file mode of this entry, or None if it has no Rock Ridge PX
+         record.
+        '''
+        if self.rock_ridge is None:
+            return None
+        px = self.rock_ridge.dr_entries.px_record or self.rock_ridge.ce_entries.px_record
+        if px is None:
+            return None
+        return px.posix_file_mode
+
+    def rr_times(self):
+        '''
+        Get the Rock Ridge time stamps of this entry.
+
+        Parameters:
+         None.
+        Returns:
+         The Rock Ridge TF record of this entry (whose creation_time,
+         modification_time, access_time and so on are the time stamps), or
+         None if it has no Rock Ridge TF record.
+        '''
+        if self.rock_ridge is None:
+            return None
+        return self.rock_ridge.dr_entries.tf_record or self.rock_ridge.ce_entries.tf_record
+
+
+class ParseLimits(object):
+    '''
+    A description of how much work PyCdlib.open may do parsing an ISO, for
+    ISOs that come from untrusted sources.  A crafted ISO can describe
+    enormous or endlessly nested directory trees; parsing is stopped with a
+    PyCdlibInvalidISO as soon as any of these limits is exceeded.  Each limit
+    may be None for no limit.
+    '''
+    __slots__ = ('max_entries', 'max_depth', 'max_ce_bytes',
+                 'max_metadata_bytes', 'timeout')
+
+    def __init__(self, max_entries=None, max_depth=None, max_ce_bytes=None,
+                 max_metadata_bytes=None, timeout=None):
+        # The maximum number of directory records, including the "." and ".."
+        # records of each directory.
+        self.max_entries = max_entries
+        # The maximum depth of the directory tree, counting the root as 1.
+        self.max_depth = max_depth
+        # The maximum length of the Rock Ridge continuation area of a single
+        # directory record.
+        self.max_ce_bytes = max_ce_bytes
+        # The maximum number of bytes of metadata (volume descriptors, path
+        # tables, directories and continuation areas) read from the ISO.
+        self.max_metadata_bytes = max_metadata_bytes
+        # The maximum number of seconds open may take.
+        self.timeout = timeout
+
+
+def _check_parse_limits(limits, deferred):
+    '''
+    An internal function to check the parse limits passed to one of the open
+    methods.
+
+    Parameters:
+     limits - The ParseLimits object (or None) to check.
+     deferred - Whether the directories are parsed lazily or by workers, which
+                the limits cannot be applied to.
+    Returns:
+     Nothing.
+    '''
+    if limits is None:
+        return
+
+    if not isinstance(limits, ParseLimits):
+        raise pycdlibexception.PyCdlibInvalidInput("Limits must be a ParseLimits object")
+
+    if deferred:
+        raise pycdlibexception.PyCdlibInvalidInput("Parse limits cannot be combined with lazy parsing or workers")
+
+
+def _check_namespaces(namespaces, deferred):
+    '''
+    An internal function to check the namespaces passed to one of the open
+    methods.
+
+    Parameters:
+     namespaces - The namespaces to check.
+     deferred - Whether the directories are parsed lazily, by workers or from
+                a cache, none of which can skip namespaces.
+    Returns:
+     Nothing.
+    '''
+    for namespace in namespaces:
+        if namespace not in _NAMESPACES:
+            raise pycdlibexception.PyCdlibInvalidInput("Namespaces must be some of %s" % (', '.join(_NAMESPACES)))
+
+    if 'iso9660' not in namespaces and 'joliet' not in namespaces:
+        raise pycdlibexception.PyCdlibInvalidInput("At least one of the iso9660 and joliet namespaces must be parsed")
+
+    if 'rock_ridge' in namespaces and 'iso9660' not in namespaces:
+        raise pycdlibexception.PyCdlibInvalidInput("The rock_ridge namespace can only be parsed along with the iso9660 namespace")
+
+    if deferred and tuple(namespaces) != _NAMESPACES:
+        raise pycdlibexception.PyCdlibInvalidInput("Namespaces cannot be skipped with lazy parsing, workers or a metadata cache")
+
+
+class _ParseBudget(object):
+    '''
+    The work left for an open under a set of ParseLimits.
+    '''
+    __slots__ = ('_limits', '_entries', '_metadata_bytes', '_deadline')
+
+    def __init__(self, limits):
+        self._limits = limits
+        self._entries = 0
+        self._metadata_bytes = 0
+        self._deadline = None
+        if limits.timeout is not None:
+            self._deadline = time.time() + limits.timeout
+
+    def _check_deadline(self):
+        '''
+        Internal method to check that the open hasn't run out of time.
+
+        Parameters:
+         None.
+        Returns:
+         Nothing.
+        '''
+        if self._deadline is not None and time.time() > self._deadline:
+            raise pycdlibexception.PyCdlibInvalidISO("Parsing the ISO took longer than %s seconds" % (self._limits.timeout))
+
+    def add_entry(self):
+        '''
+        Account for one more directory record.
+
+        Parameters:
+         None.
+        Returns:
+         Nothing.
+        '''
+        self._entries += 1
+        if self._limits.max_entries is not None and self._entries > self._limits.max_entries:
+            raise pycdlibexception.PyCdlibInvalidISO("ISO has more than %d directory records" % (self._limits.max_entries))
+        self._check_deadline()
+
+    def add_read(self, length):
+        '''
+        Account for reading more metadata from the ISO, before it is read.
+
+        Parameters:
+         length - The number of bytes about to be read.
+        Returns:
+         Nothing.
+        '''
+        self._metadata_bytes += length
+        if self._limits.max_metadata_bytes is not None and self._metadata_bytes > self._limits.max_metadata_bytes:
+            raise pycdlibexception.PyCdlibInvalidISO("ISO has more than %d bytes of metadata" % (self._limits.max_metadata_bytes))
+        self._check_deadline()
+
+    def check_depth(self, depth):
+        '''
+        Check the depth of a directory.
+
+        Parameters:
+         depth - The depth of the directory, counting the root as 1.
+        Returns:
+         Nothing.
+        '''
+        if self._limits.max_depth is not None and depth > self._limits.max_depth:
+            raise pycdlibexception.PyCdlibInvalidISO("ISO has directories more than %d deep" % (self._limits.max_depth))
+
+    def check_ce(self, length):
+        '''
+        Check the length of the Rock Ridge continuation area of a record.
+
+        Parameters:
+         length - The length of the continuation area.
+        Returns:
+         Nothing.
+        '''
+        if self._limits.max_ce_bytes is not None and length > self._limits.max_ce_bytes:
+            raise pycdlibexception.PyCdlibInvalidISO("Rock Ridge continuation area of %d bytes is longer than %d bytes" % (length, self._limits.max_ce_bytes))
+
+
+class _DetachedParent(object):
+    '''
+    A stand-in for the parent of directory records that are decoded apart
+    from the directory tree, such as in a worker process.  It carries just the
+    parent state that DirectoryRecord.parse looks at.
+    '''
+    def __init__(self, bytes_to_skip, is_root=False):
+        if is_root:
+            self.parent = None
+        else:
+            self.parent = self
+        self.children = [self]
+        self.rock_ridge = self
+        self.bytes_to_skip = bytes_to_skip
+
+
+# The file object and continuation area reader used by a directory decoding
+# worker process; see _decode_worker_init.
+_decode_fp = None
+_decode_ce_reader = None
+
+
+def _decode_worker_init(filename, log_block_size):
+    '''
+    A function to initialize a directory decoding worker process, opening its
+    own file object for the ISO.
+
+    Parameters:
+     filename - The filename of the ISO.
+     log_block_size - The logical block size of the ISO.
+    Returns:
+     Nothing.
+    '''
+    global _decode_fp
+    global _decode_ce_reader
+    _decode_fp = open(filename, 'rb')
+    _decode_ce_reader = _ContinuationReader(_decode_read_at, log_block_size)
+
+
+def _decode_read_at(offset, length):
+    '''
+    A function to read data from the ISO in a directory decoding worker
+    process.
+
+    Parameters:
+     offset - The byte offset into the ISO to start reading at.
+     length - The number of bytes to read.
+    Returns:
+     The data.
+    '''
+    _decode_fp.seek(offset)
+    return _decode_fp.read(length)
+
+
+def _decode_directory_extent(task):
+    '''
+    A function to decode all of the directory records of one directory in a
+    directory decoding worker process.  Since the worker does not know the
+    directory record that points at this directory, the length of the
+    directory is taken from its own "." record; the caller must check that it
+    agrees before using the result.
+
+    Parameters:
+     task - A tuple of the extent of the directory, the logical block size of
+            the ISO, the logical block size of the volume descriptor, the
+            number of bytes to skip at the start of Rock Ridge entries,
+            whether to check the big-endian fields and the padding, and
+            whether to leave the Rock Ridge entries to be decoded on first
+            use.
+    Returns:
+     A tuple of the extent, the length of the directory and the list of
+     decoded directory records (without a parent or data file object), or of
+     the extent, None and None if the directory could not be decoded.
+    '''
+    (extent, log_block_size, block_size, bytes_to_skip, check_endian,
+     check_padding, lazy_rr) = task
+    try:
+        dot = _decode_read_at(extent * log_block_size, 14)
+        if len(dot) < 14:
+            return (extent, None, None)
+        (length,) = struct.unpack_from("=L", dot, 10)
+        data = _decode_read_at(extent * log_block_size, length)
+        records = list(_parse_directory_records(data, length, block_size,
+                                                _DetachedParent(bytes_to_skip),
+                                                None, _decode_ce_reader,
+                                                check_endian, check_padding,
+                                                lazy_rr=lazy_rr))
+    except pycdlibexception.PyCdlibException:
+        # Let the serial parse in the parent process run into (and report)
+        # the problem, if this directory turns out to be reachable at all.
+        return (extent, None, None)
+
+    for record in records:
+        record.parent = None
+
+    return (extent, length, records)
+
+
+class _MetadataPickler(pickle.Pickler):
+    '''
+    A pickler for the metadata cache that saves references to the file object
+    of the ISO by name, so that they can be pointed at the file object of the
+    ISO being opened when the cache is loaded.
+    '''
+    def __init__(self, outfp, cdfp):
+        pickle.Pickler.__init__(self, outfp, 2)
+        self._cdfp = cdfp
+
+    def persistent_id(self, obj):
+        '''
+        Return the persistent ID for an object, if it has one.
+
+        Parameters:
+         obj - The object being pickled.
+        Returns:
+         The persistent ID of the object, or None to pickle it as usual.
+        '''
+        if obj is self._cdfp:
+            return 'cdfp'
+        return None
+
+
+class _MetadataUnpickler(pickle.Unpickler):
+    '''
+    An unpickler for the metadata cache; see _MetadataPickler.
+    '''
+    def __init__(self, infp, cdfp):
+        pickle.Unpickler.__init__(self, infp)
+        self._cdfp = cdfp
+
+    def persistent_load(self, pid):
+        '''
+        Return the object for a persistent ID.
+
+        Parameters:
+         pid - The persistent ID.
+        Returns:
+         The object for the persistent ID.
+        '''
+        if pid != 'cdfp':
+            raise pickle.UnpicklingError("Unknown persistent ID in metadata cache")
+        return self._cdfp
+
+
 class PyCdlib(object):
     '''
     The main class for manipulating ISOs.
@@ -612,7 +1194,7 @@ class PyCdlib(object):
         Parameters:
          None.
         Returns:
-         Nothing.
+         The contents of the System Area of the ISO.
         '''
         # Ecma-119 says that the Volume Descriptor set is a sequence of volume
         # descriptors recorded in consecutively numbered Logical Sectors
@@ -621,13 +1203,23 @@ class PyCdlib(object):
 
         # Ecma-119, 6.2.1 says that the Volume Space is divided into a System
         # Area and a Data Area, where the System Area is in logical sectors 0
-        # to 15, and whose contents is not specified by the standard.
-        self.cdfp.seek(16 * 2048)
+        # to 15, and whose contents is not specified by the standard.  The
+        # System Area and the first batch of volume descriptors are read
+        # together; another batch is only read if no terminator was in it.
+        data = memoryview(self._read_at(0, (16 + _VD_READ_BATCH) * 2048)).tobytes()
+        system_area = data[:16 * 2048]
+        data = data[16 * 2048:]
+        data_extent = 16
+        curr_extent = 16
         done = False
         while not done:
+            offset = (curr_extent - data_extent) * 2048
+            if offset >= len(data) and len(data) == _VD_READ_BATCH * 2048:
+                data = memoryview(self._read_at(curr_extent * 2048, _VD_READ_BATCH * 2048)).tobytes()
+                data_extent = curr_extent
+                offset = 0
             # All volume descriptors are exactly 2048 bytes long
-            curr_extent = self.cdfp.tell() // 2048
-            vd = self.cdfp.read(2048)
+            vd = data[offset:offset + 2048]
             if len(vd) != 2048:
                 raise pycdlibexception.PyCdlibInvalidISO("Failed to read entire volume descriptor")
             (desc_type,) = struct.unpack_from("=B", vd, 0)
@@ -654,6 +1246,7 @@ class PyCdlib(object):
                 self.svds.append(svd)
             else:
                 raise pycdlibexception.PyCdlibInvalidISO("Invalid volume descriptor type %d" % (desc_type))
+            curr_extent += 1
 
         # The language in Ecma-119, p.8, Section 6.7.1 says:
         #
@@ -676,19 +1269,208 @@ class PyCdlib(object):
         if len(self.vdsts) < 1:
             raise pycdlibexception.PyCdlibInvalidISO("Valid ISO9660 filesystems must have at least one Volume Descriptor Set Terminator")
 
-    def _seek_to_extent(self, extent):
+        return system_area
+
+    def _link_record(self, vd, new_record, extent_to_dr):
         '''
-        An internal method to seek to a particular extent on the input ISO.
+        An internal method to link a file directory record to any other
+        directory records (in this or the other volume descriptors) that point
+        at the same data.
 
         Parameters:
-         extent - The extent to seek to.
+         vd - The volume descriptor that the record belongs to.
+         new_record - The directory record to link.
+         extent_to_dr - A dictionary mapping extents to directory records.
         Returns:
          Nothing.
         '''
-        self.cdfp.seek(extent * self.pvd.logical_block_size())
+        is_symlink = new_record.rock_ridge is not None and new_record.rock_ridge.is_symlink()
+
+        # ISO generation programs generally use random extent locations
+        # for zero-length files.  Thus, it is not valid for us to link
+        # zero-length files to other files, as the linkage will be
+        # essentially random.  Make sure we ignore zero-length files
+        # (which includes symlinks) for linkage.
+        if new_record.is_dir() or new_record.data_length == 0 or is_symlink:
+            return
+
+        is_pvd = isinstance(vd, headervd.PrimaryVolumeDescriptor)
+        if is_pvd and not new_record.extent_location() in extent_to_dr:
+            extent_to_dr[new_record.extent_location()] = new_record
+        else:
+            try:
+                extent_to_dr[new_record.extent_location()].linked_records.append((new_record, vd))
+            except KeyError:
+                # There may be files that are hidden in the regular
+                # ISO, but not in Joliet.  For those, there will be
+                # a key error when trying to link it to the Primary
+                # record, so we just pass through here.
+                pass
+
+    def _check_rock_ridge_version(self, new_record):
+        '''
+        An internal method to check the Rock Ridge version of a newly parsed
+        directory record against the rest of the ISO.
+
+        Parameters:
+         new_record - The directory record to check.
+        Returns:
+         Nothing.
+        '''
+        if new_record.rock_ridge is None:
+            rr = None
+        else:
+            rr = new_record.rock_ridge.rr_version
+
+        # The Rock Ridge version is None if this record doesn't have Rock
+        # Ridge extensions, or the version of the extension (as detected
+        # for this directory record).  Since we don't allow mixed Rock
+        # Ridge versions on the ISO, we apply some checking.  If the
+        # current version is None, we can upgrade it to whatever version
+        # we just saw, but once we have seen a particular version, we only
+        # allow records of that version or None.  A trusted ISO is
+        # assumed to use a single version throughout.
+        if self.rock_ridge is None:
+            self.rock_ridge = rr
+        elif self._validation == 'trust':
+            pass
+        elif self.rock_ridge == "1.09":
+            if rr is not None and rr != "1.09":
+                raise pycdlibexception.PyCdlibInvalidISO("Inconsistent Rock Ridge versions on the ISO!")
+        elif self.rock_ridge == "1.12":
+            if rr is not None and rr != "1.12":
+                raise pycdlibexception.PyCdlibInvalidISO("Inconsistent Rock Ridge versions on the ISO!")
+
+    def _parse_directory(self, vd, dir_record, extent_to_ptr, extent_to_dr,
+                         check_interchange, dirs, parent_links, child_links,
+                         decoded=None):
+        '''
+        An internal method to parse all of the directory records contained in
+        the extent(s) of a single directory, adding each of them as a child of
+        that directory.
+
+        Parameters:
+         vd - The volume descriptor the directory belongs to.
+         dir_record - The directory record whose children should be parsed.
+         extent_to_ptr - A dictionary mapping extents to PTRs.
+         extent_to_dr - A dictionary mapping extents to directory records, or
+                        None to skip linking the new records.
+         check_interchange - Whether to bother checking the interchange level.
+         dirs - A list to append the subdirectories that still need parsing to.
+         parent_links - A list to append Rock Ridge parent link records to.
+         child_links - A list to append Rock Ridge child link records to.
+         decoded - An optional dictionary mapping directory extents to the
+                   results of _decode_directory_extent; if this directory is
+                   in it, the already decoded records are used.
+        Returns:
+         The interchange level that this directory conforms to.
+        '''
+        interchange_level = 1
+        block_size = vd.logical_block_size()
+        is_pvd = isinstance(vd, headervd.PrimaryVolumeDescriptor)
+        trusted = self._validation == 'trust'
+
+        length = dir_record.file_length()
+        records = None
+        if decoded is not None:
+            decoded_length, records = decoded.pop(dir_record.extent_location(), (None, None))
+            if decoded_length != length:
+                records = None
+            else:
+                for new_record in records:
+                    new_record.parent = dir_record
+                    new_record.data_fp = self.cdfp
+
+        if records is None:
+            # Read the whole directory in one go, and then parse the
+            # individual records out of that buffer.
+            data = self._read_at(dir_record.extent_location() * self.pvd.logical_block_size(),
+                                 length)
+            if self._ce_reader is None:
+                self._ce_reader = _ContinuationReader(self._read_at,
+                                                      self.pvd.logical_block_size())
+            records = _parse_directory_records(data, length, block_size,
+                                               dir_record, self.cdfp,
+                                               self._ce_reader,
+                                               self._validation == 'strict',
+                                               not trusted, budget=self._budget,
+                                               parse_rr='rock_ridge' in self._namespaces,
+                                               lazy_rr=self._lazy or self._validation != 'strict')
+
+        last_record = None
+        for new_record in records:
+            self._check_rock_ridge_version(new_record)
+
+            is_symlink = new_record.rock_ridge is not None and new_record.rock_ridge.is_symlink()
+
+            if extent_to_dr is not None:
+                self._link_record(vd, new_record, extent_to_dr)
+
+            if new_record.rock_ridge is not None and new_record.rock_ridge.continuation_record() is not None:
+                # The continuation entry itself was parsed along with the
+                # record; here we just keep track of where it lives.
+                ce_record = new_record.rock_ridge.continuation_record()
+                block = self.pvd.track_rr_ce_entry(ce_record.bl_cont_area,
+                                                   ce_record.offset_cont_area,
+                                                   ce_record.len_cont_area,
+                                                   not trusted)
+                new_record.rock_ridge.update_ce_block(block)
+
+            has_eltorito = self.eltorito_boot_catalog is not None
+
+            # See the discussion about about symlinks for why we don't try
+            # to assign dirrecords for eltorito with symlinks.
+            if is_pvd and has_eltorito and not is_symlink:
+                self.eltorito_boot_catalog.set_dirrecord_if_necessary(new_record)
+
+            rr_cl = new_record.rock_ridge is not None and new_record.rock_ridge.child_link_record_exists()
+
+            if rr_cl:
+                child_links.append(new_record)
+
+            if new_record.is_dir():
+                if new_record.rock_ridge is not None and new_record.rock_ridge.relocated_record():
+                    self._rr_moved_record = new_record
+
+                if new_record.is_dotdot() and new_record.rock_ridge is not None and new_record.rock_ridge.parent_link_record_exists():
+                    # If this is the dotdot record, and it has a parent
+                    # link record, make sure to link up the parent link
+                    # directory record.
+                    parent_links.append(new_record)
+                dots = new_record.is_dot() or new_record.is_dotdot()
+                if not dots and not rr_cl:
+                    dirs.append(new_record)
+                    new_record.set_ptr(extent_to_ptr[new_record.extent_location()])
+
+            try_long_entry = False
+            try:
+                ret = dir_record.add_child(new_record, block_size)
+            except pycdlibexception.PyCdlibInvalidInput:
+                # dir_record.add_child() may throw a PyCdlibInvalidInput if
+                # it saw a duplicate child.  However, we allow duplicate
+                # children iff the last child is the same; this means that
+                # we have a very long entry.  If that is the case, try again
+                # with the allow_duplicates flag set to True.
+                if not new_record.is_dir() and last_record is not None and last_record.file_identifier() == new_record.file_identifier():
+                    try_long_entry = True
+                else:
+                    raise
+
+            if try_long_entry:
+                ret = dir_record.add_child(new_record, block_size, True)
+
+            if ret:
+                raise pycdlibexception.PyCdlibInvalidISO("More records than fit into parent directory; ISO is corrupt")
+
+            if check_interchange and not trusted:
+                interchange_level = max(interchange_level, _interchange_level_from_name(new_record.file_identifier(), new_record.is_dir()))
+
+            last_record = new_record
+
+        return interchange_level
 
     def _walk_directories(self, vd, extent_to_ptr, extent_to_dr, path_table_records,
-                          check_interchange):
+                          check_interchange, decoded=None):
         '''
         An internal method to walk the directory records in a volume descriptor,
         starting with the root.  For each child in the directory record,
@@ -700,6 +1482,8 @@ class PyCdlib(object):
          extent_to_dr - A dictionary mapping extents to directory records.
          path_table_records - The list of path table records.
          check_interchange - Whether to bother checking the interchange level.
+         decoded - An optional dictionary of already decoded directories; see
+                   _parse_directory.
         Returns:
          The interchange level that this ISO conforms to.
         '''
@@ -707,172 +1491,486 @@ class PyCdlib(object):
         root_dir_record.set_ptr(path_table_records[0])
         interchange_level = 1
         dirs = collections.deque([vd.root_directory_record()])
-        block_size = vd.logical_block_size()
         parent_links = []
         child_links = []
+        # Keep an index of the directories as we go, so that the Rock Ridge
+        # parent and child links can be resolved without searching the tree.
+        extent_to_dir = {}
+        # The depth of each directory still to be parsed, for the parse limits.
+        depths = collections.deque([1])
         while dirs:
             dir_record = dirs.popleft()
+            depth = depths.popleft()
+            if self._budget is not None:
+                self._budget.check_depth(depth)
+            if dir_record.extent_location() not in extent_to_dir:
+                extent_to_dir[dir_record.extent_location()] = dir_record
+            interchange_level = max(interchange_level,
+                                    self._parse_directory(vd, dir_record, extent_to_ptr,
+                                                          extent_to_dr, check_interchange,
+                                                          dirs, parent_links, child_links,
+                                                          decoded))
+            depths.extend([depth + 1] * (len(dirs) - len(depths)))
 
-            self._seek_to_extent(dir_record.extent_location())
-            length = dir_record.file_length()
-            offset = 0
-            last_record = None
-            while length > 0:
-                # read the length byte for the directory record
-                lenraw = self.cdfp.read(1)
-                if len(lenraw) != 1:
-                    raise pycdlibexception.PyCdlibInvalidISO("Not enough data for the next directory record")
-                (lenbyte,) = struct.unpack_from("=B", lenraw, 0)
-                length -= 1
-                offset += lenbyte
-                if offset > block_size:
-                    # Ecma-119 Section 6.8.1.2 says:
-                    #
-                    # "Each Directory Record shall end in the Logical Sector in which it begins.
-                    raise pycdlibexception.PyCdlibInvalidISO("Invalid directory record")
-                elif offset == block_size:
-                    # In this case, we read right to the end of the extent;
-                    # reset offset back to 0
-                    offset = 0
-
-                if lenbyte == 0:
-                    # If we saw zero length, this may be a padding byte; seek
-                    # to the start of the next extent.
-                    if length > 0:
-                        padsize = block_size - (self.cdfp.tell() % block_size)
-                        padbytes = self.cdfp.read(padsize)
-                        if padbytes != b'\x00' * padsize:
-                            # For now we are pedantic, and if the padding bytes
-                            # are not all zero we throw an Exception.  Depending
-                            # one what we see in the wild, we may have to loosen
-                            # this check.
-                            raise pycdlibexception.PyCdlibInvalidISO("Invalid padding on ISO")
-                        length -= padsize
-                        offset = 0
-                        if length < 0:
-                            # For now we are pedantic, and if the length goes
-                            # negative because of the padding we throw an
-                            # exception.  Depending on what we see in the wild,
-                            # we may have to loosen this check.
-                            raise pycdlibexception.PyCdlibInvalidISO("Invalid padding on ISO")
-                    continue
+        for pl in parent_links:
+            pl.rock_ridge.parent_link = _find_dir_by_extent(extent_to_dir, pl.rock_ridge.parent_link_extent())
 
-                new_record = dr.DirectoryRecord()
-                rr = new_record.parse(lenraw + self.cdfp.read(lenbyte - 1),
-                                      self.cdfp, dir_record)
-                # The parse method of dr.DirectoryRecord returns None if this
-                # record doesn't have Rock Ridge extensions, or the version of
-                # the extension (as detected for this directory record).
-                # Since we don't allow mixed Rock Ridge versions on the ISO,
-                # we apply some checking.  If the current version is None, we
-                # can upgrade it to whatever version we just saw, but once we
-                # have seen a particular version, we only allow records of that
-                # version or None.
-                if self.rock_ridge is None:
-                    self.rock_ridge = rr
-                elif self.rock_ridge == "1.09":
-                    if rr is not None and rr != "1.09":
-                        raise pycdlibexception.PyCdlibInvalidISO("Inconsistent Rock Ridge versions on the ISO!")
-                elif self.rock_ridge == "1.12":
-                    if rr is not None and rr != "1.12":
-                        raise pycdlibexception.PyCdlibInvalidISO("Inconsistent Rock Ridge versions on the ISO!")
-
-                length -= lenbyte - 1
-
-                is_symlink = new_record.rock_ridge is not None and new_record.rock_ridge.is_symlink()
-
-                is_pvd = isinstance(vd, headervd.PrimaryVolumeDescriptor)
-
-                # ISO generation programs generally use random extent locations
-                # for zero-length files.  Thus, it is not valid for us to link
-                # zero-length files to other files, as the linkage will be
-                # essentially random.  Make sure we ignore zero-length files
-                # (which includes symlinks) for linkage.
-                if not new_record.is_dir() and new_record.data_length > 0 and not is_symlink:
-                    if is_pvd and not new_record.extent_location() in extent_to_dr:
-                        extent_to_dr[new_record.extent_location()] = new_record
-                    else:
-                        try:
-                            extent_to_dr[new_record.extent_location()].linked_records.append((new_record, vd))
-                        except KeyError:
-                            # There may be files that are hidden in the regular
-                            # ISO, but not in Joliet.  For those, there will be
-                            # a key error when trying to link it to the Primary
-                            # record, so we just pass through here.
-                            pass
-
-                if new_record.rock_ridge is not None and new_record.rock_ridge.dr_entries.ce_record is not None:
-                    ce_record = new_record.rock_ridge.dr_entries.ce_record
-                    orig_pos = self.cdfp.tell()
-                    self._seek_to_extent(ce_record.bl_cont_area)
-                    self.cdfp.seek(ce_record.offset_cont_area, os.SEEK_CUR)
-                    con_block = self.cdfp.read(ce_record.len_cont_area)
-                    new_record.rock_ridge.parse(con_block, False, new_record.rock_ridge.bytes_to_skip, True)
-                    self.cdfp.seek(orig_pos)
-                    block = self.pvd.track_rr_ce_entry(ce_record.bl_cont_area,
-                                                       ce_record.offset_cont_area,
-                                                       ce_record.len_cont_area)
-                    new_record.rock_ridge.update_ce_block(block)
-
-                has_eltorito = self.eltorito_boot_catalog is not None
-
-                # See the discussion about about symlinks for why we don't try
-                # to assign dirrecords for eltorito with symlinks.
-                if is_pvd and has_eltorito and not is_symlink:
-                    self.eltorito_boot_catalog.set_dirrecord_if_necessary(new_record)
-
-                rr_cl = new_record.rock_ridge is not None and new_record.rock_ridge.child_link_record_exists()
-
-                if rr_cl:
-                    child_links.append(new_record)
+        for cl in child_links:
+            cl.rock_ridge.cl_to_moved_dr = _find_dir_by_extent(extent_to_dir, cl.rock_ridge.child_link_extent())
+            cl.rock_ridge.cl_to_moved_dr.rock_ridge.moved_to_cl_dr = cl
+
+        return interchange_level
+
+    def _build_directory_index(self, vd):
+        '''
+        An internal method to walk the directory records in a volume
+        descriptor, recording them in a read-only dirindex.DirectoryIndex
+        instead of building the directory tree.
+
+        Parameters:
+         vd - The volume descriptor to walk.
+        Returns:
+         The dirindex.DirectoryIndex of the directory tree.
+        '''
+        log_block_size = self.pvd.logical_block_size()
+        block_size = vd.logical_block_size()
+        check_endian = self._validation == 'strict'
+        check_padding = self._validation != 'trust'
+        root = vd.root_directory_record()
+        bytes_to_skip = self._root_rr_bytes_to_skip(vd)
+        root_parent = _DetachedParent(bytes_to_skip, True)
+        detached = _DetachedParent(bytes_to_skip)
+        if self._ce_reader is None:
+            self._ce_reader = _ContinuationReader(self._read_at, log_block_size)
+
+        index = dirindex.DirectoryIndex(root.extent_location(), root.file_length(),
+                                        bytes_to_skip)
+        extent_to_dir = {}
+        child_links = []
+        dirs = collections.deque([(0, 1)])
+        while dirs:
+            dir_index, depth = dirs.popleft()
+            if self._budget is not None:
+                self._budget.check_depth(depth)
+            if index.extents[dir_index] not in extent_to_dir:
+                extent_to_dir[index.extents[dir_index]] = dir_index
+            length = index.lengths[dir_index]
+            data = self._read_at(index.extents[dir_index] * log_block_size, length)
+            if dir_index == 0:
+                parent = root_parent
+            else:
+                parent = detached
+
+            children = []
+            cl_names = {}
+            for offset, new_record in _parse_directory_records(data, length, block_size,
+                                                               parent, None, self._ce_reader,
+                                                               check_endian, check_padding,
+                                                               True, self._budget,
+                                                               'rock_ridge' in self._namespaces,
+                                                               self._validation != 'strict'):
+                self._check_rock_ridge_version(new_record)
+                if new_record.is_dot() or new_record.is_dotdot():
+                    continue
 
+                flags = 0
                 if new_record.is_dir():
-                    if new_record.rock_ridge is not None and new_record.rock_ridge.relocated_record():
-                        self._rr_moved_record = new_record
-
-                    if new_record.is_dotdot() and new_record.rock_ridge is not None and new_record.rock_ridge.parent_link_record_exists():
-                        # If this is the dotdot record, and it has a parent
-                        # link record, make sure to link up the parent link
-                        # directory record.
-                        parent_links.append(new_record)
-                    dots = new_record.is_dot() or new_record.is_dotdot()
-                    if not dots and not rr_cl:
-                        dirs.append(new_record)
-                        new_record.set_ptr(extent_to_ptr[new_record.extent_location()])
-
-                try_long_entry = False
-                try:
-                    ret = dir_record.add_child(new_record, vd.logical_block_size())
-                except pycdlibexception.PyCdlibInvalidInput:
-                    # dir_record.add_child() may throw a PyCdlibInvalidInput if
-                    # it saw a duplicate child.  However, we allow duplicate
-                    # children iff the last child is the same; this means that
-                    # we have a very long entry.  If that is the case, try again
-                    # with the allow_duplicates flag set to True.
-                    if not new_record.is_dir() and last_record is not None and last_record.file_identifier() == new_record.file_identifier():
-                        try_long_entry = True
-                    else:
-                        raise
+                    flags |= index.FLAG_DIRECTORY
+                rr_name = None
+                if new_record.rock_ridge is not None:
+                    rr_name = new_record.rock_ridge.name()
+                    if new_record.rock_ridge.is_symlink():
+                        flags |= index.FLAG_SYMLINK
+                    if new_record.rock_ridge.child_link_record_exists():
+                        cl_names[new_record.file_ident] = new_record.rock_ridge.child_link_extent()
+                children.append((new_record.file_ident, rr_name,
+                                 new_record.extent_location(),
+                                 new_record.data_length, flags, offset))
+
+            start = index.add_children(dir_index, children)
+            for child in range(start, start + len(children)):
+                if index.name(child) in cl_names:
+                    child_links.append((child, cl_names[index.name(child)]))
+                elif index.is_dir(child):
+                    dirs.append((child, depth + 1))
+
+        for child, extent in child_links:
+            index.child_links[child] = _find_dir_by_extent(extent_to_dir, extent)
+
+        index.finish()
+
+        return index
+
+    def _index_dirrecord(self, index, entry):
+        '''
+        An internal method to parse the directory record of an entry in a
+        read-only index again, straight from the ISO.
+
+        Parameters:
+         index - The dirindex.DirectoryIndex the entry is in.
+         entry - The index of the entry.
+        Returns:
+         The dr.DirectoryRecord of the entry (without a real parent).
+        '''
+        log_block_size = self.pvd.logical_block_size()
+        parent = index.parents[entry]
+        data = self._read_at(index.extents[parent] * log_block_size + index.record_offsets[entry], 255)
+        (lenbyte,) = struct.unpack_from("=B", data, 0)
+
+        rec = dr.DirectoryRecord()
+        rec.parse(memoryview(data)[:lenbyte], self.cdfp,
+                  _DetachedParent(index.rr_bytes_to_skip, parent == 0),
+                  self._validation == 'strict', 'rock_ridge' in self._namespaces)
+        if rec.rock_ridge is not None and rec.rock_ridge.continuation_record() is not None:
+            ce_record = rec.rock_ridge.continuation_record()
+            con_block = self._read_at(ce_record.bl_cont_area * log_block_size + ce_record.offset_cont_area,
+                                      ce_record.len_cont_area)
+            rec.rock_ridge.parse(con_block, False, rec.rock_ridge.bytes_to_skip, True)
+
+        return rec
+
+    def _index_entry(self, index, entry, encoding):
+        '''
+        An internal method to make a DirectoryEntry for an entry in a
+        read-only index.
+
+        Parameters:
+         index - The dirindex.DirectoryIndex the entry is in.
+         entry - The index of the entry.
+         encoding - The encoding of the names in the index.
+        Returns:
+         The DirectoryEntry for the entry.
+        '''
+        if entry == 0:
+            return DirectoryEntry('/', index.extents[0], index.lengths[0], True, None)
+
+        rec = self._index_dirrecord(index, entry)
+        size = 0
+        for section in index.sections(entry):
+            size += index.lengths[section]
+        return DirectoryEntry(index.path(entry, encoding), index.extents[entry],
+                              size, index.is_dir(entry), rec.rock_ridge)
+
+    def _metadata_fingerprint(self):
+        '''
+        An internal method to compute the fingerprint of the ISO used to key
+        the metadata cache.  The fingerprint covers the size and modification
+        time of the file, the volume descriptors and the path tables, so any
+        change to the ISO invalidates the cache.  It also covers the
+        validation level, so a cache written by a less thorough open is never
+        used by a more thorough one.
+
+        Parameters:
+         None.
+        Returns:
+         The fingerprint, as a hex string of bytes.
+        '''
+        fingerprint = hashlib.sha256()
+        st = os.fstat(self.cdfp.fileno())
+        fingerprint.update(("%d %d %d %r %s\n" % (_METADATA_CACHE_VERSION, sys.version_info[0],
+                                                  st.st_size, st.st_mtime,
+                                                  self._validation)).encode('ascii'))
+
+        vd_end = (self.vdsts[0].extent_location() + 1) * 2048
+        fingerprint.update(self._read_at(16 * 2048, vd_end - 16 * 2048))
+
+        log_block_size = self.pvd.logical_block_size()
+        for vd in [self.pvd, self.joliet_vd]:
+            if vd is None:
+                continue
+            fingerprint.update(self._read_at(vd.path_table_location_le * log_block_size,
+                                             vd.path_table_size()))
+            fingerprint.update(self._read_at(vd.path_table_location_be * log_block_size,
+                                             vd.path_table_size()))
+
+        return fingerprint.hexdigest().encode('ascii')
+
+    def _load_metadata_cache(self, cache_path, fingerprint):
+        '''
+        An internal method to restore the parsed state of the ISO from a
+        metadata cache, if the cache exists and was made from this ISO.
+
+        Parameters:
+         cache_path - The path to the metadata cache.
+         fingerprint - The fingerprint of the ISO being opened.
+        Returns:
+         True if the state was restored from the cache, False otherwise.
+        '''
+        try:
+            with open(cache_path, 'rb') as infp:
+                if infp.readline() != _METADATA_CACHE_MAGIC:
+                    return False
+                if infp.readline() != fingerprint + b"\n":
+                    return False
+                data = zlib.decompress(infp.read())
+            state = _MetadataUnpickler(io.BytesIO(data), self.cdfp).load()
+            values = [state[name] for name in _METADATA_CACHE_ATTRIBUTES]
+        except Exception:  # pylint: disable=broad-except
+            # A corrupted or truncated cache can make unpickling fail in
+            # just about any way; just parse the ISO instead.
+            return False
+
+        for name, value in zip(_METADATA_CACHE_ATTRIBUTES, values):
+            setattr(self, name, value)
+
+        return True
+
+    def _save_metadata_cache(self, cache_path, fingerprint):
+        '''
+        An internal method to save the parsed state of the ISO to a metadata
+        cache.  Failing to save the cache is not an error; the ISO will just
+        be parsed again the next time it is opened.
+
+        Parameters:
+         cache_path - The path to the metadata cache.
+         fingerprint - The fingerprint of the ISO being opened.
+        Returns:
+         Nothing.
+        '''
+        state = dict((name, getattr(self, name)) for name in _METADATA_CACHE_ATTRIBUTES)
+        data = io.BytesIO()
+        try:
+            _MetadataPickler(data, self.cdfp).dump(state)
+        except RuntimeError:
+            # Pickling recurses through the directory tree, so extremely deep
+            # trees can exceed the recursion limit; do without the cache.
+            return
+
+        # Write to a temporary file first so that a concurrent open never sees
+        # a partially written cache.
+        tmp_path = "%s.%d.tmp" % (cache_path, os.getpid())
+        try:
+            with open(tmp_path, 'wb') as outfp:
+                outfp.write(_METADATA_CACHE_MAGIC)
+                outfp.write(fingerprint + b"\n")
+                outfp.write(zlib.compress(data.getvalue()))
+            getattr(os, 'replace', os.rename)(tmp_path, cache_path)
+        except (IOError, OSError):
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+
+    def _root_rr_bytes_to_skip(self, vd):
+        '''
+        An internal method to find out how many bytes to skip at the start of
+        the Rock Ridge entries in a directory tree, as set by the SP entry in
+        the "." record of its root directory.
+
+        Parameters:
+         vd - The volume descriptor of the directory tree.
+        Returns:
+         The number of bytes to skip.
+        '''
+        root = vd.root_directory_record()
+        data = self._read_at(root.extent_location() * self.pvd.logical_block_size(),
+                             min(root.file_length(), 255))
+        if not data:
+            return 0
+        (lenbyte,) = struct.unpack_from("=B", data, 0)
+        dot = dr.DirectoryRecord()
+        try:
+            dot.parse(data[:lenbyte], None, root)
+        except pycdlibexception.PyCdlibException:
+            # The walk of the directory tree will report this properly.
+            return 0
+        if dot.rock_ridge is None:
+            return 0
+        return dot.rock_ridge.bytes_to_skip
+
+    def _decode_directories(self, filename, workers, trees):
+        '''
+        An internal method to decode the directories of one or more directory
+        trees in a pool of worker processes.  The path tables say where every
+        directory lives, so all of the directories (other than the roots,
+        which are decoded as part of the walk) are handed out to the workers
+        at once.  The results are then stitched back into the trees by
+        _walk_directories, which does all of the linking (hard links, Rock
+        Ridge CL/PL records, El Torito and so on) in this process.
 
-                if try_long_entry:
-                    ret = dir_record.add_child(new_record, vd.logical_block_size(), True)
+        Parameters:
+         filename - The filename of the ISO, which each worker opens itself.
+         workers - The number of worker processes to use.
+         trees - A list of tuples of volume descriptor and path table records.
+        Returns:
+         A list with a dictionary for each of the trees, mapping directory
+         extents to the decoded directory lengths and records.
+        '''
+        tasks = []
+        tree_indices = []
+        for index, (vd, ptrs) in enumerate(trees):
+            bytes_to_skip = self._root_rr_bytes_to_skip(vd)
+            for ptr in ptrs[1:]:
+                tasks.append((ptr.extent_location, self.pvd.logical_block_size(),
+                              vd.logical_block_size(), bytes_to_skip,
+                              self._validation == 'strict',
+                              self._validation != 'trust',
+                              self._validation != 'strict'))
+                tree_indices.append(index)
+
+        decoded = [{} for tree_unused in trees]
+        if not tasks:
+            return decoded
+
+        pool = multiprocessing.Pool(workers, _decode_worker_init,
+                                    (filename, self.pvd.logical_block_size()))
+        try:
+            results = pool.map(_decode_directory_extent, tasks,
+                               max(1, len(tasks) // (workers * 4)))
+        finally:
+            pool.close()
+            pool.join()
 
-                if ret:
-                    raise pycdlibexception.PyCdlibInvalidISO("More records than fit into parent directory; ISO is corrupt")
+        for index, (extent, length, records) in zip(tree_indices, results):
+            if records is not None:
+                decoded[index][extent] = (length, records)
 
-                if check_interchange:
-                    interchange_level = max(interchange_level, _interchange_level_from_name(new_record.file_identifier(), new_record.is_dir()))
+        return decoded
 
-                last_record = new_record
+    def _setup_lazy_vd(self, vd, path_table_records, extent_to_ptr):
+        '''
+        An internal method to prepare a volume descriptor for lazy directory
+        parsing.  Only the root directory is scheduled; every other directory
+        is found through the path table records as it is needed.
+
+        Parameters:
+         vd - The volume descriptor to prepare.
+         path_table_records - The list of path table records.
+         extent_to_ptr - A dictionary mapping extents to PTRs.
+        Returns:
+         Nothing.
+        '''
+        vd.root_directory_record().set_ptr(path_table_records[0])
+        extent_to_index = {}
+        for index, ptr in enumerate(path_table_records):
+            extent_to_index[ptr.extent_location] = index
+        self._lazy_ptrs[id(vd)] = (path_table_records, extent_to_ptr, extent_to_index)
+        self._lazy_dirs[id(vd.root_directory_record())] = vd
+
+    def _parse_lazy_directory(self, dir_record):
+        '''
+        An internal method to parse the children of a directory that was
+        skipped when the ISO was opened in lazy mode.  If the children of this
+        directory have already been parsed, this is a no-op.
+
+        Parameters:
+         dir_record - The directory record whose children should be parsed.
+        Returns:
+         Nothing.
+        '''
+        vd = self._lazy_dirs.pop(id(dir_record), None)
+        if vd is None:
+            return
 
+        extent_to_ptr = self._lazy_ptrs[id(vd)][1]
+        is_pvd = isinstance(vd, headervd.PrimaryVolumeDescriptor)
+        subdirs = []
+        parent_links = []
+        child_links = []
+        ic_level = self._parse_directory(vd, dir_record, extent_to_ptr, None,
+                                         is_pvd, subdirs, parent_links,
+                                         child_links)
+        if is_pvd:
+            self.interchange_level = max(self.interchange_level, ic_level)
+
+        for subdir in subdirs:
+            self._lazy_dirs[id(subdir)] = vd
+
+        # The rest of the tree may not have been parsed yet, so we can't search
+        # it for the targets of the Rock Ridge links.  Instead, use the path
+        # table to find (and parse) just the directories that we need.
         for pl in parent_links:
-            pl.rock_ridge.parent_link = _find_record_by_extent(vd, pl.rock_ridge.parent_link_extent())
+            pl.rock_ridge.parent_link = self._lazy_dirrecord_from_extent(vd, pl.rock_ridge.parent_link_extent())
 
         for cl in child_links:
-            cl.rock_ridge.cl_to_moved_dr = _find_record_by_extent(vd, cl.rock_ridge.child_link_extent())
+            cl.rock_ridge.cl_to_moved_dr = self._lazy_dirrecord_from_extent(vd, cl.rock_ridge.child_link_extent())
             cl.rock_ridge.cl_to_moved_dr.rock_ridge.moved_to_cl_dr = cl
 
-        return interchange_level
+    def _lazy_dirrecord_from_extent(self, vd, extent):
+        '''
+        An internal method to find the directory record for the directory at
+        the given extent on an ISO opened in lazy mode.  The path table is used
+        to find the parents of the directory, and only those parents are
+        parsed.
+
+        Parameters:
+         vd - The volume descriptor the directory belongs to.
+         extent - The extent of the directory to find.
+        Returns:
+         The directory record for the directory at the extent.
+        '''
+        (ptrs, extent_to_ptr_unused, extent_to_index) = self._lazy_ptrs[id(vd)]
+        if extent not in extent_to_index:
+            raise pycdlibexception.PyCdlibInvalidISO("Could not find directory with extent %d in the path table" % (extent))
+
+        # Walk up the path table until we find a directory we already know
+        # about, then parse our way back down.
+        index = extent_to_index[extent]
+        chain = []
+        while ptrs[index].dirrecord is None:
+            chain.append(index)
+            parent_index = ptrs[index].parent_directory_num - 1
+            # Ecma-119 Section 9.4 requires that parent directories come
+            # before their children in the path table.
+            if parent_index < 0 or parent_index >= index:
+                raise pycdlibexception.PyCdlibInvalidISO("Invalid parent directory number in path table")
+            index = parent_index
+
+        for index in reversed(chain):
+            self._parse_lazy_directory(ptrs[ptrs[index].parent_directory_num - 1].dirrecord)
+            if ptrs[index].dirrecord is None:
+                raise pycdlibexception.PyCdlibInvalidISO("Path table record does not match any directory record")
+
+        return ptrs[extent_to_index[extent]].dirrecord
+
+    def _finish_lazy_parse(self):
+        '''
+        An internal method to parse the rest of the directories of an ISO that
+        was opened in lazy mode, and to do all of the cross-linking that was
+        skipped.  After this is called, the object is the same as if the ISO
+        had been opened normally.  If the ISO was not opened in lazy mode, this
+        is a no-op.
+
+        Parameters:
+         None.
+        Returns:
+         Nothing.
+        '''
+        if self._read_only:
+            raise pycdlibexception.PyCdlibInvalidInput("This ISO was opened read-only; it cannot be modified or written out")
+
+        if self._namespaces != _NAMESPACES:
+            raise pycdlibexception.PyCdlibInvalidInput("This ISO was opened with only some of its namespaces; it cannot be modified or written out")
+
+        if not self._lazy:
+            return
+
+        extent_to_dr = {}
+        vds = [self.pvd]
+        if self.joliet_vd is not None:
+            vds.append(self.joliet_vd)
+
+        # The PVD must be completely done before the Joliet SVD, since the
+        # Joliet records are linked to the PVD ones.
+        for vd in vds:
+            dirs = collections.deque([vd.root_directory_record()])
+            while dirs:
+                dir_record = dirs.popleft()
+                self._parse_lazy_directory(dir_record)
+                for child in dir_record.children:
+                    self._link_record(vd, child, extent_to_dr)
+                    if not child.is_dir() or child.is_dot() or child.is_dotdot():
+                        continue
+                    if child.rock_ridge is not None and child.rock_ridge.child_link_record_exists():
+                        continue
+                    dirs.append(child)
+
+            if vd is self.pvd:
+                self._link_eltorito_dirrecords()
+
+        self._lazy = False
+        self._lazy_ptrs = {}
+        self._ce_reader = None
 
     def _initialize(self):
         '''
@@ -900,6 +1998,110 @@ class PyCdlib(object):
         self._rr_moved_record = None
         self._rr_moved_name = None
         self._rr_moved_rr_name = None
+        self._lazy = False
+        self._lazy_dirs = {}
+        self._lazy_ptrs = {}
+        self._mmap_view = None
+        self._read_runs = []
+        self._read_run_starts = []
+        self._ce_reader = None
+        self._validation = 'strict'
+        self._read_only = False
+        self._dir_indexes = {}
+        self._budget = None
+        self._limits = None
+        self._namespaces = _NAMESPACES
+
+    def _check_namespace(self, joliet):
+        '''
+        An internal method to make sure that the namespace being looked at was
+        parsed when the ISO was opened.
+
+        Parameters:
+         joliet - Whether the Joliet namespace is being looked at, rather than
+                  the ISO9660 one.
+        Returns:
+         Nothing.
+        '''
+        if joliet:
+            if 'joliet' not in self._namespaces:
+                raise pycdlibexception.PyCdlibInvalidInput("The Joliet namespace was not parsed when this ISO was opened")
+        elif 'iso9660' not in self._namespaces:
+            raise pycdlibexception.PyCdlibInvalidInput("The ISO9660 namespace was not parsed when this ISO was opened")
+
+    def _read_at(self, offset, length):
+        '''
+        An internal method to read data from the input ISO.  If the ISO was
+        opened with open_mmap, this returns a view into the mapping and no data
+        is copied; otherwise the data is read from the file object.
+
+        Parameters:
+         offset - The byte offset into the ISO to start reading at.
+         length - The number of bytes to read.
+        Returns:
+         The data (possibly shorter than length, if the ISO is truncated).
+        '''
+        if self._budget is not None:
+            self._budget.add_read(length)
+
+        if self._mmap_view is not None:
+            return self._mmap_view[offset:offset + length]
+
+        if self._read_runs:
+            index = bisect.bisect_right(self._read_run_starts, offset) - 1
+            if index >= 0:
+                run = self._read_runs[index]
+                if offset + length <= run[1]:
+                    if run[2] is None:
+                        self.cdfp.seek(run[0])
+                        run[2] = memoryview(self.cdfp.read(run[1] - run[0]))
+                    start = offset - run[0]
+                    return run[2][start:start + length]
+
+        self.cdfp.seek(offset)
+        return self.cdfp.read(length)
+
+    def _schedule_directory_reads(self, extents):
+        '''
+        An internal method to plan how the directory extents of the ISO are
+        read.  The path tables tell us where every directory lives before any
+        of them are parsed, so rather than seeking to each directory as the
+        tree is walked, the extents are sorted and those that are close
+        together are coalesced into runs.  Each run is read with a single
+        request the first time _read_at needs anything inside of it; reads
+        that fall outside of all runs (such as the tail of a multi-block
+        directory at the end of a run) go to the file as usual.
+
+        Parameters:
+         extents - An iterable of the extent locations of all directories.
+        Returns:
+         Nothing.
+        '''
+        runs = []
+        for extent in sorted(set(extents)):
+            if runs and extent - runs[-1][1] <= _DIR_READ_MAX_GAP and extent + 1 - runs[-1][0] <= _DIR_READ_MAX_RUN:
+                runs[-1][1] = extent + 1
+            else:
+                runs.append([extent, extent + 1])
+
+        log_block_size = self.pvd.logical_block_size()
+        self._read_runs = [[start * log_block_size, end * log_block_size, None] for start, end in runs]
+        self._read_run_starts = [run[0] for run in self._read_runs]
+
+    def _clear_directory_reads(self):
+        '''
+        An internal method to drop the buffers read on behalf of
+        _schedule_directory_reads, along with the cached Rock Ridge
+        continuation blocks, once the directories have been parsed.
+
+        Parameters:
+         None.
+        Returns:
+         Nothing.
+        '''
+        self._read_runs = []
+        self._read_run_starts = []
+        self._ce_reader = None
 
     def _parse_path_table(self, ptr_size, extent):
         '''
@@ -914,20 +2116,22 @@ class PyCdlib(object):
         Returns:
          Nothing.
         '''
-        self._seek_to_extent(extent)
-        left = ptr_size
+        # The whole path table is read at once and the records are decoded
+        # out of the buffer.
+        data = memoryview(self._read_at(extent * self.pvd.logical_block_size(), ptr_size)).tobytes()
+        offset = 0
         out = []
         extent_to_ptr = {}
-        while left > 0:
+        while offset < ptr_size:
+            if offset >= len(data):
+                raise pycdlibexception.PyCdlibInvalidISO("Not enough data for path table record")
             ptr = path_table_record.PathTableRecord()
-            len_di_byte = self.cdfp.read(1)
-            if len(len_di_byte) != 1:
+            read_len = path_table_record.PathTableRecord.record_length(struct.unpack_from("=B", data, offset)[0])
+            if offset + read_len > len(data):
                 raise pycdlibexception.PyCdlibInvalidISO("Not enough data for path table record")
-            read_len = path_table_record.PathTableRecord.record_length(struct.unpack_from("=B", len_di_byte, 0)[0])
-            data = len_di_byte + self.cdfp.read(read_len - 1)
-            left -= read_len
 
-            ptr.parse(data)
+            ptr.parse(data[offset:offset + read_len])
+            offset += read_len
             out.append(ptr)
             extent_to_ptr[ptr.extent_location] = ptr
 
@@ -964,12 +2168,19 @@ class PyCdlib(object):
         self.eltorito_boot_catalog = eltorito.EltoritoBootCatalog(br)
         eltorito_boot_catalog_extent, = struct.unpack_from("=L", br.boot_system_use[:4], 0)
 
-        old = self.cdfp.tell()
-        self.cdfp.seek(eltorito_boot_catalog_extent * logical_block_size)
-        data = self.cdfp.read(32)
-        while not self.eltorito_boot_catalog.parse(data):
-            data = self.cdfp.read(32)
-        self.cdfp.seek(old)
+        # The catalog is read a logical block at a time, and the 32-byte
+        # entries are handed to the parser out of that block.
+        offset = eltorito_boot_catalog_extent * logical_block_size
+        data = b''
+        done = False
+        while not done:
+            if not data:
+                data = memoryview(self._read_at(offset, logical_block_size)).tobytes()
+                offset += logical_block_size
+            if len(data) < 32:
+                raise pycdlibexception.PyCdlibInvalidISO("Failed to read El Torito Boot Catalog")
+            done = self.eltorito_boot_catalog.parse(data[:32])
+            data = data[32:]
 
     def _reshuffle_extents(self):
         '''
@@ -1233,68 +2444,6 @@ class PyCdlib(object):
 
         return rec
 
-    def _calculate_eltorito_boot_info_table_csum(self, data_fp, data_len):
-        '''
-        An internal method to calculate the checksum for an El Torito Boot Info
-        Table.  This checksum is a simple 32-bit checksum over all of the data
-        in the boot file, starting right after the Boot Info Table itself.
-
-        Parameters:
-         data_fp - The file object to read the input data from.
-         data_len - The length of the input file.
-        Returns:
-         An integer representing the 32-bit checksum for the boot info table.
-        '''
-        # Here we want to read the boot file so we can calculate the checksum
-        # over it.
-        num_sectors = utils.ceiling_div(data_len, self.pvd.logical_block_size())
-        csum = 0
-        curr_sector = 0
-        while curr_sector < num_sectors:
-            block = data_fp.read(self.pvd.logical_block_size())
-            block = block.ljust(2048, b"\x00")
-            i = 0
-            if curr_sector == 0:
-                # The first 64 bytes are not included in the checksum, so skip
-                # them here.
-                i = 64
-            while i < len(block):
-                tmp, = struct.unpack_from("=L", block[:i + 4], i)
-                csum += tmp
-                csum = csum & 0xffffffff
-                i += 4
-
-            curr_sector += 1
-
-        return csum
-
-    def _check_for_eltorito_boot_info_table(self, rec):
-        '''
-        An internal method to check a boot directory record to see if it has
-        an El Torito Boot Info Table embedded inside of it.
-
-        Parameters:
-         rec - The directory record to check for a Boot Info Table.
-        Returns:
-         Nothing.
-        '''
-        orig = self.cdfp.tell()
-        with dr.DROpenData(rec, self.pvd.logical_block_size()) as (data_fp, data_len):
-            data_fp.seek(8, 1)
-            bi_table = eltorito.EltoritoBootInfoTable()
-            bi_table.parse(self.pvd, data_fp.read(eltorito.EltoritoBootInfoTable.header_length()), rec)
-
-            if bi_table.vd_extent_matches_vd() and bi_table.dirrecord.extent_location() == rec.extent_location():
-                data_fp.seek(-24, 1)
-                # OK, the rest of the stuff checks out; do a final
-                # check to make sure the checksum is reasonable.
-                csum = self._calculate_eltorito_boot_info_table_csum(data_fp, data_len)
-
-                if csum == bi_table.csum:
-                    rec.boot_info_table = bi_table
-
-        self.cdfp.seek(orig)
-
     def _check_rr_name(self, rr_name):
         '''
         An internal method to check whether this ISO requires or does not
@@ -1363,7 +2512,75 @@ class PyCdlib(object):
 
         return joliet_name, joliet_parent
 
-    def _open_fp(self, fp):
+    def _link_eltorito_dirrecords(self):
+        '''
+        An internal method to make sure that every part of the El Torito Boot
+        Catalog has a directory record once the PVD directories have been
+        parsed, and to mark the boot files as possibly holding Boot Info
+        Tables.
+
+        Parameters:
+         None.
+        Returns:
+         Nothing.
+        '''
+        # On El Torito ISOs, after we have walked the directories we look
+        # to see if all of the entries in El Torito have corresponding
+        # directory records.  If they don't, then it may be the case that
+        # the El Torito bits of the system are "hidden" or "unlinked",
+        # meaning that they take up space but have no corresponding directory
+        # record in the ISO filesystem.  In order to accommodate the rest
+        # of the system, which really expects these things to have directory
+        # records, we use fake directory records that don't get written out.
+        #
+        # Note that we specifically do *not* add these to any sort of parent;
+        # that way, we don't run afoul of any checks that adding a child to a
+        # parent might have.  This means that if we do ever want to unhide this
+        # entry, we'll have to do some additional work to give it a real name
+        # and link it to the appropriate parent.
+        if self.eltorito_boot_catalog is None:
+            return
+
+        if self.eltorito_boot_catalog.dirrecord is None:
+            rec = dr.DirectoryRecord()
+            rec.parse_hidden(self.cdfp,
+                             self.pvd.logical_block_size(),
+                             self.eltorito_boot_catalog.extent_location(),
+                             self.pvd.root_directory_record(),
+                             self.pvd.sequence_number())
+            self.eltorito_boot_catalog.dirrecord = rec
+
+        if self.eltorito_boot_catalog.initial_entry.dirrecord is None:
+            rec = dr.DirectoryRecord()
+            rec.parse_hidden(self.cdfp,
+                             self.eltorito_boot_catalog.initial_entry.length(),
+                             self.eltorito_boot_catalog.initial_entry.get_rba(),
+                             self.pvd.root_directory_record(),
+                             self.pvd.sequence_number())
+            self.eltorito_boot_catalog.initial_entry.dirrecord = rec
+
+        for sec in self.eltorito_boot_catalog.sections:
+            for entry in sec.section_entries:
+                if entry.dirrecord is None:
+                    rec = dr.DirectoryRecord()
+                    rec.parse_hidden(self.cdfp,
+                                     entry.length(),
+                                     entry.get_rba(),
+                                     self.pvd.root_directory_record(),
+                                     self.pvd.sequence_number())
+                    entry.dirrecord = rec
+
+        # Now that everything has a dirrecord, the boot files may have boot
+        # info tables.  Finding out means checksumming the whole boot file, so
+        # it is only done the first time the boot info table is needed.
+        self.eltorito_boot_catalog.initial_entry.dirrecord.check_boot_info_table_on_use(self.pvd)
+        for sec in self.eltorito_boot_catalog.sections:
+            for entry in sec.section_entries:
+                entry.dirrecord.check_boot_info_table_on_use(self.pvd)
+
+    def _open_fp(self, fp, lazy=False, workers=0, filename=None, cache_path=None,
+                 validation='strict', read_only=False, limits=None,
+                 namespaces=_NAMESPACES):
         '''
         An internal method to open an existing ISO for inspection and
         modification.  Note that the file object passed in here must stay open
@@ -1372,6 +2589,20 @@ class PyCdlib(object):
 
         Parameters:
          fp - The file object containing the ISO to open up.
+         lazy - Whether to delay parsing the directory records until they are
+                needed.
+         workers - The number of worker processes to decode the directory
+                   records with; 0 or 1 to decode them in this process.
+         filename - The filename of the ISO, which the worker processes open
+                    for themselves; required if workers is more than 1.
+         cache_path - The path to a metadata cache to restore the parsed state
+                      of the ISO from, or to save it to; None for no cache.
+         validation - The validation level to parse the ISO with; one of
+                      _VALIDATION_LEVELS.
+         read_only - Whether to record the directory trees in read-only
+                     indexes instead of building them.
+         limits - The ParseLimits to parse the ISO under, or None.
+         namespaces - The namespaces to parse; a subset of _NAMESPACES.
         Returns:
          Nothing.
         '''
@@ -1379,20 +2610,23 @@ class PyCdlib(object):
             raise pycdlibexception.PyCdlibInvalidInput("The file to open must be in binary mode (add 'b' to the open flags)")
 
         self.cdfp = fp
+        self._validation = validation
+        self._namespaces = tuple(namespaces)
+        self._limits = limits
+        self._budget = None
+        if limits is not None:
+            self._budget = _ParseBudget(limits)
 
         # Get the Primary Volume Descriptor (pvd), the set of Supplementary
         # Volume Descriptors (svds), the set of Volume Partition
         # Descriptors (vpds), the set of Boot Records (brs), and the set of
         # Volume Descriptor Set Terminators (vdsts)
-        self._parse_volume_descriptors()
+        system_area = self._parse_volume_descriptors()
 
-        old = self.cdfp.tell()
-        self.cdfp.seek(0)
         tmp_mbr = isohybrid.IsoHybrid()
-        if tmp_mbr.parse(self.cdfp.read(512)):
+        if tmp_mbr.parse(system_area[:512]):
             # We only save the object if it turns out to be a valid IsoHybrid
             self.isohybrid_mbr = tmp_mbr
-        self.cdfp.seek(old)
 
         if self.pvd.application_use[141:149] == b"CD-XA001":
             self.xa = True
@@ -1420,106 +2654,165 @@ class PyCdlib(object):
         le_ptrs, extent_to_ptr = self._parse_path_table(self.pvd.path_table_size(),
                                                         self.pvd.path_table_location_le)
 
-        # Big Endian next.
-        tmp_be_ptrs, e_unused = self._parse_path_table(self.pvd.path_table_size(),
-                                                       self.pvd.path_table_location_be)
+        # Big Endian next.  Only the little endian path tables are used, so
+        # the big endian ones are only read in strict mode.
+        if validation == 'strict':
+            tmp_be_ptrs, e_unused = self._parse_path_table(self.pvd.path_table_size(),
+                                                           self.pvd.path_table_location_be)
 
-        for index, ptr in enumerate(le_ptrs):
-            if not ptr.equal_to_be(tmp_be_ptrs[index]):
-                raise pycdlibexception.PyCdlibInvalidISO("Little-endian and big-endian path table records do not agree")
+            for index, ptr in enumerate(le_ptrs):
+                if not ptr.equal_to_be(tmp_be_ptrs[index]):
+                    raise pycdlibexception.PyCdlibInvalidISO("Little-endian and big-endian path table records do not agree")
 
+        # In trust mode the interchange level isn't worked out from the names
+        # on the ISO, so assume the most permissive level that doesn't need an
+        # Enhanced Volume Descriptor.
         self.interchange_level = 1
+        if validation == 'trust':
+            self.interchange_level = 3
         for svd in self.svds:
             if svd.version == 2 and svd.file_structure_version == 2:
                 self.interchange_level = 4
                 break
 
-        extent_to_dr = {}
-
-        # OK, so now that we have the PVD, we start at its root directory
-        # record and find all of the files
-        ic_level = self._walk_directories(self.pvd, extent_to_ptr, extent_to_dr, le_ptrs, True)
-
-        self.interchange_level = max(self.interchange_level, ic_level)
-
-        # On El Torito ISOs, after we have walked the directories we look
-        # to see if all of the entries in El Torito have corresponding
-        # directory records.  If they don't, then it may be the case that
-        # the El Torito bits of the system are "hidden" or "unlinked",
-        # meaning that they take up space but have no corresponding directory
-        # record in the ISO filesystem.  In order to accommodate the rest
-        # of the system, which really expects these things to have directory
-        # records, we use fake directory records that don't get written out.
-        #
-        # Note that we specifically do *not* add these to any sort of parent;
-        # that way, we don't run afoul of any checks that adding a child to a
-        # parent might have.  This means that if we do ever want to unhide this
-        # entry, we'll have to do some additional work to give it a real name
-        # and link it to the appropriate parent.
-        if self.eltorito_boot_catalog is not None:
-            if self.eltorito_boot_catalog.dirrecord is None:
-                rec = dr.DirectoryRecord()
-                rec.parse_hidden(self.cdfp,
-                                 self.pvd.logical_block_size(),
-                                 self.eltorito_boot_catalog.extent_location(),
-                                 self.pvd.root_directory_record(),
-                                 self.pvd.sequence_number())
-                self.eltorito_boot_catalog.dirrecord = rec
-
-            if self.eltorito_boot_catalog.initial_entry.dirrecord is None:
-                rec = dr.DirectoryRecord()
-                rec.parse_hidden(self.cdfp,
-                                 self.eltorito_boot_catalog.initial_entry.length(),
-                                 self.eltorito_boot_catalog.initial_entry.get_rba(),
-                                 self.pvd.root_directory_record(),
-                                 self.pvd.sequence_number())
-                self.eltorito_boot_catalog.initial_entry.dirrecord = rec
-
-            for sec in self.eltorito_boot_catalog.sections:
-                for entry in sec.section_entries:
-                    if entry.dirrecord is None:
-                        rec = dr.DirectoryRecord()
-                        rec.parse_hidden(self.cdfp,
-                                         entry.length(),
-                                         entry.get_rba(),
-                                         self.pvd.root_directory_record(),
-                                         self.pvd.sequence_number())
-                        entry.dirrecord = rec
-
-            # Now that everything has a dirrecord, see if we have a boot
-            # info table.
-            self._check_for_eltorito_boot_info_table(self.eltorito_boot_catalog.initial_entry.dirrecord)
-            for sec in self.eltorito_boot_catalog.sections:
-                for entry in sec.section_entries:
-                    self._check_for_eltorito_boot_info_table(entry.dirrecord)
-
-        # The PVD is finished.  Now look to see if we need to parse the SVD.
+        # Now look to see if we need to parse the SVD.  The Joliet path tables
+        # are parsed up front so that the directory extents of both trees are
+        # known before any directories are read.
         self.joliet_vd = None
         self.enhanced_vd = None
+        joliet_le_ptrs = []
+        joliet_extent_to_ptr = {}
         for svd in self.svds:
             if (svd.flags & 0x1) == 0 and svd.escape_sequences[:3] in [b'%/@', b'%/C', b'%/E']:
                 if self.joliet_vd is not None:
                     raise pycdlibexception.PyCdlibInvalidISO("Only a single Joliet SVD is supported")
 
-                self.joliet_vd = svd
+                self.joliet_vd = svd
+
+                joliet_le_ptrs, joliet_extent_to_ptr = self._parse_path_table(svd.path_table_size(),
+                                                                              svd.path_table_location_le)
+
+                if validation == 'strict':
+                    tmp_be_ptrs, j_unused = self._parse_path_table(svd.path_table_size(),
+                                                                   svd.path_table_location_be)
+
+                    for index, ptr in enumerate(joliet_le_ptrs):
+                        if not ptr.equal_to_be(tmp_be_ptrs[index]):
+                            raise pycdlibexception.PyCdlibInvalidISO("Joliet Little-endian and big-endian path table records do not agree")
+            elif svd.version == 2 and svd.file_structure_version == 2:
+                if self.enhanced_vd is not None:
+                    raise pycdlibexception.PyCdlibInvalidISO("Only a single enhanced VD is supported")
+                self.enhanced_vd = svd
+
+        if 'iso9660' not in self._namespaces and self.joliet_vd is None:
+            raise pycdlibexception.PyCdlibInvalidInput("Cannot parse just the Joliet namespace of a non-Joliet ISO")
+
+        fingerprint = None
+        if cache_path is not None:
+            fingerprint = self._metadata_fingerprint()
+            if self._load_metadata_cache(cache_path, fingerprint):
+                self._budget = None
+                self._initialized = True
+                return
+
+        extent_to_dr = {}
+
+        if read_only:
+            # Only the indexes are built; the boot catalog entries all get
+            # made-up directory records, which is all they are needed for.
+            self._read_only = True
+            self._schedule_directory_reads([ptr.extent_location for ptr in le_ptrs + joliet_le_ptrs])
+            try:
+                if 'iso9660' in self._namespaces:
+                    self._dir_indexes[id(self.pvd)] = self._build_directory_index(self.pvd)
+                self._link_eltorito_dirrecords()
+                if self.joliet_vd is not None and 'joliet' in self._namespaces:
+                    self._dir_indexes[id(self.joliet_vd)] = self._build_directory_index(self.joliet_vd)
+            finally:
+                self._clear_directory_reads()
+        elif lazy:
+            # In lazy mode, we only parse the root directory record now (this
+            # is needed to figure out the Rock Ridge version); everything else
+            # is parsed as it is used, or in bulk by _finish_lazy_parse.
+            self._lazy = True
+            self._setup_lazy_vd(self.pvd, le_ptrs, extent_to_ptr)
+            self._parse_lazy_directory(self.pvd.root_directory_record())
+            if self.joliet_vd is not None:
+                self._setup_lazy_vd(self.joliet_vd, joliet_le_ptrs, joliet_extent_to_ptr)
+        else:
+            self._schedule_directory_reads([ptr.extent_location for ptr in le_ptrs + joliet_le_ptrs])
+
+            try:
+                pvd_decoded = None
+                joliet_decoded = None
+                if workers > 1:
+                    trees = [(self.pvd, le_ptrs)]
+                    if self.joliet_vd is not None:
+                        trees.append((self.joliet_vd, joliet_le_ptrs))
+                    decoded = self._decode_directories(filename, workers, trees)
+                    pvd_decoded = decoded[0]
+                    if self.joliet_vd is not None:
+                        joliet_decoded = decoded[1]
+
+                # OK, so now that we have the PVD, we start at its root
+                # directory record and find all of the files
+                if 'iso9660' in self._namespaces:
+                    ic_level = self._walk_directories(self.pvd, extent_to_ptr, extent_to_dr, le_ptrs, True, pvd_decoded)
+
+                    self.interchange_level = max(self.interchange_level, ic_level)
+
+                self._link_eltorito_dirrecords()
+
+                if self.joliet_vd is not None and 'joliet' in self._namespaces:
+                    self._walk_directories(self.joliet_vd, joliet_extent_to_ptr, extent_to_dr, joliet_le_ptrs, False, joliet_decoded)
+            finally:
+                self._clear_directory_reads()
+
+            if fingerprint is not None:
+                self._save_metadata_cache(cache_path, fingerprint)
+
+        self._budget = None
+        self._initialized = True
 
-                le_ptrs, joliet_extent_to_ptr = self._parse_path_table(svd.path_table_size(),
-                                                                       svd.path_table_location_le)
+    def _find_data_record(self, vd, iso_path, encoding):
+        '''
+        An internal method to find the directory record of a file to read the
+        data of.  On an ISO opened read-only, the directory record is parsed
+        again from the ISO, along with any further sections of the file.
 
-                tmp_be_ptrs, j_unused = self._parse_path_table(svd.path_table_size(),
-                                                               svd.path_table_location_be)
+        Parameters:
+         vd - The volume descriptor to look up the path in.
+         iso_path - The normalized path to look up.
+         encoding - The encoding of the names in the volume descriptor.
+        Returns:
+         The directory record of the file.
+        '''
+        if not self._read_only:
+            found_record, index_unused = _find_record(vd, iso_path, encoding,
+                                                      self._parse_lazy_directory)
+            return found_record
 
-                for index, ptr in enumerate(le_ptrs):
-                    if not ptr.equal_to_be(tmp_be_ptrs[index]):
-                        raise pycdlibexception.PyCdlibInvalidISO("Joliet Little-endian and big-endian path table records do not agree")
+        index = self._dir_indexes[id(vd)]
+        entry = index.find(iso_path, encoding)
+        if entry == 0:
+            return vd.root_directory_record()
 
-                self._walk_directories(svd, joliet_extent_to_ptr, extent_to_dr, le_ptrs, False)
-            elif svd.version == 2 and svd.file_structure_version == 2:
-                if self.enhanced_vd is not None:
-                    raise pycdlibexception.PyCdlibInvalidISO("Only a single enhanced VD is supported")
-                self.enhanced_vd = svd
+        records = [self._index_dirrecord(index, section) for section in index.sections(entry)]
+        for rec, next_rec in zip(records, records[1:]):
+            rec.data_continuation = next_rec
 
-        self._initialized = True
+        found_record = records[0]
+        if self.eltorito_boot_catalog is not None:
+            # The boot files were checked for boot info tables when the ISO was
+            # opened, against the directory records made up for them then.
+            entries = [self.eltorito_boot_catalog.initial_entry]
+            for sec in self.eltorito_boot_catalog.sections:
+                entries.extend(sec.section_entries)
+            for boot_entry in entries:
+                if boot_entry.dirrecord.extent_location() == found_record.extent_location():
+                    found_record.boot_info_table = boot_entry.dirrecord.boot_info_table
+
+        return found_record
 
     def _get_and_write_fp(self, iso_path, outfp, blocksize=8192):
         '''
@@ -1537,16 +2830,17 @@ class PyCdlib(object):
 
         iso_path = utils.normpath(iso_path)
 
-        try_iso9660 = True
-        if self.joliet_vd is not None:
+        try_iso9660 = 'iso9660' in self._namespaces
+        if self.joliet_vd is not None and 'joliet' in self._namespaces:
             try:
-                found_record, index_unused = _find_record(self.joliet_vd, iso_path, 'utf-16_be')
+                found_record = self._find_data_record(self.joliet_vd, iso_path, 'utf-16_be')
                 try_iso9660 = False
             except pycdlibexception.PyCdlibInvalidInput:
-                pass
+                if not try_iso9660:
+                    raise
 
         if try_iso9660:
-            found_record, index_unused = _find_record(self.pvd, iso_path)
+            found_record = self._find_data_record(self.pvd, iso_path, 'ascii')
             if found_record.rock_ridge is not None:
                 if found_record.rock_ridge.is_symlink():
                     # If this Rock Ridge record is a symlink, it has no data
@@ -1560,33 +2854,31 @@ class PyCdlib(object):
                     # can revisit this decision in the future if we need to.
                     raise pycdlibexception.PyCdlibInvalidInput("Symlinks have no data associated with them")
 
+        try:
+            outfp.tell()
+            seekable = True
+        except (AttributeError, IOError, OSError, ValueError):
+            seekable = False
+
         while found_record is not None:
+            found_record.resolve_boot_info_table()
             with dr.DROpenData(found_record, self.pvd.logical_block_size()) as (data_fp, data_len):
                 # Here we copy the data into the output file descriptor.  If a boot
                 # info table is present, we overlay the table over bytes 8-64 of the
                 # file.  Note, however, that we never return more bytes than the length
                 # of the file, so the boot info table may get truncated.
                 if found_record.boot_info_table is not None:
-                    header_len = min(data_len, 8)
-                    outfp.write(data_fp.read(header_len))
-                    data_len -= header_len
-                    if data_len > 0:
-                        rec = found_record.boot_info_table.record()
-                        table_len = min(data_len, len(rec))
-                        outfp.write(rec[:table_len])
-                        data_len -= table_len
-                        if data_len > 0:
-                            data_fp.seek(len(rec), 1)
-                            utils.copy_data(data_len, blocksize, data_fp, outfp)
+                    self._copy_boot_file(outfp, blocksize, found_record.boot_info_table,
+                                         data_fp, data_len, seekable, True)
                 else:
-                    utils.copy_data(data_len, blocksize, data_fp, outfp)
+                    _copy_data(data_len, blocksize, data_fp, outfp)
 
             if found_record.data_continuation is not None:
                 found_record = found_record.data_continuation
             else:
                 found_record = None
 
-    def _outfp_write_with_check(self, outfp, data):
+    def _outfp_write_with_check(self, outfp, data, offset, fd=None):
         '''
         Internal method to write data out to the output file descriptor,
         ensuring that it doesn't go beyond the bounds of the ISO.
@@ -1594,47 +2886,343 @@ class PyCdlib(object):
         Parameters:
          outfp - The file object to write to.
          data - The actual data to write.
+         offset - The offset in the ISO that the data is being written at.
+         fd - If not None, the file descriptor to write the data to at the
+              offset instead of writing it to the file object.
+        Returns:
+         The offset in the ISO just after the data.
+        '''
+        end = offset + len(data)
+        # Before the write, double check that we won't write beyond the
+        # boundary of the PVD, and raise a PyCdlibException if we would.
+        if end > self.pvd.space_size * self.pvd.logical_block_size():
+            raise pycdlibexception.PyCdlibInternalError("Wrote past the end of the ISO! (%d > %d)" % (end, self.pvd.space_size * self.pvd.logical_block_size()))
+        if fd is None:
+            outfp.write(data)
+        else:
+            _pwrite_all(fd, data, offset)
+        return end
+
+    def _outfp_write_zeros(self, outfp, length, offset, fd=None, sparse=False):
+        '''
+        Internal method to write zeros out to the output file descriptor,
+        ensuring that they don't go beyond the bounds of the ISO.
+
+        Parameters:
+         outfp - The file object to write to.
+         length - The number of zeros to write.
+         offset - The offset in the ISO that the zeros are being written at.
+         fd - If not None, the file descriptor to write the zeros to at the
+              offset instead of writing them to the file object.
+         sparse - Whether to skip over the zeros, leaving a hole, rather than
+                  writing them.
+        Returns:
+         The offset in the ISO just after the zeros.
+        '''
+        if sparse:
+            end = offset + length
+            if end > self.pvd.space_size * self.pvd.logical_block_size():
+                raise pycdlibexception.PyCdlibInternalError("Wrote past the end of the ISO! (%d > %d)" % (end, self.pvd.space_size * self.pvd.logical_block_size()))
+            if fd is None:
+                outfp.seek(end)
+            return end
+
+        zeros = b'\x00' * min(length, 65536)
+        while length > len(zeros):
+            offset = self._outfp_write_with_check(outfp, zeros, offset, fd)
+            length -= len(zeros)
+        return self._outfp_write_with_check(outfp, zeros[:length], offset, fd)
+
+    def _data_piece_end(self, child, offset):
+        '''
+        Internal method to get ready to write the data of a directory record
+        out, working out where it ends.
+
+        Parameters:
+         child - The directory record to write.
+         offset - The offset in the ISO that the data is being written at.
+        Returns:
+         The offset in the ISO just after the data.
+        '''
+        child.resolve_boot_info_table()
+        end = offset + max(child.data_length, 64 if child.boot_info_table is not None else 0)
+        if end > self.pvd.space_size * self.pvd.logical_block_size():
+            raise pycdlibexception.PyCdlibInternalError("Wrote past the end of the ISO! (%d > %d)" % (end, self.pvd.space_size * self.pvd.logical_block_size()))
+
+        return end
+
+    def _copy_boot_file(self, outfp, blocksize, bi_table, data_fp, data_len,
+                        seekable, truncate):
+        '''
+        Internal method to copy the data of a boot file out with its boot info
+        table at offset 8, over the top of whatever was there.  If the
+        checksum of the table is not known yet, it is calculated as the boot
+        file goes by, so that the boot file is only read once; the table is
+        then written over the top of the data afterwards if the file object is
+        seekable, or the rest of the boot file is held back in a spool until
+        the checksum is known if it isn't.
+
+        Parameters:
+         outfp - The file object to write the data to.
+         blocksize - The blocksize to use when copying the data.
+         bi_table - The boot info table of the boot file.
+         data_fp - The file object to read the boot file from, positioned at
+                   the start of the boot file.
+         data_len - The length of the boot file.
+         seekable - Whether outfp is seekable.
+         truncate - Whether to cut the boot info table short rather than
+                    writing out more than the length of the boot file.
         Returns:
          Nothing.
         '''
-        outfp.write(data)
-        # After the write, double check that we didn't write beyond the
-        # boundary of the PVD, and raise a PyCdlibException if we do.
-        if outfp.tell() > self.pvd.space_size * self.pvd.logical_block_size():
-            raise pycdlibexception.PyCdlibInternalError("Wrote past the end of the ISO! (%d > %d)" % (outfp.tell(), self.pvd.space_size * self.pvd.logical_block_size()))
+        head = data_fp.read(min(data_len, 64))
+        if len(head) != min(data_len, 64):
+            raise pycdlibexception.PyCdlibInternalError("Failed to read expected bytes")
+        left = data_len - len(head)
+        # The header and the table together take up the first 64 bytes.
+        table_end = len(head) if truncate else 64
+        header = head[:8].ljust(8, b'\x00')
+
+        if bi_table.csum is not None:
+            outfp.write((header + bi_table.record())[:table_end])
+            _copy_data(left, blocksize, data_fp, outfp)
+            return
 
-    def _output_directory_record(self, outfp, blocksize, child):
+        csum = eltorito.EltoritoBootInfoTableChecksum()
+        csum.update(head)
+        if seekable:
+            start = outfp.tell()
+            outfp.write(b'\x00' * table_end)
+            spool = outfp
+        else:
+            spool = tempfile.SpooledTemporaryFile(max_size=16 * blocksize)
+
+        try:
+            while left > 0:
+                data = data_fp.read(min(left, blocksize))
+                if not data:
+                    raise pycdlibexception.PyCdlibInternalError("Failed to read expected bytes")
+                csum.update(data)
+                spool.write(data)
+                left -= len(data)
+            bi_table.csum = csum.value()
+
+            rec = (header + bi_table.record())[:table_end]
+            if seekable:
+                end = outfp.tell()
+                outfp.seek(start)
+                outfp.write(rec)
+                outfp.seek(end)
+            else:
+                outfp.write(rec)
+                # The spool is read back by hand, since asking it for a file
+                # descriptor would move it out to disk.
+                spool.seek(0)
+                data = spool.read(blocksize)
+                while data:
+                    outfp.write(data)
+                    data = spool.read(blocksize)
+        finally:
+            if spool is not outfp:
+                spool.close()
+
+    def _output_directory_record(self, outfp, blocksize, child, offset, seekable):
         '''
-        Internal method to write a directory record entry out.
+        Internal method to write the data of a directory record out.
 
         Parameters:
          outfp - The file object to write the data to.
          blocksize - The blocksize to use when writing the data out.
          child - The directory record to write.
+         offset - The offset in the ISO that the data is being written at.
+         seekable - Whether outfp is seekable.
         Returns:
-         The total number of bytes written out.
+         The offset in the ISO just after the data.
         '''
+        end = self._data_piece_end(child, offset)
+
         with dr.DROpenData(child, self.pvd.logical_block_size()) as (data_fp, data_len):
-            outfp.seek(child.extent_location() * self.pvd.logical_block_size())
-            tmp_start = outfp.tell()
-            utils.copy_data(data_len, blocksize, data_fp, outfp)
-            self._outfp_write_with_check(outfp,
-                                         _pad(data_len, self.pvd.logical_block_size()))
-
-        # If this file is being used as a bootfile, and the user
-        # requested that the boot info table be patched into it,
-        # we patch the boot info table at offset 8 here.
+            if child.boot_info_table is not None:
+                # If this file is being used as a bootfile, and the user
+                # requested that the boot info table be patched into it,
+                # the boot info table goes in at offset 8, over the top of
+                # whatever was there.
+                self._copy_boot_file(outfp, blocksize, child.boot_info_table,
+                                     data_fp, data_len, seekable, False)
+            else:
+                _copy_data(data_len, blocksize, data_fp, outfp)
+
+        return end
+
+    def _output_directory_record_at(self, fd, blocksize, child, offset, lock):
+        '''
+        Internal method to write the data of a directory record out at an
+        offset of a file descriptor, without using its file pointer.  This is
+        run by the worker threads of a write, so _data_piece_end must already
+        have been called for the record.  The checksum of a new boot info
+        table is calculated as the data goes by, and the table is written
+        over the top of the data at the end.
+
+        Parameters:
+         fd - The file descriptor to write the data to.
+         blocksize - The blocksize to use when writing the data out.
+         child - The directory record to write.
+         offset - The offset in the ISO that the data is being written at.
+         lock - The lock guarding file objects shared between the threads.
+        Returns:
+         The number of bytes written out.
+        '''
+        # Opening the data seeks the file object it is in, which may be shared
+        # with other records, so that has to be done under the lock.  After
+        # that, the data is read at explicit offsets where possible, through
+        # a duplicate of the file descriptor that stays open after the file
+        # object is closed.
+        in_fd = None
+        with lock, dr.DROpenData(child, self.pvd.logical_block_size()) as (data_fp, data_len):
+            in_offset = data_fp.tell()
+            if not isinstance(data_fp, mmap.mmap):
+                try:
+                    in_fd = os.dup(data_fp.fileno())
+                except (AttributeError, io.UnsupportedOperation):
+                    pass
+        csum = None
+        if child.boot_info_table is not None and child.boot_info_table.csum is None:
+            csum = eltorito.EltoritoBootInfoTableChecksum()
+        try:
+            done = 0
+            while done < data_len:
+                readsize = min(blocksize, data_len - done)
+                if isinstance(data_fp, mmap.mmap):
+                    data = data_fp[in_offset + done:in_offset + done + readsize]
+                elif in_fd is not None:
+                    data = os.pread(in_fd, readsize, in_offset + done)
+                else:
+                    # Only file objects passed in by the user lack a
+                    # descriptor, and those are left open by DROpenData.
+                    with lock:
+                        data_fp.seek(in_offset + done)
+                        data = data_fp.read(readsize)
+                if len(data) != readsize:
+                    raise pycdlibexception.PyCdlibInternalError("Failed to read expected bytes")
+                if csum is not None:
+                    csum.update(data)
+                _pwrite_all(fd, data, offset + done)
+                done += readsize
+        finally:
+            if in_fd is not None:
+                os.close(in_fd)
+
         if child.boot_info_table is not None:
-            old = outfp.tell()
-            outfp.seek(tmp_start + 8)
-            self._outfp_write_with_check(outfp, child.boot_info_table.record())
-            outfp.seek(old)
-        return outfp.tell() - tmp_start
+            # The boot info table goes in at offset 8, over the top of the
+            # data that was just written.
+            if csum is not None:
+                child.boot_info_table.csum = csum.value()
+            header_len = min(data_len, 8)
+            _pwrite_all(fd, b'\x00' * (8 - header_len) + child.boot_info_table.record(),
+                        offset + header_len)
+            return max(data_len, 64)
+
+        return data_len
+
+    def _lay_out_directories(self, vd, layout, data_extents):
+        '''
+        Internal method to add the path tables, directory records, Rock Ridge
+        continuation entries and, optionally, the file data of a volume
+        descriptor to the layout of the ISO.  Each directory extent, path
+        table and continuation block is put together in memory so that it can
+        be written out all at once.
 
-    def _write_fp(self, outfp, blocksize=32768, progress_cb=None, progress_opaque=None):
+        Parameters:
+         vd - The volume descriptor to lay out.
+         layout - The list of (offset, data, record) tuples to add to.
+         data_extents - The set of extents whose file data is already in the
+                        layout, which is added to as more is laid out; or
+                        None to leave out the file data.
+        Returns:
+         Nothing.
+        '''
+        log_block_size = vd.logical_block_size()
+
+        # A mapping of continuation blocks to a list of the (offset, data)
+        # tuples of the entries in them.
+        ce_blocks = {}
+        ptrs = []
+        ptr_size = 0
+
+        dirs = collections.deque([vd.root_directory_record()])
+        while dirs:
+            curr = dirs.popleft()
+            if curr.is_dir():
+                ptrs.append(curr.ptr)
+                ptr_size += path_table_record.PathTableRecord.record_length(curr.ptr.len_di)
+
+            dir_data = bytearray(utils.ceiling_div(curr.data_length, log_block_size) * log_block_size)
+            dir_block_offset = 0
+            curr_dirrecord_offset = 0
+            for child in curr.children:
+                # No matter what type the child is, we need to first write out
+                # the directory record entry.
+                recstr = child.record()
+                if (curr_dirrecord_offset + len(recstr)) > log_block_size:
+                    dir_block_offset += log_block_size
+                    curr_dirrecord_offset = 0
+                    if dir_block_offset >= len(dir_data):
+                        dir_data.extend(bytearray(log_block_size))
+                start = dir_block_offset + curr_dirrecord_offset
+                dir_data[start:start + len(recstr)] = recstr
+                curr_dirrecord_offset += len(recstr)
+
+                if child.rock_ridge is not None and child.rock_ridge.dr_entries.ce_record is not None:
+                    # The child has a continue block, so write it out too.
+                    ce_rec = child.rock_ridge.dr_entries.ce_record
+                    ce_blocks.setdefault(ce_rec.bl_cont_area, []).append((ce_rec.offset_cont_area,
+                                                                          child.rock_ridge.record_ce_entries()))
+
+                if child.rock_ridge is not None and child.rock_ridge.child_link_record_exists():
+                    continue
+
+                matches_boot_catalog = self.eltorito_boot_catalog is not None and self.eltorito_boot_catalog.dirrecord is child
+                is_symlink = child.rock_ridge is not None and child.rock_ridge.is_symlink()
+                if child.is_dir():
+                    # If the child is a directory, and is not dot or dotdot, we
+                    # want to descend into it to look at the children.
+                    if not child.is_dot() and not child.is_dotdot():
+                        dirs.append(child)
+                elif data_extents is not None and child.data_length > 0 and child.target is None and not matches_boot_catalog and not is_symlink:
+                    # If the child is a file, then we need to write the
+                    # data to the output file.  Hard links share an extent,
+                    # so the data only goes out for the first of them.
+                    if child.extent_location() not in data_extents:
+                        data_extents.add(child.extent_location())
+                        layout.append((child.extent_location() * log_block_size, None, child))
+
+            layout.append((curr.extent_location() * log_block_size, dir_data, None))
+
+        # The Path Table Records, in the order the directories were found.
+        le_ptr_data = bytearray(ptr_size)
+        be_ptr_data = bytearray(ptr_size)
+        ptr_offset = 0
+        for ptr in ptrs:
+            ret = ptr.record_little_endian()
+            le_ptr_data[ptr_offset:ptr_offset + len(ret)] = ret
+            be_ptr_data[ptr_offset:ptr_offset + len(ret)] = ptr.record_big_endian()
+            ptr_offset += len(ret)
+        layout.append((vd.path_table_location_le * log_block_size, le_ptr_data, None))
+        layout.append((vd.path_table_location_be * log_block_size, be_ptr_data, None))
+
+        for block, entries in ce_blocks.items():
+            ce_data = bytearray(max([offset + len(rec) for (offset, rec) in entries]))
+            for (offset, rec) in entries:
+                ce_data[offset:offset + len(rec)] = rec
+            layout.append((block * log_block_size, ce_data, None))
+
+    def _write_fp(self, outfp, blocksize=32768, progress_cb=None, progress_opaque=None,
+                  workers=0, allocation='zeros'):
         '''
         Write a properly formatted ISO out to the file object passed in.  This
-        also goes by the name of "mastering".
+        also goes by the name of "mastering".  The whole layout of the ISO is
+        worked out first, and then everything is written out in order, so the
+        file object does not need to be seekable (unless there are workers).
 
         Parameters:
          outfp - The file object to write the data to.
@@ -1643,16 +3231,50 @@ class PyCdlib(object):
                        work.  The callback function must have a signature of:
                        def func(done, total).
          progress_opaque - User data to be passed to the progress callback.
+         workers - The number of threads to copy the data of the files with.
+         allocation - How to allocate the output; one of "zeros", "sparse"
+                      or "preallocate".
         Returns:
          Nothing.
         '''
         if hasattr(outfp, 'mode') and 'b' not in outfp.mode:
             raise pycdlibexception.PyCdlibInvalidInput("The file to write out must be in binary mode (add 'b' to the open flags)")
 
+        if allocation not in _ALLOCATIONS:
+            raise pycdlibexception.PyCdlibInvalidInput("Allocation must be one of %s" % (', '.join(_ALLOCATIONS)))
+
+        if allocation == 'preallocate' and not hasattr(os, 'posix_fallocate'):
+            raise pycdlibexception.PyCdlibInvalidInput("Preallocating the output is not supported on this platform")
+
+        if workers > 1:
+            if not hasattr(os, 'pwrite'):
+                raise pycdlibexception.PyCdlibInvalidInput("Writing with workers is not supported on this platform")
+            try:
+                os.lseek(outfp.fileno(), 0, os.SEEK_CUR)
+            except (AttributeError, IOError, OSError, ValueError):
+                raise pycdlibexception.PyCdlibInvalidInput("Writing with workers needs a seekable file object with a file descriptor")
+
         if self._needs_reshuffle:
             self._reshuffle_extents()
 
-        outfp.seek(0)
+        seekable = True
+        try:
+            outfp.seek(0)
+        except (AttributeError, IOError, OSError, ValueError):
+            # The file object isn't seekable (it may be a pipe, for instance),
+            # which is fine since everything is written out in order.
+            seekable = False
+            if allocation == 'sparse':
+                raise pycdlibexception.PyCdlibInvalidInput("Sparse output needs a seekable file object")
+
+        sparse = allocation == 'sparse'
+        if sparse:
+            # The holes have to read back as zeros, so nothing that was in the
+            # file object before can be left behind.
+            try:
+                outfp.truncate(0)
+            except (AttributeError, IOError, OSError, ValueError):
+                raise pycdlibexception.PyCdlibInvalidInput("Sparse output needs a file object that can be truncated")
 
         class Progress(object):
             '''
@@ -1685,193 +3307,152 @@ class PyCdlib(object):
                 # call, this works just fine.
                 self.call(self.total)
 
-        progress = Progress(self.pvd.space_size * self.pvd.logical_block_size())
+        log_block_size = self.pvd.logical_block_size()
+        iso_size = self.pvd.space_size * log_block_size
+
+        hybrid_padding = b''
+        if self.isohybrid_mbr is not None:
+            hybrid_padding = self.isohybrid_mbr.record_padding(iso_size)
+
+        if allocation == 'preallocate':
+            # Allocating the whole output up front keeps it from being
+            # fragmented as it is written out.
+            try:
+                outfp.flush()
+                os.posix_fallocate(outfp.fileno(), 0, iso_size + len(hybrid_padding))
+            except (AttributeError, io.UnsupportedOperation):
+                raise pycdlibexception.PyCdlibInvalidInput("Preallocating the output needs a file object with a file descriptor")
+
+        progress = Progress(iso_size)
         progress.call(0)
 
+        # The layout is a list of (offset, data, record) tuples, one for each
+        # piece of the ISO.  Either data is the string to write out at the
+        # offset, or record is the directory record whose file data goes
+        # there.
+        layout = []
+
         if self.isohybrid_mbr is not None:
-            self._outfp_write_with_check(outfp,
-                                         self.isohybrid_mbr.record(self.pvd.space_size * self.pvd.logical_block_size()))
+            layout.append((0, self.isohybrid_mbr.record(iso_size), None))
 
         # Ecma-119, 6.2.1 says that the Volume Space is divided into a System
         # Area and a Data Area, where the System Area is in logical sectors 0
         # to 15, and whose contents is not specified by the standard.  Thus
         # we skip the first 16 sectors.
-        outfp.seek(self.pvd.extent_location() * self.pvd.logical_block_size())
+        offset = self.pvd.extent_location() * log_block_size
 
-        # First write out the PVD.
+        # First the PVD.
         for pvd in self.pvds:
             rec = pvd.record()
-            self._outfp_write_with_check(outfp, rec)
-            progress.call(len(rec))
+            layout.append((offset, rec, None))
+            offset += len(rec)
 
-        # Next write out the boot records.
+        # Next the boot records.
         for br in self.brs:
-            outfp.seek(br.extent_location() * self.pvd.logical_block_size())
-            rec = br.record()
-            self._outfp_write_with_check(outfp, rec)
-            progress.call(len(rec))
+            layout.append((br.extent_location() * log_block_size, br.record(), None))
 
-        # Next we write out the SVDs.
+        # Next the SVDs.
         for svd in self.svds:
-            outfp.seek(svd.extent_location() * self.pvd.logical_block_size())
-            rec = svd.record()
-            self._outfp_write_with_check(outfp, rec)
-            progress.call(len(rec))
+            layout.append((svd.extent_location() * log_block_size, svd.record(), None))
 
-        # Next we write out the Volume Descriptor Terminators.
+        # Next the Volume Descriptor Terminators.
         for vdst in self.vdsts:
-            outfp.seek(vdst.extent_location() * self.pvd.logical_block_size())
-            rec = vdst.record()
-            self._outfp_write_with_check(outfp, rec)
-            progress.call(len(rec))
+            layout.append((vdst.extent_location() * log_block_size, vdst.record(), None))
 
-        # Next we write out the version block.
+        # Next the version block.
         # FIXME: In genisoimage, write.c:vers_write(), this "version descriptor"
         # is written out with the exact command line used to create the ISO
         # (if in debug mode, otherwise it is all zero).  However, there is no
         # mention of this in any of the specifications I've read so far.  Where
         # does it come from?
-        outfp.seek(self.version_vd.extent_location() * self.pvd.logical_block_size())
-        rec = self.version_vd.record(self.pvd.logical_block_size())
-        self._outfp_write_with_check(outfp, rec)
-        progress.call(len(rec))
-
-        # In theory, the Path Table Records (for both the PVD and SVD) get
-        # written out next.  Since we store them along with the Directory
-        # Records, however, we will write them out along with the directory
-        # records instead.
-
-        le_ptr_offset = 0
-        be_ptr_offset = 0
+        layout.append((self.version_vd.extent_location() * log_block_size,
+                       self.version_vd.record(log_block_size), None))
 
+        data_extents = set()
         if self.eltorito_boot_catalog is not None:
-            outfp.seek(self.eltorito_boot_catalog.extent_location() * self.pvd.logical_block_size())
-            rec = self.eltorito_boot_catalog.record()
-            self._outfp_write_with_check(outfp, rec)
-            progress.call(len(rec))
+            layout.append((self.eltorito_boot_catalog.extent_location() * log_block_size,
+                           self.eltorito_boot_catalog.record(), None))
 
-            if self.eltorito_boot_catalog.initial_entry.dirrecord.hidden:
+            initial_dirrecord = self.eltorito_boot_catalog.initial_entry.dirrecord
+            if initial_dirrecord.hidden:
                 # If the initial entry is hidden, we have to make sure to write
-                # it out, since it won't be done below.
-                progress.call(self._output_directory_record(outfp, blocksize,
-                                                            self.eltorito_boot_catalog.initial_entry.dirrecord))
-
-        # Now we need to write out the actual files.  Note that in many cases,
-        # we haven't yet read the file out of the original, so we need to do
-        # that here.
-        dirs = collections.deque([self.pvd.root_directory_record()])
-        while dirs:
-            curr = dirs.popleft()
-            curr_dirrecord_offset = 0
-            if curr.is_dir():
-                orig = outfp.tell()
-                # Little Endian PTR
-                outfp.seek(self.pvd.path_table_location_le * self.pvd.logical_block_size() + le_ptr_offset)
-                ret = curr.ptr.record_little_endian()
-                self._outfp_write_with_check(outfp, ret)
-                le_ptr_offset += len(ret)
-                # Big Endian PTR
-                outfp.seek(self.pvd.path_table_location_be * self.pvd.logical_block_size() + be_ptr_offset)
-                ret = curr.ptr.record_big_endian()
-                self._outfp_write_with_check(outfp, ret)
-                be_ptr_offset += len(ret)
-                outfp.seek(orig)
-                progress.call(curr.file_length())
-
-            dir_extent = curr.extent_location()
-            for child in curr.children:
-                # No matter what type the child is, we need to first write out
-                # the directory record entry.
-                recstr = child.record()
-                if (curr_dirrecord_offset + len(recstr)) > self.pvd.logical_block_size():
-                    dir_extent += 1
-                    curr_dirrecord_offset = 0
-                outfp.seek(dir_extent * self.pvd.logical_block_size() + curr_dirrecord_offset)
-                # Now write out the child
-                self._outfp_write_with_check(outfp, recstr)
-                curr_dirrecord_offset += len(recstr)
-
-                if child.rock_ridge is not None and child.rock_ridge.dr_entries.ce_record is not None:
-                    # The child has a continue block, so write it out here.
-                    ce_rec = child.rock_ridge.dr_entries.ce_record
-                    outfp.seek(ce_rec.bl_cont_area * self.pvd.logical_block_size() + ce_rec.offset_cont_area)
-                    rec = child.rock_ridge.record_ce_entries()
-                    self._outfp_write_with_check(outfp, rec)
-                    progress.call(len(rec))
-
-                if child.rock_ridge is not None and child.rock_ridge.child_link_record_exists():
-                    continue
-
-                matches_boot_catalog = self.eltorito_boot_catalog is not None and self.eltorito_boot_catalog.dirrecord == child
-                is_symlink = child.rock_ridge is not None and child.rock_ridge.is_symlink()
-                if child.is_dir():
-                    # If the child is a directory, and is not dot or dotdot, we
-                    # want to descend into it to look at the children.
-                    if not child.is_dot() and not child.is_dotdot():
-                        dirs.append(child)
-                elif child.data_length > 0 and child.target is None and not matches_boot_catalog and not is_symlink:
-                    # If the child is a file, then we need to write the
-                    # data to the output file.
-                    progress.call(self._output_directory_record(outfp, blocksize, child))
-
+                # it out, since it won't be found in the directory tree.
+                data_extents.add(initial_dirrecord.extent_location())
+                layout.append((initial_dirrecord.extent_location() * log_block_size,
+                               None, initial_dirrecord))
+
+        # Then the Path Table Records, the Directory Records and the files.
+        # Note that in many cases, we haven't yet read the file out of the
+        # original, so that will happen as it is written.
+        self._lay_out_directories(self.pvd, layout, data_extents)
         if self.joliet_vd is not None:
-            le_ptr_offset = 0
-            be_ptr_offset = 0
-            dirs = collections.deque([self.joliet_vd.root_directory_record()])
-            while dirs:
-                curr = dirs.popleft()
-                curr_dirrecord_offset = 0
-                if curr.is_dir():
-                    orig = outfp.tell()
-                    # Little Endian PTR
-                    outfp.seek(self.joliet_vd.path_table_location_le * self.joliet_vd.logical_block_size() + le_ptr_offset)
-                    ret = curr.ptr.record_little_endian()
-                    self._outfp_write_with_check(outfp, ret)
-                    le_ptr_offset += len(ret)
-                    # Big Endian PTR
-                    outfp.seek(self.joliet_vd.path_table_location_be * self.joliet_vd.logical_block_size() + be_ptr_offset)
-                    ret = curr.ptr.record_big_endian()
-                    self._outfp_write_with_check(outfp, ret)
-                    be_ptr_offset += len(ret)
-                    outfp.seek(orig)
-                    progress.call(curr.file_length())
-
-                dir_extent = curr.extent_location()
-                for child in curr.children:
-                    # No matter what type the child is, we need to first write
-                    # out the directory record entry.
-                    recstr = child.record()
-                    if (curr_dirrecord_offset + len(recstr)) > self.joliet_vd.logical_block_size():
-                        dir_extent += 1
-                        curr_dirrecord_offset = 0
-                    outfp.seek(dir_extent * self.joliet_vd.logical_block_size() + curr_dirrecord_offset)
-                    # Now write out the child
-                    self._outfp_write_with_check(outfp, recstr)
-                    curr_dirrecord_offset += len(recstr)
-
-                    if child.is_dir():
-                        # If the child is a directory, and is not dot or dotdot,
-                        # we want to descend into it to look at the children.
-                        if not child.is_dot() and not child.is_dotdot():
-                            dirs.append(child)
-
-        # We need to pad out to the total size of the disk, in the case that
-        # the last thing we wrote is shorter than a full block size.  We used
-        # to use the truncate method to do this, but it turns out that not all
-        # file-like objects allow you to use truncate to grow the file.  Thus,
-        # we do it the old-fashioned way by seeking to the end of the object,
-        # calculating the difference between the end and what we want, and then
-        # manually writing zeros for padding.
-        outfp.seek(0, os.SEEK_END)
-        self._outfp_write_with_check(outfp,
-                                     _pad(outfp.tell(), self.pvd.space_size * self.pvd.logical_block_size()))
+            self._lay_out_directories(self.joliet_vd, layout, None)
+
+        layout.sort(key=lambda piece: piece[0])
+
+        # With workers, everything is written at explicit offsets of the file
+        # descriptor, and the data of the files is copied by a pool of
+        # threads while the rest of the ISO is written out.
+        fd = None
+        pool = None
+        if workers > 1:
+            outfp.flush()
+            fd = outfp.fileno()
+            lock = threading.Lock()
+            pool = multiprocessing.pool.ThreadPool(workers)
+            results = []
 
-        if self.isohybrid_mbr is not None:
+        try:
+            offset = 0
+            for (piece_offset, data, child) in layout:
+                if piece_offset < offset:
+                    raise pycdlibexception.PyCdlibInternalError("Overlapping pieces of the ISO at offset %d" % (piece_offset))
+                if piece_offset > offset:
+                    offset = self._outfp_write_zeros(outfp, piece_offset - offset, offset, fd, sparse)
+                if child is None:
+                    offset = self._outfp_write_with_check(outfp, data, offset, fd)
+                    progress.call(len(data))
+                elif pool is None:
+                    offset = self._output_directory_record(outfp, blocksize, child, offset, seekable)
+                    progress.call(offset - piece_offset)
+                else:
+                    with lock:
+                        offset = self._data_piece_end(child, piece_offset)
+                    results.append(pool.apply_async(self._output_directory_record_at,
+                                                    (fd, blocksize, child, piece_offset, lock)))
+
+            # We need to pad out to the total size of the disk, in the case
+            # that the last thing we wrote is shorter than a full block size.
+            offset = self._outfp_write_zeros(outfp, iso_size - offset, offset, fd, sparse)
+
+            if pool is not None:
+                pool.close()
+                for result in results:
+                    progress.call(result.get())
+        finally:
+            if pool is not None:
+                pool.terminate()
+                pool.join()
+
+        if fd is not None:
+            outfp.seek(offset)
+
+        if sparse:
+            # Skipping over the zeros at the end doesn't make the file any
+            # bigger, so its final size has to be set.  Not every file object
+            # grows when truncated, so in that case the last byte is written.
+            size = iso_size + len(hybrid_padding)
+            outfp.truncate(size)
             outfp.seek(0, os.SEEK_END)
+            if outfp.tell() < size:
+                outfp.seek(size - 1)
+                outfp.write(b'\x00')
+            outfp.seek(size)
+        else:
             # Note that we very specifically do not call
             # self._outfp_write_with_check here because this writes outside
             # the PVD boundaries.
-            outfp.write(self.isohybrid_mbr.record_padding(self.pvd.space_size * self.pvd.logical_block_size()))
+            outfp.write(hybrid_padding)
 
         progress.finish()
 
@@ -2182,17 +3763,34 @@ class PyCdlib(object):
          iso_path - The path on the ISO to look up information for.
          joliet - Whether to look for the path in the Joliet portion of the ISO.
         Returns:
-         A dr.DirectoryRecord object representing the path.
+         A dr.DirectoryRecord object representing the path, or a
+         DirectoryEntry if the ISO was opened read-only.
         '''
+        self._check_namespace(joliet)
+
         if self._needs_reshuffle:
             self._reshuffle_extents()
 
+        if self._read_only:
+            if joliet:
+                vd = self.joliet_vd
+                encoding = 'utf-16_be'
+                iso_path = self._normalize_joliet_path(iso_path)
+            else:
+                vd = self.pvd
+                encoding = 'ascii'
+                iso_path = utils.normpath(iso_path)
+            index = self._dir_indexes[id(vd)]
+            return self._index_entry(index, index.find(iso_path, encoding), encoding)
+
         if joliet:
             joliet_path = self._normalize_joliet_path(iso_path)
-            rec, index_unused = _find_record(self.joliet_vd, joliet_path, 'utf-16_be')
+            rec, index_unused = _find_record(self.joliet_vd, joliet_path, 'utf-16_be',
+                                             self._parse_lazy_directory)
         else:
             iso_path = utils.normpath(iso_path)
-            rec, index_unused = _find_record(self.pvd, iso_path)
+            rec, index_unused = _find_record(self.pvd, iso_path, 'ascii',
+                                             self._parse_lazy_directory)
 
         return rec
 
@@ -2404,27 +4002,117 @@ class PyCdlib(object):
 
         self._initialized = True
 
-    def open(self, filename):
+    def open(self, filename, lazy=False, workers=0, cache_path=None,
+             validation='strict', read_only=False, limits=None,
+             namespaces=_NAMESPACES):
         '''
         Open up an existing ISO for inspection and modification.
 
         Parameters:
          filename - The filename containing the ISO to open up.
+         lazy - Whether to delay parsing directories until they are first used.
+                When True, only the volume descriptors, path tables and root
+                directory are parsed here; get_and_write, get_entry and
+                list_dir parse just the directories along the way, and any
+                modification or write parses the rest of the ISO first.  Note
+                that the children of a record returned by get_entry may not be
+                populated yet; use list_dir to walk directories.  The default
+                is False.
+         workers - The number of worker processes to decode the directory
+                   records of the ISO with.  Decoding is CPU bound, so on
+                   ISOs with many directories this makes opening scale with
+                   the number of cores.  The default of 0 (or 1) decodes the
+                   directories in this process.  This cannot be combined with
+                   lazy.
+         cache_path - The path to a metadata cache file for this ISO.  If the
+                      cache exists and was made from this exact ISO (as judged
+                      by its size, modification time, volume descriptors and
+                      path tables), the parsed directory trees, Rock Ridge and
+                      El Torito information are loaded from it instead of
+                      being parsed; otherwise the ISO is parsed and the cache
+                      is (re)written.  The cache is only written by non-lazy
+                      opens.  Since the cache is a pickle, it must be kept
+                      somewhere only trusted users can write to.  The default
+                      is None, for no cache.
+         validation - How thoroughly to check the ISO while parsing it.
+                      "strict" does every check, decoding the contents of
+                      every Rock Ridge entry (names, timestamps, symlinks,
+                      POSIX attributes and so on) while parsing unless lazy
+                      is True.  "standard" skips the checks that only
+                      compare redundant copies of data: the big-endian path
+                      tables are not read, and the big-endian fields of
+                      directory records are not compared to the
+                      little-endian ones.  It also leaves the contents of
+                      the Rock Ridge entries to be decoded, and checked, the
+                      first time they are used; only their framing is
+                      checked while parsing.  "trust" additionally skips
+                      the checks of directory padding, Rock Ridge version
+                      consistency and Rock Ridge continuation area overlaps,
+                      and does not work out the interchange level from the
+                      names on the ISO (level 3 is assumed instead); it is
+                      only meant for ISOs from a trusted source, such as ones
+                      written by PyCdlib itself.  The default is "strict".
+         read_only - Whether to open the ISO just for looking up and reading
+                     entries.  Instead of a tree of directory records, each
+                     directory tree is kept in a compact index of flat
+                     arrays, which takes a fraction of the memory on large
+                     ISOs.  get_entry and list_dir then return DirectoryEntry
+                     objects (whose Rock Ridge details are read back from the
+                     ISO as they are made), get_and_write, get_and_write_fp
+                     and iter_entries work as usual, and any modification or
+                     write raises an error.  This cannot be combined with
+                     lazy, workers or cache_path.  The default is False.
+         limits - A ParseLimits object bounding the work done parsing the
+                  ISO (the number of directory records, the directory depth,
+                  the size of Rock Ridge continuation areas, the amount of
+                  metadata read and the time taken); parsing stops with a
+                  PyCdlibInvalidISO as soon as one is exceeded.  Each later
+                  walk with iter_entries is held to the same limits.  This
+                  is meant for ISOs from untrusted sources, and cannot be
+                  combined with lazy or workers.  The default is None, for
+                  no limits.
+         namespaces - The namespaces of the ISO to parse; some of "iso9660"
+                      (the plain ISO9660 names), "rock_ridge" (the Rock Ridge
+                      extensions of the ISO9660 names) and "joliet".  Leaving
+                      out namespaces that will not be used saves parsing
+                      them: for instance, ("joliet",) only walks the Joliet
+                      directory tree, and ("iso9660", "rock_ridge") skips
+                      it.  Looking up a namespace that was left out (with
+                      get_entry, list_dir, iter_entries or get_and_write)
+                      raises an error, and so does any modification or
+                      write, since those need every namespace.  This cannot
+                      be combined with lazy, workers or cache_path.  The
+                      default is all of them.
         Returns:
          Nothing.
         '''
         if self._initialized:
             raise pycdlibexception.PyCdlibInvalidInput("This object already has an ISO; either close it or create a new object")
 
+        if workers > 1 and lazy:
+            raise pycdlibexception.PyCdlibInvalidInput("Directories cannot be both decoded by workers and parsed lazily")
+
+        if read_only and (lazy or workers > 1 or cache_path is not None):
+            raise pycdlibexception.PyCdlibInvalidInput("A read-only ISO cannot be parsed lazily, by workers or from a cache")
+
+        if validation not in _VALIDATION_LEVELS:
+            raise pycdlibexception.PyCdlibInvalidInput("Validation must be one of %s" % (', '.join(_VALIDATION_LEVELS)))
+
+        _check_parse_limits(limits, lazy or workers > 1)
+
+        _check_namespaces(namespaces, lazy or workers > 1 or cache_path is not None)
+
         fp = open(filename, 'r+b')
         self._managing_fp = True
         try:
-            self._open_fp(fp)
+            self._open_fp(fp, lazy, workers, filename, cache_path, validation,
+                          read_only, limits, namespaces)
         except:
             fp.close()
             raise
 
-    def open_fp(self, fp):
+    def open_fp(self, fp, lazy=False, validation='strict', read_only=False,
+                limits=None, namespaces=_NAMESPACES):
         '''
         Open up an existing ISO for inspection and modification.  Note that the
         file object passed in here must stay open for the lifetime of this
@@ -2434,13 +4122,105 @@ class PyCdlib(object):
 
         Parameters:
          fp - The file object containing the ISO to open up.
+         lazy - Whether to delay parsing directories until they are first used;
+                see open for details.  The default is False.
+         validation - How thoroughly to check the ISO while parsing it; see
+                      open for details.  The default is "strict".
+         read_only - Whether to open the ISO just for looking up and reading
+                     entries; see open for details.  The default is False.
+         limits - A ParseLimits object bounding the work done parsing the
+                  ISO; see open for details.  The default is None.
+         namespaces - The namespaces of the ISO to parse; see open for
+                      details.  The default is all of them.
+        Returns:
+         Nothing.
+        '''
+        if self._initialized:
+            raise pycdlibexception.PyCdlibInvalidInput("This object already has an ISO; either close it or create a new object")
+
+        if validation not in _VALIDATION_LEVELS:
+            raise pycdlibexception.PyCdlibInvalidInput("Validation must be one of %s" % (', '.join(_VALIDATION_LEVELS)))
+
+        if read_only and lazy:
+            raise pycdlibexception.PyCdlibInvalidInput("A read-only ISO cannot be parsed lazily, by workers or from a cache")
+
+        _check_parse_limits(limits, lazy)
+
+        _check_namespaces(namespaces, lazy)
+
+        self._open_fp(fp, lazy, validation=validation, read_only=read_only,
+                      limits=limits, namespaces=namespaces)
+
+    def open_mmap(self, filename, lazy=False, validation='strict', read_only=False,
+                  limits=None, namespaces=_NAMESPACES):
+        '''
+        Open up an existing ISO for inspection by memory-mapping it.  All of the
+        metadata parsing and file data reads are then done directly out of the
+        mapping instead of through read calls on a file object, and the pages
+        can be shared between processes that open the same ISO.  The mapping
+        is read-only, so modify_file_in_place cannot be used on an ISO opened
+        this way; every other operation (including writing out a modified
+        copy) works as with open.
+
+        Parameters:
+         filename - The filename containing the ISO to open up.
+         lazy - Whether to delay parsing directories until they are first used;
+                see open for details.  The default is False.
+         validation - How thoroughly to check the ISO while parsing it; see
+                      open for details.  The default is "strict".
+         read_only - Whether to open the ISO just for looking up and reading
+                     entries; see open for details.  The default is False.
+         limits - A ParseLimits object bounding the work done parsing the
+                  ISO; see open for details.  The default is None.
+         namespaces - The namespaces of the ISO to parse; see open for
+                      details.  The default is all of them.
         Returns:
          Nothing.
         '''
         if self._initialized:
             raise pycdlibexception.PyCdlibInvalidInput("This object already has an ISO; either close it or create a new object")
 
-        self._open_fp(fp)
+        if validation not in _VALIDATION_LEVELS:
+            raise pycdlibexception.PyCdlibInvalidInput("Validation must be one of %s" % (', '.join(_VALIDATION_LEVELS)))
+
+        if read_only and lazy:
+            raise pycdlibexception.PyCdlibInvalidInput("A read-only ISO cannot be parsed lazily, by workers or from a cache")
+
+        _check_parse_limits(limits, lazy)
+
+        _check_namespaces(namespaces, lazy)
+
+        # The mapping holds its own reference to the file, so the file object
+        # itself can be closed right away.
+        with open(filename, 'rb') as fp:
+            try:
+                mm = mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                # mmap refuses to map empty files.
+                raise pycdlibexception.PyCdlibInvalidISO("Failed to read entire volume descriptor")
+
+        self._managing_fp = True
+        try:
+            self._mmap_view = memoryview(mm)
+        except TypeError:
+            # Python 2 mmap objects don't support the new buffer protocol; in
+            # that case all reads go through the mmap file interface instead.
+            pass
+
+        try:
+            self._open_fp(mm, lazy, validation=validation, read_only=read_only,
+                          limits=limits, namespaces=namespaces)
+        except:
+            try:
+                if self._mmap_view is not None:
+                    self._mmap_view.release()
+                mm.close()
+            except BufferError:
+                # Views into the mapping may still be alive in the traceback;
+                # the mapping will be unmapped once they are gone.
+                pass
+            self._mmap_view = None
+            raise
 
     def get_and_write(self, iso_path, local_path, blocksize=8192):
         '''
@@ -2477,7 +4257,8 @@ class PyCdlib(object):
 
         self._get_and_write_fp(iso_path, outfp, blocksize)
 
-    def write(self, filename, blocksize=8192, progress_cb=None, progress_opaque=None):
+    def write(self, filename, blocksize=8192, progress_cb=None, progress_opaque=None,
+              workers=0, allocation='zeros'):
         '''
         Write a properly formatted ISO out to the filename passed in.  This
         also goes by the name of "mastering".
@@ -2489,19 +4270,37 @@ class PyCdlib(object):
                        work.  The callback function must have a signature of:
                        def func(done, total, opaque).
          progress_opaque - User data to be passed to the progress callback.
+         workers - The number of threads to copy the data of the files with.
+                   Each file is copied to its place in the ISO with positional
+                   reads and writes, so on fast storage the copies run
+                   side by side; the ISO written out is exactly the same.  The
+                   default of 0 (or 1) copies the files one at a time.
+         allocation - How to allocate the output file.  "zeros" writes out
+                      every byte of the ISO, including the zeros padding out
+                      the files and the rest of the volume.  "sparse" skips
+                      over those zeros instead, leaving holes in the file on
+                      filesystems that support them, which saves space on
+                      mostly empty ISOs.  "preallocate" allocates the whole
+                      file before writing it out, so that it is not
+                      fragmented.  The default is "zeros".
         Returns:
          Nothing.
         '''
         if not self._initialized:
             raise pycdlibexception.PyCdlibInvalidInput("This object is not yet initialized; call either open() or new() to create an ISO")
 
+        self._finish_lazy_parse()
+
         with open(filename, 'wb') as fp:
-            self._write_fp(fp, blocksize, progress_cb, progress_opaque)
+            self._write_fp(fp, blocksize, progress_cb, progress_opaque, workers,
+                           allocation)
 
-    def write_fp(self, outfp, blocksize=8192, progress_cb=None, progress_opaque=None):
+    def write_fp(self, outfp, blocksize=8192, progress_cb=None, progress_opaque=None,
+                 workers=0, allocation='zeros'):
         '''
         Write a properly formatted ISO out to the file object passed in.  This
-        also goes by the name of "mastering".
+        also goes by the name of "mastering".  Without workers, the ISO is
+        written out strictly in order, so the file object may be a pipe.
 
         Parameters:
          outfp - The file object to write the data to.
@@ -2510,13 +4309,25 @@ class PyCdlib(object):
                        work.  The callback function must have a signature of:
                        def func(done, total, opaque).
          progress_opaque - User data to be passed to the progress callback.
+         workers - The number of threads to copy the data of the files with;
+                   see write for details.  With more than 1, the file object
+                   must be a seekable file with a file descriptor.  The
+                   default is 0.
+         allocation - How to allocate the output; see write for details.
+                      "sparse" needs a seekable file object that can be
+                      truncated (anything already in it is thrown away), and
+                      "preallocate" needs one with a file descriptor.  The
+                      default is "zeros".
         Returns:
          Nothing.
         '''
         if not self._initialized:
             raise pycdlibexception.PyCdlibInvalidInput("This object is not yet initialized; call either open() or new() to create an ISO")
 
-        self._write_fp(outfp, blocksize, progress_cb, progress_opaque)
+        self._finish_lazy_parse()
+
+        self._write_fp(outfp, blocksize, progress_cb, progress_opaque, workers,
+                       allocation)
 
     def add_fp(self, fp, length, iso_path, rr_name=None, joliet_path=None):
         '''
@@ -2538,6 +4349,8 @@ class PyCdlib(object):
         if not self._initialized:
             raise pycdlibexception.PyCdlibInvalidInput("This object is not yet initialized; call either open() or new() to create an ISO")
 
+        self._finish_lazy_parse()
+
         self._add_fp(fp, length, False, iso_path, rr_name, joliet_path)
 
     def add_file(self, filename, iso_path, rr_name=None, joliet_path=None):
@@ -2557,6 +4370,8 @@ class PyCdlib(object):
         if not self._initialized:
             raise pycdlibexception.PyCdlibInvalidInput("This object is not yet initialized; call either open() or new() to create an ISO")
 
+        self._finish_lazy_parse()
+
         self._add_fp(filename, os.stat(filename).st_size, True, iso_path, rr_name, joliet_path)
 
     def modify_file_in_place(self, fp, length, iso_path, rr_name=None, joliet_path=None):
@@ -2592,6 +4407,11 @@ class PyCdlib(object):
         if not self._initialized:
             raise pycdlibexception.PyCdlibInvalidInput("This object is not yet initialized; call either open() or new() to create an ISO")
 
+        self._finish_lazy_parse()
+
+        if isinstance(self.cdfp, mmap.mmap):
+            raise pycdlibexception.PyCdlibInvalidInput("To modify a file in place, the original ISO must have been opened with open or open_fp, not open_mmap")
+
         if hasattr(self.cdfp, 'mode') and not self.cdfp.mode.startswith(('r+', 'w', 'a', 'rb+')):
             raise pycdlibexception.PyCdlibInvalidInput("To modify a file in place, the original ISO must have been opened in a write mode (r+, w, or a')")
 
@@ -2606,6 +4426,10 @@ class PyCdlib(object):
 
         child, index_unused = _find_record(self.pvd, iso_path)
 
+        # If this is a boot file, its Boot Info Table has to be found before
+        # the data it is recognized by is replaced.
+        child.resolve_boot_info_table()
+
         old_num_extents = utils.ceiling_div(child.file_length(), self.pvd.logical_block_size())
         new_num_extents = utils.ceiling_div(length, self.pvd.logical_block_size())
 
@@ -2659,7 +4483,7 @@ class PyCdlib(object):
         # Write out the actual file contents
         with dr.DROpenData(child, self.pvd.logical_block_size()) as (data_fp, data_len):
             self.cdfp.seek(child.extent_location() * self.pvd.logical_block_size())
-            utils.copy_data(data_len, self.pvd.logical_block_size(), data_fp, self.cdfp)
+            _copy_data(data_len, self.pvd.logical_block_size(), data_fp, self.cdfp)
             self.cdfp.write(_pad(data_len, self.pvd.logical_block_size()))
 
         # Finally write out the directory record entry.
@@ -2706,6 +4530,8 @@ class PyCdlib(object):
         if not self._initialized:
             raise pycdlibexception.PyCdlibInvalidInput("This object is not yet initialized; call either open() or new() to create an ISO")
 
+        self._finish_lazy_parse()
+
         self._add_hard_link(**kwargs)
 
     def rm_hard_link(self, iso_path=None, joliet_path=None):
@@ -2731,6 +4557,8 @@ class PyCdlib(object):
         if not self._initialized:
             raise pycdlibexception.PyCdlibInvalidInput("This object is not yet initialized; call either open() or new() to create an ISO")
 
+        self._finish_lazy_parse()
+
         if iso_path is not None and joliet_path is not None:
             raise pycdlibexception.PyCdlibInvalidInput("Only one of iso_path or joliet_path arguments can be passed")
 
@@ -2770,7 +4598,7 @@ class PyCdlib(object):
         # other references to this file on the ISO.
         links = len(rec.linked_records)
         if self.eltorito_boot_catalog is not None:
-            if self.eltorito_boot_catalog.dirrecord == rec and links == 0:
+            if self.eltorito_boot_catalog.dirrecord is rec and links == 0:
                 links += 1
                 newrec = dr.DirectoryRecord()
                 newrec.new_hidden_from_old(rec,
@@ -2779,7 +4607,7 @@ class PyCdlib(object):
                                            self.pvd.sequence_number())
                 self.eltorito_boot_catalog.dirrecord = newrec
 
-            if self.eltorito_boot_catalog.initial_entry.dirrecord == rec and links == 0:
+            if self.eltorito_boot_catalog.initial_entry.dirrecord is rec and links == 0:
                 links += 1
                 newrec = dr.DirectoryRecord()
                 newrec.new_hidden_from_old(rec,
@@ -2790,7 +4618,7 @@ class PyCdlib(object):
 
             for sec in self.eltorito_boot_catalog.sections:
                 for entry in sec.section_entries:
-                    if entry.dirrecord == rec and links == 0:
+                    if entry.dirrecord is rec and links == 0:
                         links += 1
                         newrec = dr.DirectoryRecord()
                         newrec.new_hidden_from_old(rec,
@@ -2829,6 +4657,8 @@ class PyCdlib(object):
         if not self._initialized:
             raise pycdlibexception.PyCdlibInvalidInput("This object is not yet initialized; call either open() or new() to create an ISO")
 
+        self._finish_lazy_parse()
+
         iso_path = utils.normpath(iso_path)
 
         rr_name = self._check_rr_name(rr_name)
@@ -2946,6 +4776,8 @@ class PyCdlib(object):
         if not self._initialized:
             raise pycdlibexception.PyCdlibInvalidInput("This object is not yet initialized; call either open() or new() to create an ISO")
 
+        self._finish_lazy_parse()
+
         joliet_path = self._normalize_joliet_path(joliet_path)
 
         self._add_joliet_dir(joliet_path)
@@ -2973,6 +4805,8 @@ class PyCdlib(object):
         if not self._initialized:
             raise pycdlibexception.PyCdlibInvalidInput("This object is not yet initialized; call either open() or new() to create an ISO")
 
+        self._finish_lazy_parse()
+
         iso_path = utils.normpath(iso_path)
 
         if bytes(bytearray([iso_path[0]])) != b'/':
@@ -3032,6 +4866,8 @@ class PyCdlib(object):
         if not self._initialized:
             raise pycdlibexception.PyCdlibInvalidInput("This object is not yet initialized; call either open() or new() to create an ISO")
 
+        self._finish_lazy_parse()
+
         iso_path = utils.normpath(iso_path)
 
         if iso_path == b'/':
@@ -3116,6 +4952,8 @@ class PyCdlib(object):
         if not self._initialized:
             raise pycdlibexception.PyCdlibInvalidInput("This object is not yet initialized; call either open() or new() to create an ISO")
 
+        self._finish_lazy_parse()
+
         joliet_path = self._normalize_joliet_path(joliet_path)
 
         self._rm_joliet_dir(joliet_path)
@@ -3165,6 +5003,8 @@ class PyCdlib(object):
         if not self._initialized:
             raise pycdlibexception.PyCdlibInvalidInput("This object is not yet initialized; call either open() or new() to create an ISO")
 
+        self._finish_lazy_parse()
+
         # In order to add an El Torito boot, we need to do the following:
         # 1.  Find the boot file record (which must already exist).
         # 2.  Construct a BootRecord.
@@ -3193,15 +5033,15 @@ class PyCdlib(object):
         if boot_info_table:
             orig_len = child.file_length()
             bi_table = eltorito.EltoritoBootInfoTable()
-            with dr.DROpenData(child, self.pvd.logical_block_size()) as (data_fp, data_len):
-                bi_table.new(self.pvd, child, orig_len,
-                             self._calculate_eltorito_boot_info_table_csum(data_fp, data_len))
+            # The checksum is calculated as the boot file is written out, so
+            # that the boot file only has to be read once.
+            bi_table.new(self.pvd, child, orig_len, None)
 
             child.add_boot_info_table(bi_table)
 
         system_type = 0
         if media_name == 'hdemul':
-            with dr.DROpenData(child, self.pvd.logical_block_size()) as (data_fp, data_len):
+            with dr.DROpenData(child, self.pvd.logical_block_size()) as (data_fp, data_len_unused):
                 disk_mbr = data_fp.read(512)
                 if len(disk_mbr) != 512:
                     raise pycdlibexception.PyCdlibInvalidInput("Could not read entire HD MBR, must be at least 512 bytes")
@@ -3282,6 +5122,8 @@ class PyCdlib(object):
         if not self._initialized:
             raise pycdlibexception.PyCdlibInvalidInput("This object is not yet initialized; call either open() or new() to create an ISO")
 
+        self._finish_lazy_parse()
+
         if self.eltorito_boot_catalog is None:
             raise pycdlibexception.PyCdlibInvalidInput("This ISO doesn't have an El Torito Boot Record")
 
@@ -3343,6 +5185,8 @@ class PyCdlib(object):
         if not self._initialized:
             raise pycdlibexception.PyCdlibInvalidInput("This object is not yet initialized; call either open() or new() to create an ISO")
 
+        self._finish_lazy_parse()
+
         if self.rock_ridge is None:
             raise pycdlibexception.PyCdlibInvalidInput("Can only add symlinks to a Rock Ridge ISO")
 
@@ -3390,18 +5234,26 @@ class PyCdlib(object):
          iso_path - The path on the ISO to look up information for.
          joliet - Whether to look for the path in the Joliet portion of the ISO.
         Yields:
-         Children of this path.
+         Children of this path.  If the ISO was opened read-only, these are
+         DirectoryEntry objects, and the "." and ".." entries are left out.
         Returns:
          Nothing.
         '''
         if not self._initialized:
             raise pycdlibexception.PyCdlibInvalidInput("This object is not yet initialized; call either open() or new() to create an ISO")
 
+        if self._read_only:
+            for entry in self._list_index_dir(iso_path, joliet):
+                yield entry
+            return
+
         rec = self._get_entry(iso_path, joliet)
 
         if not rec.is_dir():
             raise pycdlibexception.PyCdlibInvalidInput("Record is not a directory!")
 
+        self._parse_lazy_directory(rec)
+
         for index, child in enumerate(rec.children):
             # Check to see if the filename of this child is the same as the
             # last one, and if so, skip the child.  This can happen if we
@@ -3411,20 +5263,178 @@ class PyCdlib(object):
 
             if child.rock_ridge is not None and child.rock_ridge.child_link_record_exists():
                 # If this is the case, this is a relocated entry.  We actually
-                # want to go find the entry this was relocated to; we do that
-                # by following the child_link, then going up to the parent and
-                # finding the entry that links to the same one as this one.
-                cl_parent = child.rock_ridge.cl_to_moved_dr.parent
-                for cl_child in cl_parent.children:
-                    if cl_child.rock_ridge.name() == child.rock_ridge.name():
-                        child = cl_child
-                        break
-                # If we ended up not finding the right one in the parent of the
-                # moved entry, weird, but just return the one we would have
-                # anyway.
+                # want to return the entry this was relocated to, which the
+                # child link points straight at.
+                moved = child.rock_ridge.cl_to_moved_dr
+                if moved.rock_ridge is not None and moved.rock_ridge.name() == child.rock_ridge.name():
+                    child = moved
+                # If the moved entry has a different name, weird, but just
+                # return the one we would have anyway.
 
             yield child
 
+    def _list_index_dir(self, iso_path, joliet):
+        '''
+        An internal method to generate the entries of a directory on an ISO
+        that was opened read-only; see list_dir.
+
+        Parameters:
+         iso_path - The path on the ISO to look up information for.
+         joliet - Whether to look for the path in the Joliet portion of the ISO.
+        Yields:
+         A DirectoryEntry for each child of this path.
+        Returns:
+         Nothing.
+        '''
+        self._check_namespace(joliet)
+
+        if joliet:
+            vd = self.joliet_vd
+            encoding = 'utf-16_be'
+            iso_path = self._normalize_joliet_path(iso_path)
+        else:
+            vd = self.pvd
+            encoding = 'ascii'
+            iso_path = utils.normpath(iso_path)
+
+        index = self._dir_indexes[id(vd)]
+        dir_entry = index.find(iso_path, encoding)
+        if not index.is_dir(dir_entry):
+            raise pycdlibexception.PyCdlibInvalidInput("Record is not a directory!")
+
+        for child in index.children(dir_entry):
+            if child in index.child_links:
+                # This is a relocated entry; return the entry it was
+                # relocated to, as long as the names match.
+                moved = index.child_links[child]
+                if index.rr_name(moved) == index.rr_name(child):
+                    child = moved
+            yield self._index_entry(index, child, encoding)
+
+    def iter_entries(self, joliet=False):
+        '''
+        Generate a description of every file and directory on the ISO, for
+        jobs that just need to look at each entry once.  The directories are
+        read straight from the ISO in path table order, one at a time, and the
+        entries are not linked into the directory tree (nor kept alive by it),
+        so the memory used stays about the same no matter how large the ISO is.
+        To avoid building the tree at all, open the ISO with lazy=True first.
+
+        The entries describe the ISO as it was opened; changes made since
+        then are not reflected.  Paths are ISO9660 (or Joliet) paths, so
+        directories relocated by Rock Ridge show up where they are actually
+        recorded.  Files that span multiple directory records are yielded
+        once, with the size of all of the sections added up.  If the ISO was
+        opened with limits, each walk is held to them too, with its own count
+        of the work done and its own deadline.
+
+        Parameters:
+         joliet - Whether to walk the Joliet portion of the ISO instead of the
+                  ISO9660 portion.
+        Yields:
+         A DirectoryEntry for each file and directory (other than the root, and
+         the "." and ".." entries).
+        Returns:
+         Nothing.
+        '''
+        if not self._initialized:
+            raise pycdlibexception.PyCdlibInvalidInput("This object is not yet initialized; call either open() or new() to create an ISO")
+
+        if self.cdfp is None:
+            raise pycdlibexception.PyCdlibInvalidInput("Entries can only be iterated on an ISO that was opened")
+
+        self._check_namespace(joliet)
+
+        if joliet:
+            if self.joliet_vd is None:
+                raise pycdlibexception.PyCdlibInvalidInput("Cannot iterate Joliet entries on a non-Joliet ISO")
+            vd = self.joliet_vd
+            encoding = 'utf-16_be'
+        else:
+            vd = self.pvd
+            encoding = 'ascii'
+
+        log_block_size = self.pvd.logical_block_size()
+        block_size = vd.logical_block_size()
+        check_endian = self._validation == 'strict'
+        check_padding = self._validation != 'trust'
+        bytes_to_skip = self._root_rr_bytes_to_skip(vd)
+        root_parent = _DetachedParent(bytes_to_skip, True)
+        detached = _DetachedParent(bytes_to_skip)
+
+        # The budget of the open is gone by now, so each walk gets a fresh one
+        # under the same limits.
+        budget = None
+        if self._limits is not None:
+            budget = _ParseBudget(self._limits)
+            budget.add_read(vd.path_table_size())
+
+        def budgeted_read_at(offset, length):
+            '''
+            Read metadata from the ISO, accounting for it in the budget.
+            '''
+            budget.add_read(length)
+            return self._read_at(offset, length)
+
+        read_at = self._read_at if budget is None else budgeted_read_at
+
+        ptrs, extent_to_ptr_unused = self._parse_path_table(vd.path_table_size(),
+                                                            vd.path_table_location_le)
+        paths = []
+        depths = []
+        for index, ptr in enumerate(ptrs):
+            if index == 0:
+                dir_path = ''
+                depth = 1
+                parent = root_parent
+            else:
+                if ptr.parent_directory_num < 1 or ptr.parent_directory_num > index:
+                    raise pycdlibexception.PyCdlibInvalidISO("Invalid parent directory number in path table")
+                dir_path = paths[ptr.parent_directory_num - 1] + '/' + ptr.directory_identifier.decode(encoding)
+                depth = depths[ptr.parent_directory_num - 1] + 1
+                parent = detached
+            paths.append(dir_path)
+            depths.append(depth)
+            if budget is not None:
+                budget.check_depth(depth)
+
+            # The length of the directory comes from its own "." record, which
+            # is at the start of the first block.
+            offset = ptr.extent_location * log_block_size
+            data = read_at(offset, log_block_size)
+            if len(data) < 14:
+                raise pycdlibexception.PyCdlibInvalidISO("Not enough data for the next directory record")
+            (length,) = struct.unpack_from("=L", data, 10)
+            if length > len(data):
+                data = memoryview(data).tobytes() + memoryview(read_at(offset + len(data), length - len(data))).tobytes()
+
+            # Each directory gets its own continuation area reader, so that
+            # the blocks it reads are dropped along with the directory.
+            ce_reader = _ContinuationReader(read_at, log_block_size)
+            last = None
+            last_ident = None
+            for record in _parse_directory_records(data, length, block_size,
+                                                   parent, None, ce_reader,
+                                                   check_endian, check_padding,
+                                                   budget=budget,
+                                                   parse_rr='rock_ridge' in self._namespaces,
+                                                   lazy_rr=self._validation != 'strict'):
+                if record.is_dot() or record.is_dotdot():
+                    continue
+                if last is not None and not record.is_dir() and record.file_identifier() == last_ident:
+                    # Another section of a file with more than one directory
+                    # record.
+                    last.size += record.data_length
+                    continue
+                if last is not None:
+                    yield last
+                last_ident = record.file_identifier()
+                last = DirectoryEntry(dir_path + '/' + last_ident.decode(encoding),
+                                      record.extent_location(), record.data_length,
+                                      record.is_dir(), record.rock_ridge)
+            if last is not None:
+                yield last
+
     def get_entry(self, iso_path, joliet=False):
         '''
         Get the directory record for a particular path.
@@ -3433,7 +5443,8 @@ class PyCdlib(object):
          iso_path - The path on the ISO to look up information for.
          joliet - Whether to look for the path in the Joliet portion of the ISO.
         Returns:
-         A dr.DirectoryRecord object representing the path.
+         A dr.DirectoryRecord object representing the path, or a
+         DirectoryEntry if the ISO was opened read-only.
         '''
         if not self._initialized:
             raise pycdlibexception.PyCdlibInvalidInput("This object is not yet initialized; call either open() or new() to create an ISO")
@@ -3465,6 +5476,8 @@ class PyCdlib(object):
         if not self._initialized:
             raise pycdlibexception.PyCdlibInvalidInput("This object is not yet initialized; call either open() or new() to create an ISO")
 
+        self._finish_lazy_parse()
+
         if self.eltorito_boot_catalog is None:
             raise pycdlibexception.PyCdlibInvalidInput("The ISO must have an El Torito Boot Record to add isohybrid support")
 
@@ -3541,6 +5554,8 @@ class PyCdlib(object):
         if not self._initialized:
             raise pycdlibexception.PyCdlibInvalidInput("This object is not yet initialized; call either open() or new() to create an ISO")
 
+        self._finish_lazy_parse()
+
         for pvd in self.pvds:
             pvd.add_to_space_size(pvd.logical_block_size())
 
@@ -3570,6 +5585,8 @@ class PyCdlib(object):
         if not self._initialized:
             raise pycdlibexception.PyCdlibInvalidInput("This object is not yet initialized; call either open() or new() to create an ISO")
 
+        self._finish_lazy_parse()
+
         iso_path = utils.normpath(iso_path)
         rec, index_unused = _find_record(self.pvd, iso_path)
 
@@ -3589,6 +5606,8 @@ class PyCdlib(object):
         if not self._initialized:
             raise pycdlibexception.PyCdlibInvalidInput("This object is not yet initialized; call either open() or new() to create an ISO")
 
+        self._finish_lazy_parse()
+
         iso_path = utils.normpath(iso_path)
         rec, index_unused = _find_record(self.pvd, iso_path)
 
@@ -3611,6 +5630,8 @@ class PyCdlib(object):
         if not self._initialized:
             raise pycdlibexception.PyCdlibInvalidInput("This object is not yet initialized; call either open() or new() to create an ISO")
 
+        self._finish_lazy_parse()
+
         self._reshuffle_extents()
 
     def set_relocated_name(self, name, rr_name):
@@ -3628,6 +5649,8 @@ class PyCdlib(object):
         if not self._initialized:
             raise pycdlibexception.PyCdlibInvalidInput("This object is not yet initialized; call either open() or new() to create an ISO")
 
+        self._finish_lazy_parse()
+
         if self.rock_ridge is None:
             raise pycdlibexception.PyCdlibInvalidInput("Can only set the relocated name on a Rock Ridge ISO")
 
@@ -3658,6 +5681,8 @@ class PyCdlib(object):
 
         if self._managing_fp:
             # In this case, we are managing self.cdfp, so we need to close it
+            if self._mmap_view is not None:
+                self._mmap_view.release()
             self.cdfp.close()
 
         # now that we are closed, re-initialize everything
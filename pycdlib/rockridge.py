@@ -36,6 +36,8 @@ class RRSPRecord(object):
     indicates that the sharing protocol is in use, and how many bytes to skip
     prior to parsing a Rock Ridge entry out of a directory record.
     '''
+    __slots__ = ('_initialized', 'bytes_to_skip')
+
     def __init__(self):
         self._initialized = False
 
@@ -52,7 +54,7 @@ class RRSPRecord(object):
             raise pycdlibexception.PyCdlibInternalError("SP record already initialized!")
 
         (su_len, su_entry_version_unused, check_byte1, check_byte2,
-         self.bytes_to_skip) = struct.unpack_from("=BBBBB", rrstr[:7], 2)
+         self.bytes_to_skip) = struct.unpack_from("=BBBBB", rrstr, 2)
 
         # We assume that the caller has already checked the su_entry_version,
         # so we don't bother.
@@ -112,6 +114,8 @@ class RRRRRecord(object):
     A class that represents a Rock Ridge Rock Ridge record.  This optional
     record indicates which other Rock Ridge fields are present.
     '''
+    __slots__ = ('_initialized', 'rr_flags')
+
     def __init__(self):
         self.rr_flags = None
         self._initialized = False
@@ -129,7 +133,7 @@ class RRRRRecord(object):
             raise pycdlibexception.PyCdlibInternalError("RR record already initialized!")
 
         (su_len, su_entry_version_unused, self.rr_flags) = struct.unpack_from("=BBB",
-                                                                              rrstr[:5], 2)
+                                                                              rrstr, 2)
 
         # We assume that the caller has already checked the su_entry_version,
         # so we don't bother.
@@ -222,6 +226,9 @@ class RRCERecord(object):
     record represents additional information that did not fit in the standard
     directory record.
     '''
+    __slots__ = ('_initialized', 'bl_cont_area', 'len_cont_area',
+                 'offset_cont_area')
+
     def __init__(self):
         self._initialized = False
 
@@ -240,7 +247,7 @@ class RRCERecord(object):
 
         (su_len, su_entry_version_unused, bl_cont_area_le, bl_cont_area_be,
          offset_cont_area_le, offset_cont_area_be,
-         len_cont_area_le, len_cont_area_be) = struct.unpack_from("=BBLLLLLL", rrstr[:28], 2)
+         len_cont_area_le, len_cont_area_be) = struct.unpack_from("=BBLLLLLL", rrstr, 2)
 
         # We assume that the caller has already checked the su_entry_version,
         # so we don't bother.
@@ -366,6 +373,9 @@ class RRPXRecord(object):
     record contains information about the POSIX file mode, file links,
     user ID, group ID, and serial number of a directory record.
     '''
+    __slots__ = ('_initialized', 'posix_file_links', 'posix_file_mode',
+                 'posix_group_id', 'posix_serial_number', 'posix_user_id')
+
     def __init__(self):
         self.posix_file_mode = None
         self.posix_file_links = None
@@ -390,7 +400,7 @@ class RRPXRecord(object):
         (su_len, su_entry_version_unused, posix_file_mode_le, posix_file_mode_be,
          posix_file_links_le, posix_file_links_be, posix_file_user_id_le,
          posix_file_user_id_be, posix_file_group_id_le,
-         posix_file_group_id_be) = struct.unpack_from("=BBLLLLLLLL", rrstr[:38], 2)
+         posix_file_group_id_be) = struct.unpack_from("=BBLLLLLLLL", rrstr, 2)
 
         # We assume that the caller has already checked the su_entry_version,
         # so we don't bother.
@@ -415,7 +425,7 @@ class RRPXRecord(object):
         elif su_len == 44:
             (posix_file_serial_number_le,
              posix_file_serial_number_be) = struct.unpack_from("=LL",
-                                                               rrstr[:44], 36)
+                                                               rrstr, 36)
             if posix_file_serial_number_le != utils.swab_32bit(posix_file_serial_number_be):
                 raise pycdlibexception.PyCdlibInvalidISO("PX record big and little-endian file serial number do not agree")
 
@@ -433,6 +443,25 @@ class RRPXRecord(object):
 
         return rr_version
 
+    @staticmethod
+    def version_from_length(su_len):
+        '''
+        A static method to determine the Rock Ridge version from the length of
+        a PX record.
+
+        Parameters:
+         su_len - The length of the PX record.
+        Returns:
+         A string representing the RR version, either 1.09 or 1.12.
+        '''
+        # In Rock Ridge 1.09, the su_len here should be 36, while for
+        # 1.12, the su_len here should be 44.
+        if su_len == 36:
+            return "1.09"
+        elif su_len == 44:
+            return "1.12"
+        raise pycdlibexception.PyCdlibInvalidISO("Invalid length on rock ridge extension")
+
     def new(self, isdir, symlink_path):
         '''
         Create a new Rock Ridge POSIX File Attributes record.
@@ -515,6 +544,8 @@ class RRERRecord(object):
     '''
     A class that represents a Rock Ridge Extensions Reference record.
     '''
+    __slots__ = ('_initialized', 'ext_des', 'ext_id', 'ext_src', 'ext_ver')
+
     def __init__(self):
         self.ext_id = None
         self.ext_des = None
@@ -534,7 +565,7 @@ class RRERRecord(object):
             raise pycdlibexception.PyCdlibInternalError("ER record already initialized!")
 
         (su_len, su_entry_version_unused, len_id, len_des, len_src,
-         self.ext_ver) = struct.unpack_from("=BBBBBB", rrstr[:8], 2)
+         self.ext_ver) = struct.unpack_from("=BBBBBB", rrstr, 2)
 
         # We assume that the caller has already checked the su_entry_version,
         # so we don't bother.
@@ -610,6 +641,8 @@ class RRESRecord(object):
     '''
     A class that represents a Rock Ridge Extension Selector record.
     '''
+    __slots__ = ('_initialized', 'extension_sequence')
+
     def __init__(self):
         self.extension_sequence = None
         self._initialized = False
@@ -629,7 +662,7 @@ class RRESRecord(object):
         # We assume that the caller has already checked the su_entry_version,
         # so we don't bother.
 
-        (su_len, su_entry_version_unused, self.extension_sequence) = struct.unpack_from("=BBB", rrstr[:5], 2)
+        (su_len, su_entry_version_unused, self.extension_sequence) = struct.unpack_from("=BBB", rrstr, 2)
         if su_len != RRESRecord.length():
             raise pycdlibexception.PyCdlibInvalidISO("Invalid length on rock ridge extension")
 
@@ -683,6 +716,8 @@ class RRPNRecord(object):
     A class that represents a Rock Ridge POSIX Device Number record.  This
     record represents a device major and minor special file.
     '''
+    __slots__ = ('_initialized', 'dev_t_high', 'dev_t_low')
+
     def __init__(self):
         self.dev_t_high = None
         self.dev_t_low = None
@@ -701,7 +736,7 @@ class RRPNRecord(object):
             raise pycdlibexception.PyCdlibInternalError("PN record already initialized!")
 
         (su_len, su_entry_version_unused, dev_t_high_le, dev_t_high_be,
-         dev_t_low_le, dev_t_low_be) = struct.unpack_from("=BBLLLL", rrstr[:20], 2)
+         dev_t_low_le, dev_t_low_be) = struct.unpack_from("=BBLLLL", rrstr, 2)
 
         # We assume that the caller has already checked the su_entry_version,
         # so we don't bother.
@@ -775,10 +810,14 @@ class RRSLRecord(object):
     component entry, and individual components may be split across multiple
     Symbolic Link records.  This class takes care of all of those details.
     '''
+    __slots__ = ('_initialized', 'flags', 'symlink_components')
+
     class Component(object):
         '''
         A class that represents one component of a Symbolic Link Record.
         '''
+        __slots__ = ('curr_length', 'data', 'flags')
+
         def __init__(self, flags, length, data, last_continued):
             if flags not in [0, 1, 2, 4, 8]:
                 raise pycdlibexception.PyCdlibInternalError("Invalid Rock Ridge symlink flags 0x%x" % (flags))
@@ -855,6 +894,11 @@ class RRSLRecord(object):
             '''
             self.flags |= (1 << 0)
 
+        def __reduce__(self):
+            # Python 2 can only pickle classes found at the top level of a
+            # module, so components are rebuilt through a function instead.
+            return (_new_sl_component, (self.flags, self.curr_length, self.data))
+
         def __eq__(self, other):
             return self.flags == other.flags and self.curr_length == other.curr_length and self.data == other.data
 
@@ -931,7 +975,7 @@ class RRSLRecord(object):
         if self._initialized:
             raise pycdlibexception.PyCdlibInternalError("SL record already initialized!")
 
-        (su_len, su_entry_version_unused, self.flags) = struct.unpack_from("=BBB", rrstr[:5], 2)
+        (su_len, su_entry_version_unused, self.flags) = struct.unpack_from("=BBB", rrstr, 2)
 
         # We assume that the caller has already checked the su_entry_version,
         # so we don't bother.
@@ -939,12 +983,12 @@ class RRSLRecord(object):
         cr_offset = 5
         data_len = su_len - 5
         while data_len > 0:
-            (cr_flags, len_cp) = struct.unpack_from("=BB", rrstr[:cr_offset + 2], cr_offset)
+            (cr_flags, len_cp) = struct.unpack_from("=BB", rrstr, cr_offset)
 
             data_len -= 2
             cr_offset += 2
 
-            self.symlink_components.append(self.Component(cr_flags, len_cp, rrstr[cr_offset:cr_offset + len_cp], previous_continued))
+            self.symlink_components.append(self.Component(cr_flags, len_cp, rrstr[cr_offset:cr_offset + len_cp].tobytes(), previous_continued))
 
             previous_continued = self.symlink_components[-1].is_continued()
 
@@ -1142,10 +1186,27 @@ class RRSLRecord(object):
         return length
 
 
+def _new_sl_component(flags, length, data):
+    '''
+    An internal function to make a Symbolic Link Record component when
+    unpickling one.
+
+    Parameters:
+     flags - The flags of the component.
+     length - The length of the component.
+     data - The data of the component.
+    Returns:
+     The new RRSLRecord.Component.
+    '''
+    return RRSLRecord.Component(flags, length, data, False)
+
+
 class RRNMRecord(object):
     '''
     A class that represents a Rock Ridge Alternate Name record.
     '''
+    __slots__ = ('_initialized', 'posix_name', 'posix_name_flags')
+
     def __init__(self):
         self._initialized = False
         self.posix_name_flags = None
@@ -1163,7 +1224,7 @@ class RRNMRecord(object):
         if self._initialized:
             raise pycdlibexception.PyCdlibInternalError("NM record already initialized!")
 
-        (su_len, su_entry_version_unused, self.posix_name_flags) = struct.unpack_from("=BBB", rrstr[:5], 2)
+        (su_len, su_entry_version_unused, self.posix_name_flags) = struct.unpack_from("=BBB", rrstr, 2)
 
         # We assume that the caller has already checked the su_entry_version,
         # so we don't bother.
@@ -1175,7 +1236,7 @@ class RRNMRecord(object):
         if name_len != 0:
             if (self.posix_name_flags & (1 << 1)) or (self.posix_name_flags & (1 << 2)) or (self.posix_name_flags & (1 << 5)):
                 raise pycdlibexception.PyCdlibInvalidISO("Invalid name in Rock Ridge NM entry (0x%x %d)" % (self.posix_name_flags, name_len))
-            self.posix_name += rrstr[5:5 + name_len]
+            self.posix_name += rrstr[5:5 + name_len].tobytes()
 
         self._initialized = True
 
@@ -1244,6 +1305,8 @@ class RRCLRecord(object):
     represents the logical block where a deeply nested directory was relocated
     to.
     '''
+    __slots__ = ('_initialized', 'child_log_block_num')
+
     def __init__(self):
         self.child_log_block_num = None
         self._initialized = False
@@ -1263,7 +1326,7 @@ class RRCLRecord(object):
         # We assume that the caller has already checked the su_entry_version,
         # so we don't bother.
 
-        (su_len, su_entry_version_unused, child_log_block_num_le, child_log_block_num_be) = struct.unpack_from("=BBLL", rrstr[:12], 2)
+        (su_len, su_entry_version_unused, child_log_block_num_le, child_log_block_num_be) = struct.unpack_from("=BBLL", rrstr, 2)
         if su_len != RRCLRecord.length():
             raise pycdlibexception.PyCdlibInvalidISO("Invalid length on rock ridge extension")
 
@@ -1337,6 +1400,8 @@ class RRPLRecord(object):
     represents the logical block where a deeply nested directory was located
     from.
     '''
+    __slots__ = ('_initialized', 'parent_log_block_num')
+
     def __init__(self):
         self.parent_log_block_num = None
         self._initialized = False
@@ -1356,7 +1421,7 @@ class RRPLRecord(object):
         # We assume that the caller has already checked the su_entry_version,
         # so we don't bother.
 
-        (su_len, su_entry_version_unused, parent_log_block_num_le, parent_log_block_num_be) = struct.unpack_from("=BBLL", rrstr[:12], 2)
+        (su_len, su_entry_version_unused, parent_log_block_num_le, parent_log_block_num_be) = struct.unpack_from("=BBLL", rrstr, 2)
         if su_len != RRPLRecord.length():
             raise pycdlibexception.PyCdlibInvalidISO("Invalid length on rock ridge extension")
         if parent_log_block_num_le != utils.swab_32bit(parent_log_block_num_be):
@@ -1433,6 +1498,10 @@ class RRTFRecord(object):
     Additionally, the timestamps can be configured to be Directory Record
     style timestamps (7 bytes) or Volume Descriptor style timestamps (17 bytes).
     '''
+    __slots__ = ('_initialized', 'access_time', 'attribute_change_time',
+                 'backup_time', 'creation_time', 'effective_time',
+                 'expiration_time', 'modification_time', 'time_flags')
+
     def __init__(self):
         self.creation_time = None
         self.access_time = None
@@ -1459,7 +1528,7 @@ class RRTFRecord(object):
         # We assume that the caller has already checked the su_entry_version,
         # so we don't bother.
 
-        (su_len, su_entry_version_unused, self.time_flags,) = struct.unpack_from("=BBB", rrstr[:5], 2)
+        (su_len, su_entry_version_unused, self.time_flags,) = struct.unpack_from("=BBB", rrstr, 2)
         if su_len < 5:
             raise pycdlibexception.PyCdlibInvalidISO("Not enough bytes in the TF record")
 
@@ -1471,31 +1540,31 @@ class RRTFRecord(object):
         tmp = 5
         if self.time_flags & (1 << 0):
             self.creation_time = datetype()
-            self.creation_time.parse(rrstr[tmp:tmp + tflen])
+            self.creation_time.parse(rrstr[tmp:tmp + tflen].tobytes())
             tmp += tflen
         if self.time_flags & (1 << 1):
             self.access_time = datetype()
-            self.access_time.parse(rrstr[tmp:tmp + tflen])
+            self.access_time.parse(rrstr[tmp:tmp + tflen].tobytes())
             tmp += tflen
         if self.time_flags & (1 << 2):
             self.modification_time = datetype()
-            self.modification_time.parse(rrstr[tmp:tmp + tflen])
+            self.modification_time.parse(rrstr[tmp:tmp + tflen].tobytes())
             tmp += tflen
         if self.time_flags & (1 << 3):
             self.attribute_change_time = datetype()
-            self.attribute_change_time.parse(rrstr[tmp:tmp + tflen])
+            self.attribute_change_time.parse(rrstr[tmp:tmp + tflen].tobytes())
             tmp += tflen
         if self.time_flags & (1 << 4):
             self.backup_time = datetype()
-            self.backup_time.parse(rrstr[tmp:tmp + tflen])
+            self.backup_time.parse(rrstr[tmp:tmp + tflen].tobytes())
             tmp += tflen
         if self.time_flags & (1 << 5):
             self.expiration_time = datetype()
-            self.expiration_time.parse(rrstr[tmp:tmp + tflen])
+            self.expiration_time.parse(rrstr[tmp:tmp + tflen].tobytes())
             tmp += tflen
         if self.time_flags & (1 << 6):
             self.effective_time = datetype()
-            self.effective_time.parse(rrstr[tmp:tmp + tflen])
+            self.effective_time.parse(rrstr[tmp:tmp + tflen].tobytes())
             tmp += tflen
 
         self._initialized = True
@@ -1599,6 +1668,9 @@ class RRSFRecord(object):
     A class that represents a Rock Ridge Sparse File record.  This record
     represents the full file size of a sparsely-populated file.
     '''
+    __slots__ = ('_initialized', 'table_depth', 'virtual_file_size_high',
+                 'virtual_file_size_low')
+
     def __init__(self):
         self._initialized = False
 
@@ -1619,7 +1691,7 @@ class RRSFRecord(object):
 
         (su_len, su_entry_version_unused, virtual_file_size_high_le,
          virtual_file_size_high_be, virtual_file_size_low_le,
-         virtual_file_size_low_be, self.table_depth) = struct.unpack_from("=BBLLLLB", rrstr[:21], 2)
+         virtual_file_size_low_be, self.table_depth) = struct.unpack_from("=BBLLLLB", rrstr, 2)
         if su_len != RRSFRecord.length():
             raise pycdlibexception.PyCdlibInvalidISO("Invalid length on rock ridge extension")
 
@@ -1688,6 +1760,8 @@ class RRRERecord(object):
     record is used to mark an entry as having been relocated because it was
     deeply nested.
     '''
+    __slots__ = ('_initialized')
+
     def __init__(self):
         self._initialized = False
 
@@ -1703,7 +1777,7 @@ class RRRERecord(object):
         if self._initialized:
             raise pycdlibexception.PyCdlibInternalError("RE record already initialized!")
 
-        (su_len, su_entry_version_unused) = struct.unpack_from("=BB", rrstr[:4], 2)
+        (su_len, su_entry_version_unused) = struct.unpack_from("=BB", rrstr, 2)
 
         # We assume that the caller has already checked the su_entry_version,
         # so we don't bother.
@@ -1761,6 +1835,11 @@ class RockRidgeEntries(object):
     A simple class container to hold a long list of possible Rock Ridge
     records.
     '''
+    __slots__ = ('ce_record', 'cl_record', 'er_record', 'es_record',
+                 'nm_records', 'pl_record', 'pn_record', 'px_record',
+                 're_record', 'rr_record', 'sf_record', 'sl_records',
+                 'sp_record', 'tf_record')
+
     def __init__(self):
         self.sp_record = None
         self.rr_record = None
@@ -1795,9 +1874,24 @@ class RockRidge(object):
     '''
     A class representing Rock Ridge entries.
     '''
+    __slots__ = ('_ce_entries', '_ce_record', '_dr_entries', '_full_name',
+                 '_initialized', '_pending', '_signatures', '_symlink_path',
+                 'bytes_to_skip', 'ce_block', 'cl_to_moved_dr',
+                 'moved_to_cl_dr', 'parent_link', 'rr_version',
+                 'su_entry_version')
+
+    # The System Use entries that may only appear once in a Rock Ridge entry.
+    SINGLE_ENTRIES = (b'SP', b'RR', b'CE', b'PX', b'ER', b'ES', b'PN', b'CL',
+                      b'PL', b'RE', b'TF', b'SF')
+
     def __init__(self):
-        self.dr_entries = RockRidgeEntries()
-        self.ce_entries = RockRidgeEntries()
+        self._dr_entries = RockRidgeEntries()
+        self._ce_entries = RockRidgeEntries()
+        self._pending = []
+        self._signatures = set()
+        self._ce_record = None
+        self._full_name = None
+        self._symlink_path = None
         self.cl_to_moved_dr = None
         self.moved_to_cl_dr = None
         self.parent_link = None
@@ -1805,21 +1899,34 @@ class RockRidge(object):
         self.ce_block = None
         self._initialized = False
 
-    def has_entry(self, name):
+    @property
+    def dr_entries(self):
+        '''
+        The Rock Ridge entries stored in the directory record, decoded on first
+        use.
         '''
-        An internal method to tell if we have already parsed an entry of the
-        named type.
+        if self._pending:
+            self._decode()
+        return self._dr_entries
 
-        Parameters:
-         name - The name of the entry to check.
-        Returns:
-         True if we have already parsed an entry of the named type, False otherwise.
+    @property
+    def ce_entries(self):
+        '''
+        The Rock Ridge entries stored in the continuation area, decoded on
+        first use.
         '''
-        return getattr(self.dr_entries, name) or getattr(self.ce_entries, name)
+        if self._pending:
+            self._decode()
+        return self._ce_entries
 
     def parse(self, record, is_first_dir_record_of_root, bytes_to_skip, continuation):
         '''
-        Method to parse a rock ridge record.
+        Method to parse a rock ridge record.  Only the framing of the System
+        Use entries is checked here, along with the few pieces of information
+        needed while walking the directory tree (the Rock Ridge version, the
+        continuation entry, and which kinds of entries are present).  The raw
+        entries are saved, and fully decoded the first time anything else
+        about them is needed.
 
         Parameters:
          record - The record to parse.
@@ -1838,10 +1945,7 @@ class RockRidge(object):
         # here; this can be called multiple times in the case where there is
         # a continuation entry.
 
-        if continuation:
-            entry_list = self.ce_entries
-        else:
-            entry_list = self.dr_entries
+        record = memoryview(record)
 
         self.bytes_to_skip = bytes_to_skip
         offset = 0 + bytes_to_skip
@@ -1851,35 +1955,28 @@ class RockRidge(object):
                 break
             elif left == 1:
                 # There may be a padding byte on the end.
-                if bytes(bytearray([record[offset]])) != b'\x00':
+                if struct.unpack_from("=B", record, offset)[0] != 0:
                     raise pycdlibexception.PyCdlibInvalidISO("Invalid pad byte")
                 break
             elif left < 4:
                 raise pycdlibexception.PyCdlibInvalidISO("Not enough bytes left in the System Use field")
 
-            (rtype, su_len, su_entry_version) = struct.unpack_from("=2sBB", record[:offset + 4], offset)
+            (rtype, su_len, su_entry_version) = struct.unpack_from("=2sBB", record, offset)
             if su_entry_version != SU_ENTRY_VERSION:
                 raise pycdlibexception.PyCdlibInvalidISO("Invalid RR version %d!" % su_entry_version)
 
+            if su_len < 4:
+                raise pycdlibexception.PyCdlibInvalidISO("Invalid length on rock ridge extension")
+
+            if rtype in self.SINGLE_ENTRIES and rtype in self._signatures:
+                raise pycdlibexception.PyCdlibInvalidISO("Only single %s record supported" % (rtype.decode('ascii')))
+
             if rtype == b'SP':
+                # The SP record is exactly 7 bytes, and may only appear in the
+                # first Directory Record of the root directory.
                 if left < 7 or not is_first_dir_record_of_root:
                     raise pycdlibexception.PyCdlibInvalidISO("Invalid SUSP SP record")
-
-                if self.has_entry('sp_record'):
-                    raise pycdlibexception.PyCdlibInvalidISO("Only single SP record supported")
-
-                # OK, this is the first Directory Record of the root
-                # directory, which means we should check it for the SUSP/RR
-                # extension, which is exactly 7 bytes and starts with 'SP'.
-
-                entry_list.sp_record = RRSPRecord()
-                entry_list.sp_record.parse(record[offset:])
             elif rtype == b'RR':
-                if self.has_entry('rr_record'):
-                    raise pycdlibexception.PyCdlibInvalidISO("Only single RR record supported")
-
-                entry_list.rr_record = RRRRRecord()
-                entry_list.rr_record.parse(record[offset:])
                 # The RR Record only exists in the 1.09 specification.  However,
                 # we have seen ISOs in the wild (OpenSolaris 2008) that put an
                 # RR Record into a 1.12 ISO.  Therefore, if no previous version
@@ -1889,17 +1986,14 @@ class RockRidge(object):
                 if self.rr_version is None:
                     self.rr_version = "1.09"
             elif rtype == b'CE':
-                if self.has_entry('ce_record'):
-                    raise pycdlibexception.PyCdlibInvalidISO("Only single CE record supported")
-
-                entry_list.ce_record = RRCERecord()
-                entry_list.ce_record.parse(record[offset:])
+                # The continuation entry has to be followed right away, so it
+                # is decoded here.
+                ce_record = RRCERecord()
+                ce_record.parse(record[offset:])
+                if not continuation:
+                    self._ce_record = ce_record
             elif rtype == b'PX':
-                if self.has_entry('px_record'):
-                    raise pycdlibexception.PyCdlibInvalidISO("Only single PX record supported")
-
-                entry_list.px_record = RRPXRecord()
-                version = entry_list.px_record.parse(record[offset:])
+                version = RRPXRecord.version_from_length(su_len)
                 # See the comment above in the RR handling for why the logic
                 # is as follows.
                 if self.rr_version is None:
@@ -1909,88 +2003,120 @@ class RockRidge(object):
                         self.rr_version = "1.12"
                     elif self.rr_version != version:
                         raise pycdlibexception.PyCdlibInvalidISO("PX record doesn't agree with Rock Ridge version")
-            elif rtype == b'PD':
-                # no work to do here
-                pass
             elif rtype == b'ST':
                 if su_len != 4:
                     raise pycdlibexception.PyCdlibInvalidISO("Invalid length on rock ridge extension")
-            elif rtype == b'ER':
-                if self.has_entry('er_record'):
-                    raise pycdlibexception.PyCdlibInvalidISO("Only single ER record supported")
-
-                entry_list.er_record = RRERRecord()
-                entry_list.er_record.parse(record[offset:])
-            elif rtype == b'ES':
-                if self.has_entry('es_record'):
-                    raise pycdlibexception.PyCdlibInvalidISO("Only single ES record supported")
-
-                entry_list.es_record = RRESRecord()
-                entry_list.es_record.parse(record[offset:])
-            elif rtype == b'PN':
-                if self.has_entry('pn_record'):
-                    raise pycdlibexception.PyCdlibInvalidISO("Only single PN record supported")
-
-                entry_list.pn_record = RRPNRecord()
-                entry_list.pn_record.parse(record[offset:])
-            elif rtype == b'SL':
-                new_sl_record = RRSLRecord()
-                previous_continued = False
-                if entry_list.sl_records:
-                    previous_continued = entry_list.sl_records[-1].last_component_continued()
-                new_sl_record.parse(record[offset:], previous_continued)
-                entry_list.sl_records.append(new_sl_record)
-            elif rtype == b'NM':
-                new_nm_record = RRNMRecord()
-                new_nm_record.parse(record[offset:])
-                entry_list.nm_records.append(new_nm_record)
-            elif rtype == b'CL':
-                if self.has_entry('cl_record'):
-                    raise pycdlibexception.PyCdlibInvalidISO("Only single CL record supported")
-
-                entry_list.cl_record = RRCLRecord()
-                entry_list.cl_record.parse(record[offset:])
-            elif rtype == b'PL':
-                if self.has_entry('pl_record'):
-                    raise pycdlibexception.PyCdlibInvalidISO("Only single PL record supported")
-
-                entry_list.pl_record = RRPLRecord()
-                entry_list.pl_record.parse(record[offset:])
-            elif rtype == b'RE':
-                if self.has_entry('re_record'):
-                    raise pycdlibexception.PyCdlibInvalidISO("Only single RE record supported")
-
-                entry_list.re_record = RRRERecord()
-                entry_list.re_record.parse(record[offset:])
-            elif rtype == b'TF':
-                if self.has_entry('tf_record'):
-                    raise pycdlibexception.PyCdlibInvalidISO("Only single TF record supported")
-
-                entry_list.tf_record = RRTFRecord()
-                entry_list.tf_record.parse(record[offset:])
-            elif rtype == b'SF':
-                if self.has_entry('sf_record'):
-                    raise pycdlibexception.PyCdlibInvalidISO("Only single SF record supported")
-
-                entry_list.sf_record = RRSFRecord()
-                entry_list.sf_record.parse(record[offset:])
-            else:
+            elif rtype not in [b'PD', b'ER', b'ES', b'PN', b'SL', b'NM', b'CL', b'PL', b'RE', b'TF', b'SF']:
                 raise pycdlibexception.PyCdlibInvalidISO("Unknown SUSP record")
+
+            self._signatures.add(rtype)
             offset += su_len
             left -= su_len
 
+        self._pending.append((record.tobytes(), bytes_to_skip, continuation))
+
         if self.rr_version is None:
             # If we didn't see either the RR record or the PX record, we assume
             # that this is a 1.12 version of Rock Ridge.
             self.rr_version = "1.12"
         self.su_entry_version = 1
 
-        namelist = [nm.posix_name for nm in self.dr_entries.nm_records]
-        namelist.extend([nm.posix_name for nm in self.ce_entries.nm_records])
-        self._full_name = b"".join(namelist)
-
         self._initialized = True
 
+    def decode(self):
+        '''
+        A method to decode the Rock Ridge entries saved by parse right away,
+        instead of the first time they are used, so that any problem with
+        their contents is found now.
+
+        Parameters:
+         None.
+        Returns:
+         Nothing.
+        '''
+        if self._pending:
+            self._decode()
+
+    def _decode(self):
+        '''
+        An internal method to decode the Rock Ridge entries saved by parse into
+        the DR and continuation entry lists.
+
+        Parameters:
+         None.
+        Returns:
+         Nothing.
+        '''
+        pending = self._pending
+        self._pending = []
+        for (record, bytes_to_skip, continuation) in pending:
+            if continuation:
+                entry_list = self._ce_entries
+            else:
+                entry_list = self._dr_entries
+
+            # All of the entries below are decoded straight out of this view,
+            # so walking the System Use area doesn't copy the record over and
+            # over.  The framing was already checked by parse.
+            record = memoryview(record)
+            offset = bytes_to_skip
+            left = len(record)
+            while left >= 4:
+                (rtype, su_len) = struct.unpack_from("=2sB", record, offset)
+
+                if rtype == b'SP':
+                    entry_list.sp_record = RRSPRecord()
+                    entry_list.sp_record.parse(record[offset:])
+                elif rtype == b'RR':
+                    entry_list.rr_record = RRRRRecord()
+                    entry_list.rr_record.parse(record[offset:])
+                elif rtype == b'CE':
+                    entry_list.ce_record = RRCERecord()
+                    entry_list.ce_record.parse(record[offset:])
+                elif rtype == b'PX':
+                    entry_list.px_record = RRPXRecord()
+                    entry_list.px_record.parse(record[offset:])
+                elif rtype == b'ER':
+                    entry_list.er_record = RRERRecord()
+                    entry_list.er_record.parse(record[offset:])
+                elif rtype == b'ES':
+                    entry_list.es_record = RRESRecord()
+                    entry_list.es_record.parse(record[offset:])
+                elif rtype == b'PN':
+                    entry_list.pn_record = RRPNRecord()
+                    entry_list.pn_record.parse(record[offset:])
+                elif rtype == b'SL':
+                    new_sl_record = RRSLRecord()
+                    previous_continued = False
+                    if entry_list.sl_records:
+                        previous_continued = entry_list.sl_records[-1].last_component_continued()
+                    new_sl_record.parse(record[offset:], previous_continued)
+                    entry_list.sl_records.append(new_sl_record)
+                elif rtype == b'NM':
+                    new_nm_record = RRNMRecord()
+                    new_nm_record.parse(record[offset:])
+                    entry_list.nm_records.append(new_nm_record)
+                elif rtype == b'CL':
+                    entry_list.cl_record = RRCLRecord()
+                    entry_list.cl_record.parse(record[offset:])
+                elif rtype == b'PL':
+                    entry_list.pl_record = RRPLRecord()
+                    entry_list.pl_record.parse(record[offset:])
+                elif rtype == b'RE':
+                    entry_list.re_record = RRRERecord()
+                    entry_list.re_record.parse(record[offset:])
+                elif rtype == b'TF':
+                    entry_list.tf_record = RRTFRecord()
+                    entry_list.tf_record.parse(record[offset:])
+                elif rtype == b'SF':
+                    entry_list.sf_record = RRSFRecord()
+                    entry_list.sf_record.parse(record[offset:])
+                offset += su_len
+                left -= su_len
+
+        self._ce_record = None
+        self._signatures = set()
+
     def _record(self, entries):
         '''
         Return a string representing the Rock Ridge entry.
@@ -2498,13 +2624,48 @@ class RockRidge(object):
         if not self._initialized:
             raise pycdlibexception.PyCdlibInternalError("Rock Ridge extension not yet initialized")
 
+        if self._full_name is None:
+            namelist = [nm.posix_name for nm in self.dr_entries.nm_records]
+            namelist.extend([nm.posix_name for nm in self.ce_entries.nm_records])
+            self._full_name = b"".join(namelist)
+
         return self._full_name
 
+    def _has_signature(self, rtype, attrname):
+        '''
+        Internal method to determine whether this Rock Ridge entry has a
+        particular kind of System Use entry, without decoding the entries if
+        they haven't been decoded yet.
+
+        Parameters:
+         rtype - The signature of the System Use entry.
+         attrname - The attribute of RockRidgeEntries holding the entry.
+        Returns:
+         True if this Rock Ridge entry has the System Use entry, False otherwise.
+        '''
+        if self._pending:
+            return rtype in self._signatures
+        return bool(getattr(self._dr_entries, attrname)) or bool(getattr(self._ce_entries, attrname))
+
+    def continuation_record(self):
+        '''
+        Get the Continuation Entry record of this Rock Ridge entry, without
+        decoding the rest of the entries.
+
+        Parameters:
+         None.
+        Returns:
+         The Continuation Entry record, or None if there isn't one.
+        '''
+        if self._pending:
+            return self._ce_record
+        return self._dr_entries.ce_record
+
     def _is_symlink(self):
         '''
         Internal method to determine whether this Rock Ridge entry is a symlink.
         '''
-        return len(self.dr_entries.sl_records) > 0 or len(self.ce_entries.sl_records) > 0
+        return self._has_signature(b'SL', 'sl_records')
 
     def is_symlink(self):
         '''
@@ -2536,6 +2697,9 @@ class RockRidge(object):
         if not self.is_symlink():
             raise pycdlibexception.PyCdlibInvalidInput("Entry is not a symlink!")
 
+        if self._symlink_path is not None:
+            return self._symlink_path
+
         outlist = []
         saved = b''
         for rec in self.dr_entries.sl_records + self.ce_entries.sl_records:
@@ -2549,7 +2713,8 @@ class RockRidge(object):
         if saved != b'':
             raise pycdlibexception.PyCdlibInvalidISO("Saw a continued symlink record with no end; ISO is probably malformed")
 
-        return b"/".join(outlist)
+        self._symlink_path = b"/".join(outlist)
+        return self._symlink_path
 
     def child_link_record_exists(self):
         '''
@@ -2564,7 +2729,7 @@ class RockRidge(object):
         if not self._initialized:
             raise pycdlibexception.PyCdlibInternalError("Rock Ridge extension not yet initialized")
 
-        return self.dr_entries.cl_record is not None or self.ce_entries.cl_record is not None
+        return self._has_signature(b'CL', 'cl_record')
 
     def child_link_update_from_dirrecord(self):
         '''
@@ -2623,7 +2788,7 @@ class RockRidge(object):
         if not self._initialized:
             raise pycdlibexception.PyCdlibInternalError("Rock Ridge extension not yet initialized")
 
-        return self.dr_entries.pl_record is not None or self.ce_entries.pl_record is not None
+        return self._has_signature(b'PL', 'pl_record')
 
     def parent_link_update_from_dirrecord(self):
         '''
@@ -2682,7 +2847,7 @@ class RockRidge(object):
         if not self._initialized:
             raise pycdlibexception.PyCdlibInternalError("Rock Ridge extension not yet initialized")
 
-        return self.dr_entries.re_record is not None or self.ce_entries.re_record is not None
+        return self._has_signature(b'RE', 're_record')
 
     def update_ce_block(self, block):
         '''
@@ -2705,6 +2870,8 @@ class RockRidgeContinuationEntry(object):
     These entries are strictly for keeping tabs of the offset and size
     of each entry in a continuation block; they have no smarts beyond that.
     '''
+    __slots__ = ('_length', '_offset')
+
     def __init__(self, offset, length):
         self._offset = offset
         self._length = length
@@ -2744,6 +2911,8 @@ class RockRidgeContinuationBlock(object):
     Entries.  However, this is just used for tracking how many entries will
     fit in one block; all tracking of the actual data must be done elsewhere.
     '''
+    __slots__ = ('_entries', '_extent', '_max_block_size')
+
     def __init__(self, extent, max_block_size):
         self._extent = extent
         self._max_block_size = max_block_size
@@ -2771,27 +2940,30 @@ class RockRidgeContinuationBlock(object):
         '''
         self._extent = loc
 
-    def track_entry(self, offset, length):
+    def track_entry(self, offset, length, check=True):
         '''
         Track an already allocated entry in this Rock Ridge Continuation Block.
 
         Parameters:
          offset - The offset at which to place the entry.
          length - The length of the entry to track.
+         check - Whether to check that the entry fits in the block and does
+                 not overlap any of the entries already tracked.
         Returns:
          Nothing.
         '''
-        newlen = offset + length - 1
-        for entry in self._entries:
-            thislen = entry.offset + entry.length - 1
-            overlap = range(max(entry.offset, offset), min(thislen, newlen) + 1)
-            if overlap:
-                raise pycdlibexception.PyCdlibInvalidISO("Overlapping CE regions on the ISO")
-
-        # OK, there were no overlaps with existing entries.  Let's see if
-        # the new entry fits at the end.
-        if offset + length > self._max_block_size:
-            raise pycdlibexception.PyCdlibInvalidISO("No room in continuation block to track entry")
+        if check:
+            newlen = offset + length - 1
+            for entry in self._entries:
+                thislen = entry.offset + entry.length - 1
+                overlap = range(max(entry.offset, offset), min(thislen, newlen) + 1)
+                if overlap:
+                    raise pycdlibexception.PyCdlibInvalidISO("Overlapping CE regions on the ISO")
+
+            # OK, there were no overlaps with existing entries.  Let's see if
+            # the new entry fits at the end.
+            if offset + length > self._max_block_size:
+                raise pycdlibexception.PyCdlibInvalidISO("No room in continuation block to track entry")
 
         # We passed all of the checks; add the new entry to track in.
         bisect.insort_left(self._entries, RockRidgeContinuationEntry(offset, length))
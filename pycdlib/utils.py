@@ -20,8 +20,13 @@ Various utilities for PyCdlib.
 
 from __future__ import absolute_import
 
+import errno
 import io
+import mmap
+import os
 import socket
+import struct
+import sys
 
 import pycdlib.pycdlibexception as pycdlibexception
 
@@ -34,6 +39,14 @@ except ImportError:
     except ImportError:
         have_sendfile = False
 
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+# The ioctl to share a range of blocks between files, from linux/fs.h.
+_FICLONERANGE = 0x4020940d
+
 
 def swab_32bit(input_int):
     '''
@@ -76,11 +89,136 @@ def ceiling_div(numer, denom):
     return -(-numer // denom)
 
 
+def _clone_range(in_fd, in_offset, out_fd, out_offset, length):
+    '''
+    An internal function to share the blocks of a range of one file with
+    another using a FICLONERANGE reflink, on filesystems that support it
+    (such as btrfs and XFS).  Only whole filesystem blocks can be shared,
+    except at the end of the input file; the kernel refuses anything else
+    with EINVAL, which leaves the copy to the next method.
+
+    Parameters:
+     in_fd - The file descriptor to copy data from.
+     in_offset - The offset in the input to copy from.
+     out_fd - The file descriptor to copy data to.
+     out_offset - The offset in the output to copy to, or None if the output
+                  is not seekable.
+     length - The amount of data to copy.
+    Returns:
+     The amount of data copied, which may be 0.
+    '''
+    if fcntl is None or not sys.platform.startswith('linux') or out_offset is None:
+        return 0
+
+    fcntl.ioctl(out_fd, _FICLONERANGE, struct.pack('=qQQQ', in_fd, in_offset, length, out_offset))
+    return length
+
+
+def _copy_file_range(in_fd, in_offset, out_fd, out_offset, length):
+    '''
+    An internal function to copy a range of one file to another with
+    copy_file_range, which lets the kernel (or the filesystem) do the copy.
+
+    Parameters:
+     in_fd - The file descriptor to copy data from.
+     in_offset - The offset in the input to copy from.
+     out_fd - The file descriptor to copy data to.
+     out_offset - The offset in the output to copy to, or None if the output
+                  is not seekable.
+     length - The amount of data to copy.
+    Returns:
+     The amount of data copied, which may be less than length.
+    '''
+    if out_offset is None:
+        return 0
+    done = 0
+    while done < length:
+        copied = os.copy_file_range(in_fd, out_fd, length - done,
+                                    in_offset + done, out_offset + done)
+        if copied == 0:
+            break
+        done += copied
+    return done
+
+
+def _sendfile(in_fd, in_offset, out_fd, out_offset, length):
+    '''
+    An internal function to copy a range of one file to another with
+    sendfile.  The data is written at the current position of the output.
+
+    Parameters:
+     in_fd - The file descriptor to copy data from.
+     in_offset - The offset in the input to copy from.
+     out_fd - The file descriptor to copy data to.
+     out_offset - The offset in the output to copy to, or None if the output
+                  is not seekable.
+     length - The amount of data to copy.
+    Returns:
+     The amount of data copied, which may be less than length.
+    '''
+    if out_offset is not None:
+        os.lseek(out_fd, out_offset, os.SEEK_SET)
+    done = 0
+    while done < length:
+        sent = sendfile(out_fd, in_fd, in_offset + done, length - done)
+        if sent == 0:
+            break
+        done += sent
+    return done
+
+
+def _splice(in_fd, in_offset, out_fd, out_offset, length):
+    '''
+    An internal function to copy a range of a file into a pipe with splice.
+
+    Parameters:
+     in_fd - The file descriptor to copy data from.
+     in_offset - The offset in the input to copy from.
+     out_fd - The file descriptor of the pipe to copy data to.
+     out_offset - Must be None, since pipes are not seekable.
+     length - The amount of data to copy.
+    Returns:
+     The amount of data copied, which may be less than length.
+    '''
+    if out_offset is not None:
+        return 0
+    done = 0
+    while done < length:
+        spliced = os.splice(in_fd, out_fd, length - done, offset_src=in_offset + done)
+        if spliced == 0:
+            break
+        done += spliced
+    return done
+
+
+# The ways of copying data between file descriptors, in the order they are
+# tried; the ones this Python doesn't have are left out.
+_FD_COPY_METHODS = []
+if fcntl is not None:
+    _FD_COPY_METHODS.append(('reflink', _clone_range))
+if hasattr(os, 'copy_file_range'):
+    _FD_COPY_METHODS.append(('copy_file_range', _copy_file_range))
+if have_sendfile:
+    _FD_COPY_METHODS.append(('sendfile', _sendfile))
+if hasattr(os, 'splice'):
+    _FD_COPY_METHODS.append(('splice', _splice))
+
+# The errors that mean a copy method can't be used for a pair of files, in
+# which case the next one is tried.
+_FD_COPY_UNSUPPORTED = set([errno.EBADF, errno.EINVAL, errno.ENOSYS,
+                            errno.ENOTTY, errno.EOPNOTSUPP, errno.ESPIPE,
+                            errno.EXDEV, getattr(errno, 'ENOTSUP', errno.EOPNOTSUPP)])
+
+
 def copy_data(data_length, blocksize, infp, outfp):
     '''
     A utility function to copy data from the input file object to the output
-    file object.  This function will use the most efficient copy method available,
-    which is often sendfile.
+    file object.  This function will use the most efficient copy method
+    available.  When both file objects have file descriptors, these are tried
+    in order: sharing the blocks with a reflink, copy_file_range, sendfile,
+    and splice (for an output pipe).  A memory-mapped input is written
+    straight out of the mapping, and anything else is read and written a
+    block at a time.
 
     Parameters:
      data_length - The amount of data to copy.
@@ -88,36 +226,83 @@ def copy_data(data_length, blocksize, infp, outfp):
      infp - The file object to copy data from.
      outfp - The file object to copy data to.
     Returns:
-     Nothing.
+     The name of the copy method used, for diagnostics; if more than one was
+     needed, the names are joined with "+".
     '''
-    use_sendfile = False
-    if have_sendfile:
+    in_fd = None
+    out_fd = None
+    if _FD_COPY_METHODS and not isinstance(infp, mmap.mmap):
         # Python 3 implements the fileno method for all file-like objects, so
         # we can't just use the existence of the method to tell whether it is
         # available.  Instead, we try to assign it, and if we fail, then we
         # assume it is not available.
         try:
-            x_unused = infp.fileno()  # NOQA
-            y_unused = outfp.fileno()  # NOQA
-            use_sendfile = True
+            in_fd = infp.fileno()
+            out_fd = outfp.fileno()
         except (AttributeError, io.UnsupportedOperation):
-            pass
+            in_fd = None
+            out_fd = None
 
-    if use_sendfile:
+    methods = []
+    done = 0
+    if in_fd is not None:
         # This is one of those instances where using the file object and the
-        # file descriptor causes problems.  The sendfile() call actually updates
-        # the underlying file descriptor, but the file object does not know
-        # about it.  To get around this, we instead get the offset, allow
-        # sendfile() to update the offset, then manually seek the file object
-        # to the right location.  This ensures that the file object gets updated
-        # properly.
+        # file descriptor causes problems.  The copies below work on the
+        # file descriptors, but the file objects do not know about it.  To
+        # get around this, we get the offsets, copy at those offsets, then
+        # manually seek the file objects to the right location.  Anything
+        # still buffered in the output file object also has to go out first.
         in_offset = infp.tell()
-        out_offset = outfp.tell()
-        sendfile(outfp.fileno(), infp.fileno(), in_offset, data_length)
-        infp.seek(in_offset + data_length)
-        outfp.seek(out_offset + data_length)
-    else:
-        left = data_length
+        outfp.flush()
+        try:
+            out_offset = outfp.tell()
+        except (IOError, OSError):
+            # The output isn't seekable (it may be a pipe, for instance), so
+            # there is no offset to keep up to date.
+            out_offset = None
+
+        for (name, method) in _FD_COPY_METHODS:
+            if done == data_length:
+                break
+            try:
+                copied = method(in_fd, in_offset + done, out_fd,
+                                None if out_offset is None else out_offset + done,
+                                data_length - done)
+            except (IOError, OSError) as e:
+                if e.errno not in _FD_COPY_UNSUPPORTED:
+                    raise
+                continue
+            if copied > 0:
+                methods.append(name)
+                done += copied
+
+        infp.seek(in_offset + done)
+        if out_offset is not None:
+            outfp.seek(out_offset + done)
+
+    if done < data_length and isinstance(infp, mmap.mmap):
+        try:
+            view = memoryview(infp)
+        except TypeError:
+            # Python 2 mmap objects don't support the new buffer protocol, so
+            # fall back to reading from them like any other file object.
+            view = None
+        if view is not None:
+            # The data is already in memory, so hand the output a slice of
+            # the mapping rather than copying it into a temporary buffer
+            # first.
+            in_offset = infp.tell()
+            if in_offset + data_length > len(infp):
+                view.release()
+                raise pycdlibexception.PyCdlibInternalError("Failed to read expected bytes")
+            outfp.write(view[in_offset:in_offset + data_length])
+            view.release()
+            infp.seek(in_offset + data_length)
+            methods.append('mmap')
+            done = data_length
+
+    if done < data_length:
+        left = data_length - done
         readsize = blocksize
         while left > 0:
             if left < readsize:
@@ -127,6 +312,9 @@ def copy_data(data_length, blocksize, infp, outfp):
                 raise pycdlibexception.PyCdlibInternalError("Failed to read expected bytes")
             outfp.write(data)
             left -= readsize
+        methods.append('read_write')
+
+    return '+'.join(methods)
 
 
 def encode_space_pad(instr, length, encoding):
@@ -29,6 +29,12 @@ def find_executable(executable):
                 return f
     return None
 
+@pytest.fixture
+def fixed_time(monkeypatch):
+    # Directory records are dated when they are written, so pin the time to
+    # make writes of the same ISO comparable.
+    monkeypatch.setattr(pycdlib.dates.time, "time", lambda: 1500000000.0)
+
 ################################ INTERNAL HELPERS #############################
 
 def internal_check_pvd(pvd, extent, size, ptbl_size, ptbl_location_le, ptbl_location_be):
@@ -2768,3 +2768,59 @@ def test_hybrid_rr_relocated_list_dir(tmpdir):
 
         else:
             assert(False)
+
+def test_hybrid_lazy_rm_file(tmpdir):
+    iso = pycdlib.PyCdlib()
+    iso.new(joliet=3)
+
+    foostr = b"foo\n"
+    iso.add_fp(BytesIO(foostr), len(foostr), "/FOO.;1", joliet_path="/foo")
+    iso.add_directory("/DIR1", joliet_path="/dir1")
+
+    out = BytesIO()
+    iso.write_fp(out)
+    iso.close()
+
+    iso2 = pycdlib.PyCdlib()
+    iso2.open_fp(out, lazy=True)
+
+    # Removing the file requires the Joliet record to be linked to the PVD one.
+    iso2.rm_file("/FOO.;1", joliet_path="/foo")
+
+    do_a_test(tmpdir, iso2, check_joliet_onedir)
+
+    iso2.close()
+
+def test_hybrid_boot_info_table_unrelated_modify(tmpdir, monkeypatch):
+    iso = pycdlib.PyCdlib()
+    iso.new()
+
+    bootstr = b"boot\n" * 1000
+    iso.add_fp(BytesIO(bootstr), len(bootstr), "/BOOT.;1")
+    iso.add_eltorito("/BOOT.;1", "/BOOT.CAT;1", boot_info_table=True)
+
+    out = BytesIO()
+    iso.write_fp(out)
+    iso.close()
+
+    csums = []
+    orig_csum = pycdlib.eltorito.boot_info_table_csum
+    def _counting_csum(data_fp, data_len, log_block_size):
+        csums.append(data_len)
+        return orig_csum(data_fp, data_len, log_block_size)
+    monkeypatch.setattr(pycdlib.eltorito, "boot_info_table_csum", _counting_csum)
+
+    iso2 = pycdlib.PyCdlib()
+    iso2.open_fp(out)
+
+    # Modifying a file other than the boot file doesn't checksum the boot
+    # file; only writing the boot file back out does.
+    iso2.add_fp(BytesIO(b"foo\n"), 4, "/FOO.;1")
+    iso2.rm_file("/FOO.;1")
+    assert(csums == [])
+
+    out2 = BytesIO()
+    iso2.write_fp(out2)
+    assert(csums == [len(bootstr)])
+
+    iso2.close()
@@ -1,6 +1,8 @@
 from __future__ import absolute_import
 
 import pytest
+import io
+import logging
 import os
 import sys
 try:
@@ -3126,3 +3128,340 @@ def test_new_write_fp_not_binary(tmpdir):
             iso.write_fp(outfp)
 
     iso.close()
+
+def test_new_eltorito_boot_info_table_csum_on_write(tmpdir, monkeypatch, fixed_time):
+    bootstr = bytes(bytearray(range(256))) * 41 + b"abc"
+    csum = pycdlib.eltorito.boot_info_table_csum(BytesIO(bootstr), len(bootstr), 2048)
+
+    # The checksum is calculated as the boot file is written out, not by
+    # reading the boot file when it is added or before it is written.
+    def _no_csum(data_fp, data_len, log_block_size):
+        raise Exception("boot file read just for the checksum")
+    real_csum = pycdlib.eltorito.boot_info_table_csum
+    monkeypatch.setattr(pycdlib.eltorito, "boot_info_table_csum", _no_csum)
+
+    class CountingBytesIO(io.BytesIO):
+        def __init__(self, data):
+            io.BytesIO.__init__(self, data)
+            self.count = 0
+
+        def read(self, size=-1):
+            data = io.BytesIO.read(self, size)
+            self.count += len(data)
+            return data
+
+    class WriteOnly(object):
+        def __init__(self):
+            self.data = BytesIO()
+
+        def write(self, data):
+            self.data.write(data)
+
+    def _new_iso():
+        iso = pycdlib.PyCdlib()
+        iso.new()
+        bootfp = CountingBytesIO(bootstr)
+        iso.add_fp(bootfp, len(bootstr), "/BOOT.;1")
+        iso.add_eltorito("/BOOT.;1", "/BOOT.CAT;1", boot_info_table=True)
+        assert(iso.get_entry("/BOOT.;1").boot_info_table.csum is None)
+        return (iso, bootfp)
+
+    outfile = str(tmpdir.join("csumworkers.iso"))
+    outputs = []
+    for (kind, workers) in (("seekable", 0), ("pipe", 0), ("file", 4), ("get", 0)):
+        if workers > 1 and not hasattr(os, "pwrite"):
+            continue
+        (iso, bootfp) = _new_iso()
+        if kind == "seekable":
+            out = BytesIO()
+            iso.write_fp(out)
+            outputs.append(out.getvalue())
+        elif kind == "pipe":
+            out = WriteOnly()
+            iso.write_fp(out)
+            outputs.append(out.data.getvalue())
+        elif kind == "file":
+            with open(outfile, "wb") as outfp:
+                iso.write_fp(outfp, workers=workers)
+            with open(outfile, "rb") as infp:
+                outputs.append(infp.read())
+        else:
+            out = WriteOnly()
+            iso.get_and_write_fp("/BOOT.;1", out)
+            table = struct.pack("<LLLL", 16, iso.get_entry("/BOOT.;1").extent_location(), len(bootstr), csum)
+            assert(out.data.getvalue() == bootstr[:8] + table + b"\x00" * 40 + bootstr[64:])
+
+        # The boot file was read just once, and the checksum came out of it.
+        assert(bootfp.count == len(bootstr))
+        assert(iso.get_entry("/BOOT.;1").boot_info_table.csum == csum)
+        iso.close()
+
+    monkeypatch.setattr(pycdlib.eltorito, "boot_info_table_csum", real_csum)
+
+    assert(outputs[1:] == outputs[:1] * (len(outputs) - 1))
+
+    iso2 = pycdlib.PyCdlib()
+    iso2.open_fp(BytesIO(outputs[0]))
+    bootrec2 = iso2.get_entry("/BOOT.;1")
+    assert(bootrec2.boot_info_table is not None)
+    assert(bootrec2.boot_info_table.csum == csum)
+    iso2.close()
+
+def test_new_write_fp_not_seekable(tmpdir, fixed_time):
+    iso = pycdlib.PyCdlib()
+    iso.new(rock_ridge="1.09", joliet=3)
+
+    for i in range(20):
+        data = b"x" * (i * 300 + 1)
+        iso.add_fp(BytesIO(data), len(data), "/F%d.;1" % (i), rr_name="f" * 200 + str(i), joliet_path="/f%d" % (i))
+    iso.add_directory("/DIR1", rr_name="dir1", joliet_path="/dir1")
+    iso.add_symlink("/SYM.;1", "sym", "F1.;1", joliet_path="/sym")
+
+    bootstr = b"\x00" * 0x40 + b"\xfb\xc0\x78\x70" + b"boot" * 500
+    iso.add_fp(BytesIO(bootstr), len(bootstr), "/BOOT.;1", rr_name="boot", joliet_path="/boot")
+    iso.add_eltorito("/BOOT.;1", "/BOOT.CAT;1", boot_load_size=4, boot_info_table=True)
+    iso.add_isohybrid()
+
+    # A file object that can only be written to, like a pipe or a socket.
+    class WriteOnly(object):
+        def __init__(self):
+            self.data = BytesIO()
+
+        def write(self, data):
+            self.data.write(data)
+
+    stream = WriteOnly()
+    iso.write_fp(stream)
+
+    out = BytesIO()
+    iso.write_fp(out)
+    iso.close()
+
+    assert(stream.data.getvalue() == out.getvalue())
+
+def test_new_write_fp_pipe(tmpdir, fixed_time):
+    import threading
+
+    indir = tmpdir.mkdir("pipe")
+    foostr = b"foo\n" * 10000
+    with open(os.path.join(str(indir), "foo"), "wb") as outfp:
+        outfp.write(foostr)
+
+    iso = pycdlib.PyCdlib()
+    iso.new()
+    iso.add_file(os.path.join(str(indir), "foo"), "/FOO.;1")
+
+    (readfd, writefd) = os.pipe()
+    chunks = []
+
+    def _reader():
+        with os.fdopen(readfd, "rb") as infp:
+            while True:
+                data = infp.read(65536)
+                if not data:
+                    break
+                chunks.append(data)
+
+    reader = threading.Thread(target=_reader)
+    reader.start()
+    with os.fdopen(writefd, "wb") as pipefp:
+        iso.write_fp(pipefp)
+    reader.join()
+
+    out = BytesIO()
+    iso.write_fp(out)
+    iso.close()
+
+    assert(b"".join(chunks) == out.getvalue())
+
+def test_new_write_fp_directory_writes(tmpdir):
+    iso = pycdlib.PyCdlib()
+    iso.new(joliet=3)
+
+    numfiles = 500
+    for i in range(numfiles):
+        iso.add_fp(BytesIO(b""), 0, "/FILE%d.;1" % (i), joliet_path="/file%d" % (i))
+
+    # Each directory extent and path table goes out in one write, rather than
+    # one write per record.
+    class CountingWriter(object):
+        def __init__(self):
+            self.data = BytesIO()
+            self.writes = 0
+
+        def write(self, data):
+            self.writes += 1
+            self.data.write(data)
+
+    stream = CountingWriter()
+    iso.write_fp(stream)
+    assert(stream.writes < 50)
+
+    iso.close()
+
+    iso2 = pycdlib.PyCdlib()
+    iso2.open_fp(stream.data)
+    assert(len(list(iso2.list_dir("/"))) == numfiles + 2)
+    assert(len(list(iso2.list_dir("/", joliet=True))) == numfiles + 2)
+    iso2.close()
+
+@pytest.mark.skipif(not hasattr(os, 'pwrite'),
+                    reason="writing with workers needs os.pwrite")
+def test_new_write_workers(tmpdir, fixed_time):
+    indir = tmpdir.mkdir("workers")
+    iso = pycdlib.PyCdlib()
+    iso.new(rock_ridge="1.09", joliet=3)
+
+    for i in range(20):
+        data = (b"%d" % (i)) * (i * 1000 + 1)
+        iso.add_fp(BytesIO(data), len(data), "/FP%d.;1" % (i), rr_name="fp%d" % (i), joliet_path="/fp%d" % (i))
+        filename = os.path.join(str(indir), "file%d" % (i))
+        with open(filename, "wb") as outfp:
+            outfp.write(data * 2)
+        iso.add_file(filename, "/FILE%d.;1" % (i), rr_name="file%d" % (i), joliet_path="/file%d" % (i))
+
+    bootstr = b"\x00" * 0x40 + b"\xfb\xc0\x78\x70" + b"boot" * 500
+    iso.add_fp(BytesIO(bootstr), len(bootstr), "/BOOT.;1", rr_name="boot", joliet_path="/boot")
+    iso.add_eltorito("/BOOT.;1", "/BOOT.CAT;1", boot_load_size=4, boot_info_table=True)
+
+    with pytest.raises(pycdlib.pycdlibexception.PyCdlibInvalidInput):
+        iso.write_fp(BytesIO(), workers=4)
+
+    serial = os.path.join(str(indir), "serial.iso")
+    parallel = os.path.join(str(indir), "parallel.iso")
+    iso.write(parallel, workers=4)
+    iso.write(serial)
+    iso.close()
+
+    with open(serial, "rb") as infp:
+        serialdata = infp.read()
+    with open(parallel, "rb") as infp:
+        assert(infp.read() == serialdata)
+
+    # The data of an opened ISO comes from the ISO itself.
+    iso2 = pycdlib.PyCdlib()
+    iso2.open(serial)
+    reparallel = os.path.join(str(indir), "reparallel.iso")
+    iso2.write(reparallel, workers=4)
+    iso2.close()
+
+    with open(reparallel, "rb") as infp:
+        assert(infp.read() == serialdata)
+
+def test_new_copy_data_methods(tmpdir):
+    indir = tmpdir.mkdir("copy")
+    data = bytes(bytearray(range(256))) * 100
+    infile = os.path.join(str(indir), "in")
+    with open(infile, "wb") as outfp:
+        outfp.write(data)
+
+    # Between two files, one of the file descriptor methods is used; which
+    # one depends on the platform and the filesystem.
+    outfile = os.path.join(str(indir), "out")
+    with open(infile, "rb") as infp:
+        with open(outfile, "wb") as outfp:
+            outfp.write(b"head")
+            infp.seek(100)
+            method = pycdlib.utils.copy_data(len(data) - 200, 8192, infp, outfp)
+            assert(infp.tell() == len(data) - 100)
+            assert(outfp.tell() == len(data) - 196)
+            outfp.write(b"tail")
+    assert(method)
+    with open(outfile, "rb") as infp:
+        assert(infp.read() == b"head" + data[100:-100] + b"tail")
+
+    out = BytesIO()
+    with open(infile, "rb") as infp:
+        assert(pycdlib.utils.copy_data(len(data), 8192, infp, out) == "read_write")
+    assert(out.getvalue() == data)
+
+def test_new_write_logs_copy_methods(tmpdir, caplog):
+    indir = tmpdir.mkdir("copylog")
+    foostr = b"foo\n" * 1000
+    infile = os.path.join(str(indir), "foo")
+    with open(infile, "wb") as outfp:
+        outfp.write(foostr)
+
+    iso = pycdlib.PyCdlib()
+    iso.new()
+    iso.add_file(infile, "/FOO.;1")
+
+    # The way the data of each file was copied is logged, for diagnostics.
+    caplog.set_level(logging.DEBUG, logger="pycdlib.pycdlib")
+    iso.write_fp(BytesIO())
+    iso.close()
+
+    messages = [record.getMessage() for record in caplog.records
+                if record.name == "pycdlib.pycdlib"]
+    assert(messages == ["Copied %d bytes with read_write" % (len(foostr))])
+
+def test_new_write_allocation(tmpdir, fixed_time):
+    indir = tmpdir.mkdir("allocation")
+    iso = pycdlib.PyCdlib()
+    iso.new()
+
+    foostr = b"foo\n"
+    iso.add_fp(BytesIO(foostr), len(foostr), "/FOO.;1")
+    isolinuxstr = b"\x00" * 0x40 + b"\xfb\xc0\x78\x70"
+    iso.add_fp(BytesIO(isolinuxstr), len(isolinuxstr), "/ISOLINUX.BIN;1")
+    iso.add_eltorito("/ISOLINUX.BIN;1", "/BOOT.CAT;1", boot_load_size=4)
+    iso.add_isohybrid()
+
+    with pytest.raises(pycdlib.pycdlibexception.PyCdlibInvalidInput):
+        iso.write_fp(BytesIO(), allocation="holes")
+
+    with pytest.raises(pycdlib.pycdlibexception.PyCdlibInvalidInput):
+        iso.write_fp(BytesIO(), allocation="preallocate")
+
+    zeros = os.path.join(str(indir), "zeros.iso")
+    iso.write(zeros)
+    with open(zeros, "rb") as infp:
+        zerosdata = infp.read()
+
+    # Anything already in the file object is thrown away.
+    out = BytesIO()
+    out.write(b"\xff" * (len(zerosdata) + 10))
+    iso.write_fp(out, allocation="sparse")
+    assert(out.getvalue() == zerosdata)
+
+    allocations = ["sparse"]
+    if hasattr(os, "posix_fallocate"):
+        allocations.append("preallocate")
+    for allocation in allocations:
+        for workers in (0, 2) if hasattr(os, "pwrite") else (0,):
+            filename = os.path.join(str(indir), "%s%d.iso" % (allocation, workers))
+            iso.write(filename, workers=workers, allocation=allocation)
+            with open(filename, "rb") as infp:
+                assert(infp.read() == zerosdata)
+
+    iso.close()
+
+def test_new_write_fp_hard_link_round_trip(tmpdir, fixed_time):
+    iso = pycdlib.PyCdlib()
+    iso.new()
+
+    foostr = b"foo\n"
+    iso.add_fp(BytesIO(foostr), len(foostr), "/FOO.;1")
+    iso.add_hard_link(iso_old_path="/FOO.;1", iso_new_path="/BAR.;1")
+
+    out = BytesIO()
+    iso.write_fp(out)
+    iso.close()
+
+    # Once opened, the two records sharing the extent are no longer linked,
+    # but the data must still only be written out once.
+    iso2 = pycdlib.PyCdlib()
+    iso2.open_fp(out)
+    out2 = BytesIO()
+    iso2.write_fp(out2)
+    iso2.close()
+
+    assert(out2.getvalue() == out.getvalue())
+
+    iso3 = pycdlib.PyCdlib()
+    iso3.open_fp(out2)
+    for path in ("/FOO.;1", "/BAR.;1"):
+        data = BytesIO()
+        iso3.get_and_write_fp(path, data)
+        assert(data.getvalue() == foostr)
+    iso3.close()
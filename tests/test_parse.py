@@ -2,7 +2,13 @@ import pytest
 import subprocess
 import os
 import sys
+try:
+    from cStringIO import StringIO as BytesIO
+except ImportError:
+    from io import BytesIO
 import struct
+import pickle
+import zlib
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
@@ -2546,3 +2552,959 @@ def test_parse_open_fp_not_binary(tmpdir):
     with pytest.raises(pycdlib.pycdlibexception.PyCdlibInvalidInput):
         with open(str(outfile), 'r') as infp:
             iso.open_fp(infp)
+
+def test_parse_open_lazy_rr_deep(tmpdir, fixed_time):
+    # Create a new ISO with a relocated deep directory.
+    iso = pycdlib.PyCdlib()
+    iso.new(rock_ridge="1.09", joliet=3)
+
+    iso.add_directory("/DIR1", rr_name="dir1", joliet_path="/dir1")
+    iso.add_directory("/DIR1/DIR2", rr_name="dir2", joliet_path="/dir1/dir2")
+    iso.add_directory("/DIR1/DIR2/DIR3", rr_name="dir3", joliet_path="/dir1/dir2/dir3")
+    iso.add_directory("/DIR1/DIR2/DIR3/DIR4", rr_name="dir4", joliet_path="/dir1/dir2/dir3/dir4")
+    iso.add_directory("/DIR1/DIR2/DIR3/DIR4/DIR5", rr_name="dir5", joliet_path="/dir1/dir2/dir3/dir4/dir5")
+    iso.add_directory("/DIR1/DIR2/DIR3/DIR4/DIR5/DIR6", rr_name="dir6", joliet_path="/dir1/dir2/dir3/dir4/dir5/dir6")
+    iso.add_directory("/DIR1/DIR2/DIR3/DIR4/DIR5/DIR6/DIR7", rr_name="dir7", joliet_path="/dir1/dir2/dir3/dir4/dir5/dir6/dir7")
+    iso.add_directory("/DIR1/DIR2/DIR3/DIR4/DIR5/DIR6/DIR7/DIR8", rr_name="dir8", joliet_path="/dir1/dir2/dir3/dir4/dir5/dir6/dir7/dir8")
+    foostr = b"foo\n"
+    iso.add_fp(BytesIO(foostr), len(foostr), "/DIR1/DIR2/DIR3/DIR4/DIR5/DIR6/DIR7/DIR8/FOO.;1", rr_name="foo", joliet_path="/dir1/dir2/dir3/dir4/dir5/dir6/dir7/dir8/foo")
+
+    out = BytesIO()
+    iso.write_fp(out)
+    iso.close()
+
+    iso2 = pycdlib.PyCdlib()
+    iso2.open_fp(out, lazy=True)
+
+    # Only the root directory should have been parsed so far.
+    dir1 = iso2.pvd.root_directory_record().children[2]
+    assert(len(dir1.children) == 0)
+
+    fooout = BytesIO()
+    iso2.get_and_write_fp("/DIR1/DIR2/DIR3/DIR4/DIR5/DIR6/DIR7/DIR8/FOO.;1", fooout)
+    assert(fooout.getvalue() == foostr)
+
+    names = [c.file_identifier() for c in iso2.list_dir("/DIR1/DIR2/DIR3/DIR4/DIR5/DIR6/DIR7")]
+    assert(names == [b'.', b'..', b'DIR8'])
+
+    # Writing the ISO back out should parse the rest, and give the same ISO.
+    out2 = BytesIO()
+    iso2.write_fp(out2)
+    assert(out2.getvalue() == out.getvalue())
+
+    iso2.close()
+
+def test_parse_open_mmap(tmpdir):
+    iso = pycdlib.PyCdlib()
+    iso.new(rock_ridge="1.09", joliet=3)
+
+    foostr = b"foo\n"
+    iso.add_fp(BytesIO(foostr), len(foostr), "/FOO.;1", rr_name="foo", joliet_path="/foo")
+    iso.add_symlink("/SYM.;1", "sym", "foo", joliet_path="/sym")
+
+    outfile = os.path.join(str(tmpdir), 'mmap.iso')
+    iso.write(outfile)
+    iso.close()
+
+    iso2 = pycdlib.PyCdlib()
+    iso2.open_mmap(outfile)
+
+    check_rr_joliet_symlink(iso2, os.stat(outfile).st_size)
+
+    fooout = BytesIO()
+    iso2.get_and_write_fp("/FOO.;1", fooout)
+    assert(fooout.getvalue() == foostr)
+
+    with pytest.raises(pycdlib.pycdlibexception.PyCdlibInvalidInput):
+        iso2.modify_file_in_place(BytesIO(b"bar\n"), 4, "/FOO.;1", rr_name="foo", joliet_path="/foo")
+
+    # Writing out a copy reads all of the file data from the mapping.
+    out = BytesIO()
+    iso2.write_fp(out)
+    with open(outfile, 'rb') as infp:
+        assert(out.getvalue() == infp.read())
+
+    iso2.close()
+
+def test_parse_open_coalesced_dir_reads(tmpdir):
+    numdirs = 216
+
+    iso = pycdlib.PyCdlib()
+    iso.new(joliet=True)
+
+    for i in range(1, 1+numdirs):
+        iso.add_directory("/DIR%d" % i, joliet_path="/dir%d" % i)
+
+    out = BytesIO()
+    iso.write_fp(out)
+    iso.close()
+
+    class CountingFp(object):
+        def __init__(self, fp):
+            self.fp = fp
+            self.reads = 0
+
+        def read(self, length):
+            # Only count block-sized (or larger) reads, which is what the
+            # directory extents and volume descriptors are read with.
+            if length >= 2048:
+                self.reads += 1
+            return self.fp.read(length)
+
+        def __getattr__(self, name):
+            return getattr(self.fp, name)
+
+    infp = CountingFp(out)
+    iso2 = pycdlib.PyCdlib()
+    iso2.open_fp(infp)
+
+    # Each of the PVD and Joliet trees has more directories than this, so the
+    # directory extents must have been read in coalesced runs.
+    assert(infp.reads < numdirs)
+
+    check_joliet_dirs_overflow_ptr_extent(iso2, len(out.getvalue()))
+
+    iso2.close()
+
+def test_parse_open_workers(tmpdir, fixed_time):
+    # Create a new ISO with a relocated deep directory, and a file with a
+    # Rock Ridge continuation entry below the root.
+    iso = pycdlib.PyCdlib()
+    iso.new(rock_ridge="1.09", joliet=3)
+
+    iso.add_directory("/DIR1", rr_name="dir1", joliet_path="/dir1")
+    iso.add_directory("/DIR1/DIR2", rr_name="dir2", joliet_path="/dir1/dir2")
+    iso.add_directory("/DIR1/DIR2/DIR3", rr_name="dir3", joliet_path="/dir1/dir2/dir3")
+    iso.add_directory("/DIR1/DIR2/DIR3/DIR4", rr_name="dir4", joliet_path="/dir1/dir2/dir3/dir4")
+    iso.add_directory("/DIR1/DIR2/DIR3/DIR4/DIR5", rr_name="dir5", joliet_path="/dir1/dir2/dir3/dir4/dir5")
+    iso.add_directory("/DIR1/DIR2/DIR3/DIR4/DIR5/DIR6", rr_name="dir6", joliet_path="/dir1/dir2/dir3/dir4/dir5/dir6")
+    iso.add_directory("/DIR1/DIR2/DIR3/DIR4/DIR5/DIR6/DIR7", rr_name="dir7", joliet_path="/dir1/dir2/dir3/dir4/dir5/dir6/dir7")
+    iso.add_directory("/DIR1/DIR2/DIR3/DIR4/DIR5/DIR6/DIR7/DIR8", rr_name="dir8", joliet_path="/dir1/dir2/dir3/dir4/dir5/dir6/dir7/dir8")
+    aastr = b"aa\n"
+    iso.add_fp(BytesIO(aastr), len(aastr), "/DIR1/AAAAAAAA.;1", rr_name="a"*RR_MAX_FILENAME_LENGTH, joliet_path="/dir1/aaaa")
+
+    outfile = os.path.join(str(tmpdir), 'workers.iso')
+    iso.write(outfile)
+    iso.close()
+
+    iso2 = pycdlib.PyCdlib()
+    iso2.open(outfile, workers=2)
+
+    aaout = BytesIO()
+    iso2.get_and_write_fp("/DIR1/AAAAAAAA.;1", aaout)
+    assert(aaout.getvalue() == aastr)
+
+    aa = iso2.get_entry("/DIR1/AAAAAAAA.;1")
+    assert(aa.rock_ridge.name() == b"a"*RR_MAX_FILENAME_LENGTH)
+
+    # The relocated directory and its links should have been stitched back.
+    dir8 = iso2.get_entry("/RR_MOVED/DIR8")
+    assert(dir8.rock_ridge.moved_to_cl_dr is not None)
+
+    out = BytesIO()
+    iso2.write_fp(out)
+    with open(outfile, 'rb') as infp:
+        assert(out.getvalue() == infp.read())
+
+    iso2.close()
+
+    with pytest.raises(pycdlib.pycdlibexception.PyCdlibInvalidInput):
+        pycdlib.PyCdlib().open(outfile, lazy=True, workers=2)
+
+def test_parse_open_metadata_cache(tmpdir, fixed_time):
+    iso = pycdlib.PyCdlib()
+    iso.new(rock_ridge="1.09", joliet=True)
+
+    foostr = b"foo\n"
+    iso.add_fp(BytesIO(foostr), len(foostr), "/FOO.;1", rr_name="foo", joliet_path="/foo")
+    iso.add_symlink("/SYM.;1", "sym", "foo", joliet_path="/sym")
+
+    outfile = os.path.join(str(tmpdir), 'cached.iso')
+    cachefile = os.path.join(str(tmpdir), 'cached.iso.cache')
+    iso.write(outfile)
+    iso.close()
+    os.utime(outfile, (1500000000, 1500000000))
+
+    # The first open parses the ISO and writes the cache.
+    iso2 = pycdlib.PyCdlib()
+    iso2.open(outfile, cache_path=cachefile)
+    check_rr_joliet_symlink(iso2, os.stat(outfile).st_size)
+    root_extents = [iso2.pvd.root_directory_record().extent_location(),
+                    iso2.joliet_vd.root_directory_record().extent_location()]
+    iso2.close()
+    assert(os.path.exists(cachefile))
+
+    # Wipe the root directories, which the cache isn't keyed on, so that the
+    # ISO can only be opened from the cache.
+    with open(outfile, 'rb') as infp:
+        orig = infp.read()
+    with open(outfile, 'r+b') as outfp:
+        for extent in root_extents:
+            outfp.seek(extent * 2048)
+            outfp.write(b'\x00' * 2048)
+    os.utime(outfile, (1500000000, 1500000000))
+
+    iso3 = pycdlib.PyCdlib()
+    iso3.open(outfile, cache_path=cachefile)
+    check_rr_joliet_symlink(iso3, os.stat(outfile).st_size)
+
+    fooout = BytesIO()
+    iso3.get_and_write_fp("/FOO.;1", fooout)
+    assert(fooout.getvalue() == foostr)
+
+    out = BytesIO()
+    iso3.write_fp(out)
+    assert(out.getvalue() == orig)
+
+    iso3.close()
+
+    # Changing the ISO must invalidate the cache.
+    iso4 = pycdlib.PyCdlib()
+    iso4.new(joliet=True)
+    iso4.add_directory("/DIR1", joliet_path="/dir1")
+    iso4.write(outfile)
+    iso4.close()
+    os.utime(outfile, (0, 0))
+
+    iso5 = pycdlib.PyCdlib()
+    iso5.open(outfile, cache_path=cachefile)
+    check_joliet_onedir(iso5, os.stat(outfile).st_size)
+    iso5.close()
+
+def test_parse_open_metadata_cache_corrupted(tmpdir):
+    iso = pycdlib.PyCdlib()
+    iso.new(rock_ridge="1.09", joliet=True)
+
+    foostr = b"foo\n"
+    iso.add_fp(BytesIO(foostr), len(foostr), "/FOO.;1", rr_name="foo", joliet_path="/foo")
+    iso.add_symlink("/SYM.;1", "sym", "foo", joliet_path="/sym")
+
+    outfile = os.path.join(str(tmpdir), 'cached.iso')
+    cachefile = os.path.join(str(tmpdir), 'cached.iso.cache')
+    iso.write(outfile)
+    iso.close()
+
+    iso2 = pycdlib.PyCdlib()
+    iso2.open(outfile, cache_path=cachefile)
+    iso2.close()
+
+    with open(cachefile, 'rb') as infp:
+        magic = infp.readline()
+        fingerprint = infp.readline()
+        payload = infp.read()
+
+    # A truncated cache, one whose pickle is cut short and one that holds
+    # the wrong kind of object are all ignored, and the ISO is parsed again.
+    for bad in (payload[:len(payload) // 2],
+                zlib.compress(zlib.decompress(payload)[:-10]),
+                zlib.compress(pickle.dumps({'pvd': None}))):
+        with open(cachefile, 'wb') as outfp:
+            outfp.write(magic + fingerprint + bad)
+
+        iso3 = pycdlib.PyCdlib()
+        iso3.open(outfile, cache_path=cachefile)
+        check_rr_joliet_symlink(iso3, os.stat(outfile).st_size)
+        iso3.close()
+
+        # The cache is written out again by the parse.
+        with open(cachefile, 'rb') as infp:
+            assert(infp.read() == magic + fingerprint + payload)
+
+def test_parse_records_memory(tmpdir):
+    tracemalloc = pytest.importorskip("tracemalloc")
+
+    iso = pycdlib.PyCdlib()
+    iso.new(rock_ridge="1.09")
+
+    numfiles = 500
+    for i in range(numfiles):
+        iso.add_fp(BytesIO(b"a"), 1, "/F%d.;1" % i, rr_name="f%d" % i)
+
+    out = BytesIO()
+    iso.write_fp(out)
+    iso.close()
+
+    # A coarse bound on the memory each parsed Rock Ridge entry takes; it is
+    # about 2.4KB with the slotted classes and about 3.9KB without them.
+    tracemalloc.start()
+    try:
+        iso2 = pycdlib.PyCdlib()
+        before = tracemalloc.get_traced_memory()[0]
+        iso2.open_fp(out)
+        used = tracemalloc.get_traced_memory()[0] - before
+    finally:
+        tracemalloc.stop()
+    assert(used < numfiles * 3072)
+
+    iso2.close()
+
+def test_parse_open_many_relocated(tmpdir, fixed_time):
+    iso = pycdlib.PyCdlib()
+    iso.new(rock_ridge="1.09")
+
+    path = ""
+    for i in range(1, 8):
+        path += "/DIR%d" % i
+        iso.add_directory(path, rr_name="dir%d" % i)
+
+    numdirs = 20
+    for i in range(numdirs):
+        iso.add_directory(path + "/DEEP%d" % i, rr_name="deep%d" % i)
+
+    out = BytesIO()
+    iso.write_fp(out)
+    iso.close()
+
+    iso2 = pycdlib.PyCdlib()
+    iso2.open_fp(out)
+
+    rr_moved = iso2.get_entry("/RR_MOVED")
+    children = list(iso2.list_dir(path))[2:]
+    assert(len(children) == numdirs)
+    for child in children:
+        # list_dir should hand back the relocated directories themselves,
+        # linked back to their placeholders.
+        assert(child.parent is rr_moved)
+        assert(child.rock_ridge.moved_to_cl_dr is not None)
+        assert(child.rock_ridge.moved_to_cl_dr.rock_ridge.cl_to_moved_dr is child)
+        dotdot = child.children[1]
+        assert(dotdot.rock_ridge.parent_link.file_identifier() == b"DIR7")
+
+    out2 = BytesIO()
+    iso2.write_fp(out2)
+    assert(out2.getvalue() == out.getvalue())
+
+    iso2.close()
+
+def test_parse_open_rr_decoded_on_demand(tmpdir, fixed_time):
+    iso = pycdlib.PyCdlib()
+    iso.new(rock_ridge="1.09")
+
+    aastr = b"aa\n"
+    iso.add_fp(BytesIO(aastr), len(aastr), "/AAAAAAAA.;1", rr_name="a"*RR_MAX_FILENAME_LENGTH)
+    iso.add_symlink("/SYM.;1", "sym", "aaaa/bbbb")
+    foostr = b"foo\n"
+    iso.add_fp(BytesIO(foostr), len(foostr), "/FOO.;1", rr_name="foorrname")
+
+    out = BytesIO()
+    iso.write_fp(out)
+    iso.close()
+
+    iso2 = pycdlib.PyCdlib()
+    iso2.open_fp(out, validation="standard")
+
+    # The name lives partly in the continuation entry.
+    aa = iso2.get_entry("/AAAAAAAA.;1")
+    sym = iso2.get_entry("/SYM.;1")
+    assert(aa.rock_ridge.name() == b"a"*RR_MAX_FILENAME_LENGTH)
+    assert(not aa.rock_ridge.is_symlink())
+    assert(sym.rock_ridge.is_symlink())
+    assert(sym.rock_ridge.symlink_path() == b"aaaa/bbbb")
+
+    out2 = BytesIO()
+    iso2.write_fp(out2)
+    assert(out2.getvalue() == out.getvalue())
+
+    iso2.close()
+
+    # Give the NM entry of FOO invalid flags, leaving its framing alone.
+    data = bytearray(out.getvalue())
+    nm = data.index(b"NM\x0e\x01\x00foorrname")
+    data[nm + 4] = 0x3
+
+    # Below strict validation, the Rock Ridge entries are decoded the first
+    # time they are used, so only using the broken one fails.
+    iso3 = pycdlib.PyCdlib()
+    iso3.open_fp(BytesIO(bytes(data)), validation="standard")
+    assert(iso3.get_entry("/AAAAAAAA.;1").rock_ridge.name() == b"a"*RR_MAX_FILENAME_LENGTH)
+    assert(iso3.get_entry("/SYM.;1").rock_ridge.symlink_path() == b"aaaa/bbbb")
+    foo = iso3.get_entry("/FOO.;1")
+    with pytest.raises(pycdlib.pycdlibexception.PyCdlibInvalidISO):
+        foo.rock_ridge.name()
+    iso3.close()
+
+def test_parse_open_dr_decoded_on_demand(tmpdir, fixed_time, monkeypatch):
+    iso = pycdlib.PyCdlib()
+    iso.new(xa=True)
+
+    aastr = b"aa\n"
+    iso.add_fp(BytesIO(aastr), len(aastr), "/AA.;1")
+
+    out = BytesIO()
+    iso.write_fp(out)
+    iso.close()
+
+    dates_parsed = []
+    orig_parse = pycdlib.dates.DirectoryRecordDate.parse
+    def _counting_parse(self, datestr):
+        dates_parsed.append(datestr)
+        return orig_parse(self, datestr)
+    monkeypatch.setattr(pycdlib.dates.DirectoryRecordDate, "parse", _counting_parse)
+
+    iso2 = pycdlib.PyCdlib()
+    iso2.open_fp(out)
+
+    # Opening the ISO should only have decoded what is needed to walk the
+    # tree; the date waits until it is used.
+    aa = iso2.get_entry("/AA.;1")
+    assert(aa.file_identifier() == b"AA.;1")
+    assert(dates_parsed == [])
+    assert(aa.date.years_since_1900 == 117)
+    assert(len(dates_parsed) == 1)
+    assert(aa.xa_record is not None)
+    assert(aa.seqnum == 1)
+
+    out2 = BytesIO()
+    iso2.write_fp(out2)
+    assert(out2.getvalue() == out.getvalue())
+
+    iso2.close()
+
+def test_parse_dr_from_memoryview(tmpdir):
+    iso = pycdlib.PyCdlib()
+    iso.new()
+
+    foostr = b"foo\n"
+    iso.add_fp(BytesIO(foostr), len(foostr), "/FOO.;1")
+
+    out = BytesIO()
+    iso.write_fp(out)
+    iso.close()
+
+    iso2 = pycdlib.PyCdlib()
+    iso2.open_fp(out)
+    root = iso2.pvd.root_directory_record()
+    foo = iso2.get_entry("/FOO.;1")
+
+    # The directory extents are parsed out of views into a single buffer, so
+    # a record has to parse the same from a view as from a string.
+    data = out.getvalue()
+    offset = root.extent_location() * 2048 + 34 + 34
+    reclen = struct.unpack_from("=B", data, offset)[0]
+    for record in (data[offset:offset + reclen],
+                   memoryview(data)[offset:offset + reclen]):
+        rec = pycdlib.dr.DirectoryRecord()
+        rec.parse(record, None, root)
+        assert(rec.file_identifier() == b"FOO.;1")
+        assert(rec.extent_location() == foo.extent_location())
+        assert(rec.data_length == len(foostr))
+        assert(rec.date.years_since_1900 == foo.date.years_since_1900)
+
+    iso2.close()
+
+def test_parse_open_boot_info_table_on_use(tmpdir, monkeypatch):
+    iso = pycdlib.PyCdlib()
+    iso.new()
+
+    bootstr = b"boot\n" * 1000
+    iso.add_fp(BytesIO(bootstr), len(bootstr), "/BOOT.;1")
+    iso.add_eltorito("/BOOT.;1", "/BOOT.CAT;1", boot_info_table=True)
+
+    out = BytesIO()
+    iso.write_fp(out)
+    iso.close()
+
+    csums = []
+    orig_csum = pycdlib.eltorito.boot_info_table_csum
+    def _counting_csum(data_fp, data_len, log_block_size):
+        csums.append(data_len)
+        return orig_csum(data_fp, data_len, log_block_size)
+    monkeypatch.setattr(pycdlib.eltorito, "boot_info_table_csum", _counting_csum)
+
+    iso2 = pycdlib.PyCdlib()
+    iso2.open_fp(out)
+
+    # Opening the ISO doesn't checksum the boot file; getting it does.
+    assert(csums == [])
+    boot = BytesIO()
+    iso2.get_and_write_fp("/BOOT.;1", boot)
+    assert(csums == [len(bootstr)])
+    assert(boot.getvalue()[:8] == bootstr[:8])
+    assert(boot.getvalue()[64:] == bootstr[64:])
+
+    out2 = BytesIO()
+    iso2.write_fp(out2)
+    assert(csums == [len(bootstr)])
+    assert(out2.getvalue() == out.getvalue())
+
+    iso2.close()
+
+def test_parse_open_eltorito_many_sections(tmpdir):
+    iso = pycdlib.PyCdlib()
+    iso.new(interchange_level=4)
+
+    numboots = 10
+    for i in range(numboots):
+        bootstr = b"boot%d\n" % (i)
+        iso.add_fp(BytesIO(bootstr), len(bootstr), "/boot%d" % (i))
+        iso.add_eltorito("/boot%d" % (i), "/boot.cat")
+
+    out = BytesIO()
+    iso.write_fp(out)
+    iso.close()
+
+    iso2 = pycdlib.PyCdlib()
+    iso2.open_fp(out)
+
+    catalog = iso2.eltorito_boot_catalog
+    assert(len(catalog.sections) == numboots - 1)
+    assert(catalog.initial_entry.dirrecord is iso2.get_entry("/boot0"))
+    for i, sec in enumerate(catalog.sections):
+        assert(sec.section_entries[0].dirrecord is iso2.get_entry("/boot%d" % (i + 1)))
+        assert(catalog.contains_child(sec.section_entries[0].dirrecord))
+    assert(catalog.contains_child(catalog.dirrecord))
+    assert(not catalog.contains_child(iso2.pvd.root_directory_record()))
+
+    iso2.rm_hard_link(iso_path="/boot5")
+    assert(catalog.sections[4].section_entries[0].dirrecord.hidden)
+
+    iso2.close()
+
+def test_parse_open_rr_ce_blocks_read_once(tmpdir):
+    iso = pycdlib.PyCdlib()
+    iso.new(rock_ridge="1.09")
+
+    iso.add_directory("/DIR1", rr_name="dir1")
+    numfiles = 10
+    for i in range(numfiles):
+        iso.add_fp(BytesIO(b"a\n"), 2, "/DIR1/A%d.;1" % i, rr_name=("%d" % i)*RR_MAX_FILENAME_LENGTH)
+
+    out = BytesIO()
+    iso.write_fp(out)
+    iso.close()
+
+    class RecordingFp(object):
+        def __init__(self, fp):
+            self.fp = fp
+            self.reads = []
+
+        def read(self, length=-1):
+            self.reads.append((self.fp.tell(), length))
+            return self.fp.read(length)
+
+        def __getattr__(self, name):
+            return getattr(self.fp, name)
+
+    infp = RecordingFp(out)
+    iso2 = pycdlib.PyCdlib()
+    iso2.open_fp(infp)
+    reads = infp.reads
+
+    # The continuation areas all share blocks, which should each have been
+    # read exactly once.
+    assert(len(reads) == len(set(reads)))
+    ptr_offsets = [iso2.pvd.path_table_location_le * 2048,
+                   iso2.pvd.path_table_location_be * 2048]
+    assert([length for offset, length in reads if length < 2048 and offset not in ptr_offsets] == [])
+
+    for i in range(numfiles):
+        rec = iso2.get_entry("/DIR1/A%d.;1" % i)
+        assert(rec.rock_ridge.name() == (("%d" % i)*RR_MAX_FILENAME_LENGTH).encode('utf-8'))
+
+    iso2.close()
+
+def test_parse_open_bulk_metadata_reads(tmpdir):
+    iso = pycdlib.PyCdlib()
+    iso.new(joliet=True)
+
+    bootstr = b"boot\n"
+    iso.add_fp(BytesIO(bootstr), len(bootstr), "/BOOT.;1", joliet_path="/boot")
+    iso.add_eltorito("/BOOT.;1", "/BOOT.CAT;1")
+
+    out = BytesIO()
+    iso.write_fp(out)
+    iso.close()
+
+    class CountingFp(object):
+        def __init__(self, fp):
+            self.fp = fp
+            self.reads = 0
+
+        def read(self, length=-1):
+            self.reads += 1
+            return self.fp.read(length)
+
+        def __getattr__(self, name):
+            return getattr(self.fp, name)
+
+    infp = CountingFp(out)
+    iso2 = pycdlib.PyCdlib()
+    iso2.open_fp(infp)
+
+    # One read for the System Area and volume descriptors, one for the boot
+    # catalog, four for the PVD and Joliet path tables, and at most one per
+    # directory tree.
+    assert(infp.reads <= 8)
+
+    check_joliet_and_eltorito_nofiles(iso2, len(out.getvalue()))
+
+    iso2.close()
+
+def test_parse_open_validation_levels(tmpdir):
+    iso = pycdlib.PyCdlib()
+    iso.new(rock_ridge="1.09", joliet=3)
+
+    foostr = b"foo\n"
+    iso.add_fp(BytesIO(foostr), len(foostr), "/FOO.;1", rr_name="foo", joliet_path="/foo")
+    iso.add_symlink("/SYM.;1", "sym", "foo", joliet_path="/sym")
+
+    out = BytesIO()
+    iso.write_fp(out)
+    iso.close()
+
+    for validation in ["strict", "standard", "trust"]:
+        iso2 = pycdlib.PyCdlib()
+        iso2.open_fp(out, validation=validation)
+
+        check_rr_joliet_symlink(iso2, len(out.getvalue()))
+
+        iso2.close()
+
+def test_parse_open_validation_skips_be_path_tables(tmpdir):
+    iso = pycdlib.PyCdlib()
+    iso.new()
+
+    iso.add_directory("/DIR1")
+
+    out = BytesIO()
+    iso.write_fp(out)
+    iso.close()
+
+    # Corrupt the big-endian path table; only a strict open looks at it.
+    data = bytearray(out.getvalue())
+    (be_extent,) = struct.unpack_from(">L", data, 16 * 2048 + 148)
+    data[be_extent * 2048 + 2] ^= 0xff
+    corrupt = BytesIO(bytes(data))
+
+    iso2 = pycdlib.PyCdlib()
+    with pytest.raises(pycdlib.pycdlibexception.PyCdlibInvalidISO):
+        iso2.open_fp(corrupt)
+
+    iso2 = pycdlib.PyCdlib()
+    iso2.open_fp(corrupt, validation="standard")
+    check_onedir(iso2, len(data))
+    iso2.close()
+
+def test_parse_open_validation_invalid(tmpdir):
+    iso = pycdlib.PyCdlib()
+    with pytest.raises(pycdlib.pycdlibexception.PyCdlibInvalidInput):
+        iso.open_fp(BytesIO(), validation="none")
+
+def test_parse_open_parse_limits(tmpdir):
+    iso = pycdlib.PyCdlib()
+    iso.new(rock_ridge="1.09")
+
+    iso.add_directory("/DIR1", rr_name="dir1")
+    iso.add_directory("/DIR1/DIR2", rr_name="dir2")
+    for i in range(5):
+        iso.add_fp(BytesIO(b"a\n"), 2, "/DIR1/DIR2/A%d.;1" % i, rr_name=("%d" % i)*RR_MAX_FILENAME_LENGTH)
+
+    out = BytesIO()
+    iso.write_fp(out)
+    iso.close()
+
+    ParseLimits = pycdlib.pycdlib.ParseLimits
+
+    # Generous limits don't get in the way.
+    limits = ParseLimits(max_entries=100, max_depth=3, max_ce_bytes=2048,
+                         max_metadata_bytes=1024*1024, timeout=60)
+    for read_only in (False, True):
+        iso2 = pycdlib.PyCdlib()
+        iso2.open_fp(out, read_only=read_only, limits=limits)
+        assert(iso2.get_entry("/DIR1/DIR2/A4.;1") is not None)
+        iso2.close()
+
+    for limits in (ParseLimits(max_entries=10), ParseLimits(max_depth=2),
+                   ParseLimits(max_ce_bytes=100),
+                   ParseLimits(max_metadata_bytes=40000),
+                   ParseLimits(timeout=-1)):
+        for read_only in (False, True):
+            iso2 = pycdlib.PyCdlib()
+            with pytest.raises(pycdlib.pycdlibexception.PyCdlibInvalidISO):
+                iso2.open_fp(out, read_only=read_only, limits=limits)
+
+    iso2 = pycdlib.PyCdlib()
+    with pytest.raises(pycdlib.pycdlibexception.PyCdlibInvalidInput):
+        iso2.open_fp(out, lazy=True, limits=ParseLimits(max_entries=10))
+    with pytest.raises(pycdlib.pycdlibexception.PyCdlibInvalidInput):
+        iso2.open_fp(out, limits={'max_entries': 10})
+
+def test_parse_iter_entries_parse_limits(tmpdir):
+    iso = pycdlib.PyCdlib()
+    iso.new(rock_ridge="1.09")
+
+    iso.add_directory("/DIR1", rr_name="dir1")
+    iso.add_directory("/DIR1/DIR2", rr_name="dir2")
+    for i in range(5):
+        iso.add_fp(BytesIO(b"a\n"), 2, "/DIR1/DIR2/A%d.;1" % i, rr_name=("%d" % i)*RR_MAX_FILENAME_LENGTH)
+
+    out = BytesIO()
+    iso.write_fp(out)
+    iso.close()
+
+    ParseLimits = pycdlib.pycdlib.ParseLimits
+
+    for name, value in (("max_entries", 10), ("max_depth", 2),
+                        ("max_ce_bytes", 100), ("max_metadata_bytes", 4096),
+                        ("timeout", -1)):
+        limits = ParseLimits(max_entries=100, max_depth=3, max_ce_bytes=2048,
+                             max_metadata_bytes=1024*1024, timeout=60)
+        iso2 = pycdlib.PyCdlib()
+        iso2.open_fp(out, read_only=True, limits=limits)
+        assert(len(list(iso2.iter_entries())) == 7)
+
+        # The walk is held to the limits the ISO was opened with.
+        setattr(limits, name, value)
+        with pytest.raises(pycdlib.pycdlibexception.PyCdlibInvalidISO):
+            list(iso2.iter_entries())
+        iso2.close()
+
+def test_parse_open_namespaces(tmpdir):
+    iso = pycdlib.PyCdlib()
+    iso.new(rock_ridge="1.09", joliet=3)
+
+    iso.add_directory("/DIR1", rr_name="dir1", joliet_path="/dir1")
+    foostr = b"foo\n"
+    iso.add_fp(BytesIO(foostr), len(foostr), "/DIR1/FOO.;1", rr_name="foo", joliet_path="/dir1/foo")
+
+    out = BytesIO()
+    iso.write_fp(out)
+    iso.close()
+
+    for read_only in (False, True):
+        # Without Joliet.
+        iso2 = pycdlib.PyCdlib()
+        iso2.open_fp(out, read_only=read_only, namespaces=("iso9660", "rock_ridge"))
+        rec = iso2.get_entry("/DIR1/FOO.;1")
+        assert(rec.rock_ridge is not None)
+        with pytest.raises(pycdlib.pycdlibexception.PyCdlibInvalidInput):
+            iso2.get_entry("/dir1/foo", joliet=True)
+        with pytest.raises(pycdlib.pycdlibexception.PyCdlibInvalidInput):
+            list(iso2.list_dir("/dir1", joliet=True))
+        fooout = BytesIO()
+        iso2.get_and_write_fp("/DIR1/FOO.;1", fooout)
+        assert(fooout.getvalue() == foostr)
+        iso2.close()
+
+        # Without Rock Ridge.
+        iso2 = pycdlib.PyCdlib()
+        iso2.open_fp(out, read_only=read_only, namespaces=("iso9660",))
+        assert(iso2.get_entry("/DIR1/FOO.;1").rock_ridge is None)
+        iso2.close()
+
+        # Just Joliet.
+        iso2 = pycdlib.PyCdlib()
+        iso2.open_fp(out, read_only=read_only, namespaces=("joliet",))
+        with pytest.raises(pycdlib.pycdlibexception.PyCdlibInvalidInput):
+            iso2.get_entry("/DIR1/FOO.;1")
+        with pytest.raises(pycdlib.pycdlibexception.PyCdlibInvalidInput):
+            list(iso2.iter_entries())
+        fooout = BytesIO()
+        iso2.get_and_write_fp("/dir1/foo", fooout)
+        assert(fooout.getvalue() == foostr)
+        with pytest.raises(pycdlib.pycdlibexception.PyCdlibInvalidInput):
+            iso2.get_and_write_fp("/DIR1/FOO.;1", BytesIO())
+        iso2.close()
+
+    iso2 = pycdlib.PyCdlib()
+    iso2.open_fp(out, namespaces=("iso9660", "rock_ridge"))
+    with pytest.raises(pycdlib.pycdlibexception.PyCdlibInvalidInput):
+        iso2.write_fp(BytesIO())
+    with pytest.raises(pycdlib.pycdlibexception.PyCdlibInvalidInput):
+        iso2.rm_file("/DIR1/FOO.;1", rr_name="foo", joliet_path="/dir1/foo")
+    iso2.close()
+
+    for namespaces in (("rock_ridge",), ("joliet", "udf"), ()):
+        iso2 = pycdlib.PyCdlib()
+        with pytest.raises(pycdlib.pycdlibexception.PyCdlibInvalidInput):
+            iso2.open_fp(out, namespaces=namespaces)
+    with pytest.raises(pycdlib.pycdlibexception.PyCdlibInvalidInput):
+        iso2.open_fp(out, lazy=True, namespaces=("joliet",))
+
+def test_parse_iter_entries(tmpdir):
+    iso = pycdlib.PyCdlib()
+    iso.new(rock_ridge="1.09", joliet=3)
+
+    iso.add_directory("/DIR1", rr_name="dir1", joliet_path="/dir1")
+    foostr = b"foo\n"
+    iso.add_fp(BytesIO(foostr), len(foostr), "/DIR1/FOO.;1", rr_name="foo", joliet_path="/dir1/foo")
+    iso.add_symlink("/SYM.;1", "sym", "foo", joliet_path="/sym")
+
+    out = BytesIO()
+    iso.write_fp(out)
+    iso.close()
+
+    iso2 = pycdlib.PyCdlib()
+    iso2.open_fp(out, lazy=True)
+
+    entries = list(iso2.iter_entries())
+    assert([entry.path for entry in entries] == ["/DIR1", "/SYM.;1", "/DIR1/FOO.;1"])
+    assert([entry.is_dir for entry in entries] == [True, False, False])
+    assert([entry.rr_name() for entry in entries] == [b"dir1", b"sym", b"foo"])
+    assert(entries[2].size == len(foostr))
+    assert(entries[2].rr_mode() == 0o100444)
+    assert(entries[2].rr_times() is not None)
+
+    # Walking the entries doesn't build the directory tree.
+    dir1 = iso2.pvd.root_directory_record().children[2]
+    assert(dir1.children == [])
+
+    assert(entries[2].extent == iso2.get_entry("/DIR1/FOO.;1").extent_location())
+
+    jentries = list(iso2.iter_entries(joliet=True))
+    assert([entry.path for entry in jentries] == ["/dir1", "/sym", "/dir1/foo"])
+    assert([entry.rr_name() for entry in jentries] == [None, None, None])
+
+    iso2.close()
+
+def test_parse_iter_entries_namespaces(tmpdir):
+    iso = pycdlib.PyCdlib()
+    iso.new(rock_ridge="1.09")
+
+    iso.add_directory("/DIR1", rr_name="dir1")
+    foostr = b"foo\n"
+    iso.add_fp(BytesIO(foostr), len(foostr), "/DIR1/FOO.;1", rr_name="foo")
+
+    out = BytesIO()
+    iso.write_fp(out)
+    iso.close()
+
+    iso2 = pycdlib.PyCdlib()
+    iso2.open_fp(out, namespaces=("iso9660",))
+
+    # Rock Ridge isn't decoded if it wasn't asked for when opening.
+    entries = list(iso2.iter_entries())
+    assert([entry.path for entry in entries] == ["/DIR1", "/DIR1/FOO.;1"])
+    assert([entry.rr_name() for entry in entries] == [None, None])
+
+    iso2.close()
+
+def test_parse_iter_entries_not_opened(tmpdir):
+    iso = pycdlib.PyCdlib()
+    iso.new()
+
+    with pytest.raises(pycdlib.pycdlibexception.PyCdlibInvalidInput):
+        list(iso.iter_entries())
+
+    iso.close()
+
+def test_parse_open_read_only(tmpdir):
+    iso = pycdlib.PyCdlib()
+    iso.new(rock_ridge="1.09", joliet=3)
+
+    iso.add_directory("/DIR1", rr_name="dir1", joliet_path="/dir1")
+    foostr = b"foo\n"
+    iso.add_fp(BytesIO(foostr), len(foostr), "/DIR1/FOO.;1", rr_name="foo", joliet_path="/dir1/foo")
+    iso.add_symlink("/SYM.;1", "sym", "foo", joliet_path="/sym")
+    bootstr = b"boot\n" * 500
+    iso.add_fp(BytesIO(bootstr), len(bootstr), "/BOOT.;1", rr_name="boot", joliet_path="/boot")
+    iso.add_eltorito("/BOOT.;1", "/BOOT.CAT;1", boot_info_table=True)
+
+    out = BytesIO()
+    iso.write_fp(out)
+    iso.close()
+
+    iso2 = pycdlib.PyCdlib()
+    iso2.open_fp(out, read_only=True)
+
+    entries = list(iso2.list_dir("/"))
+    assert([entry.path for entry in entries] == ["/BOOT.;1", "/BOOT.CAT;1", "/DIR1", "/SYM.;1"])
+    assert([entry.rr_name() for entry in entries] == [b"boot", b"boot.cat", b"dir1", b"sym"])
+
+    entry = iso2.get_entry("/DIR1/FOO.;1")
+    assert(entry.path == "/DIR1/FOO.;1")
+    assert(entry.size == len(foostr))
+    assert(not entry.is_dir)
+    assert(entry.rr_mode() == 0o100444)
+
+    # Rock Ridge names can be used to look entries up, too.
+    assert(iso2.get_entry("/dir1/foo").extent == entry.extent)
+
+    jentry = iso2.get_entry("/dir1/foo", joliet=True)
+    assert(jentry.path == "/dir1/foo")
+    assert(jentry.extent == entry.extent)
+
+    # The boot file is read with its boot info table filled in.
+    iso3 = pycdlib.PyCdlib()
+    iso3.open_fp(out)
+    for path in ["/DIR1/FOO.;1", "/BOOT.;1", "/BOOT.CAT;1"]:
+        data = BytesIO()
+        iso2.get_and_write_fp(path, data)
+        expected = BytesIO()
+        iso3.get_and_write_fp(path, expected)
+        assert(data.getvalue() == expected.getvalue())
+    iso3.close()
+
+    with pytest.raises(pycdlib.pycdlibexception.PyCdlibInvalidInput):
+        iso2.get_and_write_fp("/SYM.;1", BytesIO())
+
+    with pytest.raises(pycdlib.pycdlibexception.PyCdlibInvalidInput):
+        iso2.get_entry("/DIR2")
+
+    with pytest.raises(pycdlib.pycdlibexception.PyCdlibInvalidInput):
+        iso2.add_directory("/DIR2", rr_name="dir2", joliet_path="/dir2")
+
+    with pytest.raises(pycdlib.pycdlibexception.PyCdlibInvalidInput):
+        iso2.write_fp(BytesIO())
+
+    iso2.close()
+
+def test_parse_open_read_only_rr_deep(tmpdir):
+    iso = pycdlib.PyCdlib()
+    iso.new(rock_ridge="1.09")
+
+    path = ""
+    for i in range(1, 9):
+        path += "/DIR%d" % (i)
+        iso.add_directory(path, rr_name="dir%d" % (i))
+    foostr = b"foo\n"
+    iso.add_fp(BytesIO(foostr), len(foostr), path + "/FOO.;1", rr_name="foo")
+
+    out = BytesIO()
+    iso.write_fp(out)
+    iso.close()
+
+    iso2 = pycdlib.PyCdlib()
+    iso2.open_fp(out, read_only=True)
+
+    # The relocated directory is found through its child link.
+    entries = list(iso2.list_dir("/DIR1/DIR2/DIR3/DIR4/DIR5/DIR6/DIR7"))
+    assert([entry.path for entry in entries] == ["/RR_MOVED/DIR8"])
+    assert(entries[0].rr_name() == b"dir8")
+
+    data = BytesIO()
+    iso2.get_and_write_fp(path + "/FOO.;1", data)
+    assert(data.getvalue() == foostr)
+
+    iso2.close()
+
+def test_parse_open_strict_rr_checked(tmpdir):
+    iso = pycdlib.PyCdlib()
+    iso.new(rock_ridge="1.09")
+
+    foostr = b"foo\n"
+    iso.add_fp(BytesIO(foostr), len(foostr), "/FOO.;1", rr_name="foorrname")
+
+    out = BytesIO()
+    iso.write_fp(out)
+    iso.close()
+
+    # Give the NM entry invalid flags, leaving its framing alone.
+    data = bytearray(out.getvalue())
+    nm = data.index(b"NM\x0e\x01\x00foorrname")
+    data[nm + 4] = 0x3
+
+    # Strict validation checks the contents of the Rock Ridge entries while
+    # opening the ISO.
+    for read_only in (False, True):
+        iso2 = pycdlib.PyCdlib()
+        with pytest.raises(pycdlib.pycdlibexception.PyCdlibInvalidISO):
+            iso2.open_fp(BytesIO(bytes(data)), validation="strict", read_only=read_only)
+
+    # A lazy open leaves them until they are used.
+    iso2 = pycdlib.PyCdlib()
+    iso2.open_fp(BytesIO(bytes(data)), validation="strict", lazy=True)
+    foo = iso2.get_entry("/FOO.;1")
+    with pytest.raises(pycdlib.pycdlibexception.PyCdlibInvalidISO):
+        foo.rock_ridge.name()
+    iso2.close()